@@ -0,0 +1,5 @@
+"""Development and test tooling: stand-ins for Elasticsearch and Redis.
+
+Nothing in the ``scraper`` app imports this at run time; only the offline
+load test, the search benchmark and the test suite use it.
+"""
@@ -0,0 +1,171 @@
+"""In-process stand-in for the slice of the Elasticsearch API the read views use.
+
+Serves search, count and completion-suggest requests shaped like the bodies
+``ElasticsearchClient`` builds, over a seeded corpus of synthetic Bengali
+articles, so the API can be load-tested without a cluster or network access.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+import orjson
+from aiohttp import web
+from scraper.dedup import article_doc_id
+
+HEADERS = {'X-Elastic-Product': 'Elasticsearch', 'Content-Type': 'application/json'}
+
+WORDS = [
+    "নির্বাচন", "সরকার", "অর্থনীতি", "বাজেট", "ঢাকা", "আন্দোলন", "শিক্ষার্থী", "বিশ্ববিদ্যালয়",
+    "ক্রিকেট", "ফুটবল", "বিশ্বকাপ", "চলচ্চিত্র", "গান", "বন্যা", "বৃষ্টি", "আবহাওয়া",
+    "পুলিশ", "আদালত", "মামলা", "রায়", "ব্যাংক", "ডলার", "রপ্তানি", "পোশাক", "শ্রমিক",
+    "স্বাস্থ্য", "হাসপাতাল", "ডেঙ্গু", "চাকরি", "নিয়োগ", "পরীক্ষা", "প্রধানমন্ত্রী", "সংসদ",
+    "ভারত", "চীন", "যুক্তরাষ্ট্র", "জাতিসংঘ", "যুদ্ধ", "শান্তি", "উন্নয়ন", "প্রকল্প", "সেতু",
+]
+AUTHORS = ["নিজস্ব প্রতিবেদক", "বিশেষ প্রতিনিধি", "ক্রীড়া প্রতিবেদক", "বিনোদন ডেস্ক", "অনলাইন ডেস্ক"]
+LOCATIONS = ["ঢাকা", "চট্টগ্রাম", "সিলেট", "রাজশাহী", "খুলনা", "বরিশাল"]
+
+# Realistic read-path queries: common single terms, phrases and a miss
+SAMPLE_QUERIES = ["নির্বাচন", "অর্থনীতি বাজেট", "ক্রিকেট বিশ্বকাপ", "ঢাকা", "ডেঙ্গু হাসপাতাল", "মহাকাশযান"]
+
+
+def seed_articles(count, categories, seed=1):
+    """Deterministic synthetic articles in the indexed document shape"""
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 30, 12, 0)
+    articles = []
+    for n in range(count):
+        headline = " ".join(rng.sample(WORDS, 5))
+        content = "\n".join(" ".join(rng.choices(WORDS, k=40)) for _ in range(rng.randint(4, 12)))
+        author = rng.choice(AUTHORS)
+        published_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        articles.append({
+            "url": f"https://www.prothomalo.com/stub/{n}",
+            "headline": headline,
+            "author": author,
+            "location": rng.choice(LOCATIONS),
+            "published_at": published_at.strftime('%Y-%m-%d %H:%M'),
+            "content": content,
+            "scraped_at": now.isoformat(),
+            "word_count": len(content.split()),
+            "category": [rng.choice(categories)],
+            "suggest": {"input": [headline, author]},
+        })
+    return articles
+
+
+class ElasticsearchStub:
+    """aiohttp app answering /, HEAD /{index}, /{index}/_search and /{index}/_count"""
+
+    def __init__(self, articles, latency=0.0):
+        self.latency = latency
+        self.articles = sorted(articles, key=lambda a: a['published_at'], reverse=True)
+        # Lower-cased text per searchable field, computed once
+        self.text = [
+            {field: str(article.get(field, '')).lower() for field in ('headline', 'content', 'author')}
+            for article in self.articles
+        ]
+        self.requests = 0
+
+    def app(self):
+        app = web.Application(client_max_size=10 * 1024 * 1024)
+        app.router.add_route('GET', '/', self.info)
+        app.router.add_route('HEAD', '/', self.info)
+        app.router.add_route('HEAD', '/{index}', self.index_exists)
+        app.router.add_route('*', '/{index}/_search', self.search)
+        app.router.add_route('*', '/{index}/_count', self.count)
+        return app
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Serve on the running loop; returns (runner, bound port)"""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    @staticmethod
+    def respond(data, status=200):
+        return web.Response(body=orjson.dumps(data), status=status, headers=HEADERS)
+
+    async def info(self, request):
+        return self.respond({"version": {"number": "9.0.2"}, "tagline": "You Know, for Search"})
+
+    async def index_exists(self, request):
+        return web.Response(status=200, headers=HEADERS)
+
+    async def read_body(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        raw = await request.read()
+        return orjson.loads(raw) if raw else {}
+
+    def matches(self, i, query):
+        if 'bool' not in query:
+            return self.clause_matches(i, query)
+        clauses = query['bool'].get('must', []) + query['bool'].get('filter', [])
+        return all(self.clause_matches(i, clause) for clause in clauses)
+
+    def clause_matches(self, i, clause):
+        article = self.articles[i]
+        if 'match_all' in clause:
+            return True
+        if 'multi_match' in clause:
+            terms = clause['multi_match']['query'].lower().split()
+            fields = [field.split('^')[0] for field in clause['multi_match']['fields']]
+            return any(term in self.text[i][field] for term in terms for field in fields)
+        if 'match' in clause:
+            (field, value), = clause['match'].items()
+            return any(term in self.text[i][field] for term in str(value).lower().split())
+        if 'term' in clause:
+            (field, value), = clause['term'].items()
+            actual = article.get(field)
+            return value in actual if isinstance(actual, list) else actual == value
+        if 'range' in clause:
+            (field, bounds), = clause['range'].items()
+            day = article[field][:10]
+            return day >= bounds.get('gte', day) and day <= bounds.get('lte', day)
+        return True
+
+    async def search(self, request):
+        body = await self.read_body(request)
+        if 'suggest' in body:
+            return self.respond(self.suggest(body['suggest']))
+
+        query = body.get('query', {'match_all': {}})
+        matched = [i for i in range(len(self.articles)) if self.matches(i, query)]
+        start = body.get('from', 0)
+        hits = [
+            {"_index": request.match_info['index'], "_id": article_doc_id(self.articles[i]['url']), "_score": 1.0,
+             "_source": self.articles[i]}
+            for i in matched[start:start + body.get('size', 10)]
+        ]
+        return self.respond({
+            "took": 1, "timed_out": False,
+            "hits": {"total": {"value": len(matched), "relation": "eq"}, "max_score": 1.0, "hits": hits}
+        })
+
+    def suggest(self, suggest_body):
+        results = {}
+        for name, spec in suggest_body.items():
+            prefix = spec['prefix'].lower()
+            completion = spec['completion']
+            categories = completion.get('contexts', {}).get('category')
+            options, seen = [], set()
+            for article in self.articles:
+                if categories and not set(categories) & set(article['category']):
+                    continue
+                for text in article['suggest']['input']:
+                    if text.lower().startswith(prefix) and text not in seen:
+                        seen.add(text)
+                        options.append({"text": text, "_source": {
+                            key: article[key] for key in ('headline', 'author', 'url')
+                        }})
+                if len(options) >= completion.get('size', 5):
+                    break
+            results[name] = [{"text": spec['prefix'], "offset": 0, "length": len(prefix), "options": options}]
+        return {"took": 1, "timed_out": False, "hits": {"total": {"value": 0}, "hits": []}, "suggest": results}
+
+    async def count(self, request):
+        body = await self.read_body(request)
+        query = body.get('query', {'match_all': {}})
+        return self.respond({"count": sum(1 for i in range(len(self.articles)) if self.matches(i, query))})
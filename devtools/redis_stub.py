@@ -0,0 +1,257 @@
+"""In-memory stand-in for the Redis commands the scraper uses.
+
+``FakeRedis`` mimics the slice of the redis-py client API the project calls
+(strings, sets, hashes, sorted sets, pipelines and locks) with bytes replies,
+so unit tests can patch it in for ``redis_client``. ``RedisStub`` serves the
+same data over the RESP protocol for processes that connect by URL, such as
+the API server of the offline load test. Keys never expire.
+"""
+import asyncio
+
+
+def encode(value):
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    return str(value).encode()
+
+
+def key_name(key):
+    return key.decode() if isinstance(key, bytes) else key
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute()"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class FakeLock:
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    def acquire(self, blocking=None, blocking_timeout=None):
+        return bool(self.redis.set(self.name, b'1', nx=True))
+
+    def release(self):
+        self.redis.delete(self.name)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def flushall(self):
+        self.data.clear()
+        return True
+
+    def ping(self):
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return FakeLock(self, key_name(name))
+
+    # Keys
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key_name(key), None) is not None)
+
+    def exists(self, *keys):
+        return sum(1 for key in keys if key_name(key) in self.data)
+
+    def expire(self, key, seconds):
+        return key_name(key) in self.data
+
+    def keys(self, pattern='*'):
+        prefix = pattern.rstrip('*')
+        return [key.encode() for key in self.data if key.startswith(prefix)]
+
+    # Strings
+    def get(self, key):
+        return self.data.get(key_name(key))
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        key = key_name(key)
+        if (nx and key in self.data) or (xx and key not in self.data):
+            return None
+        self.data[key] = encode(value)
+        return True
+
+    def incr(self, key, amount=1):
+        key = key_name(key)
+        value = int(self.data.get(key, b'0')) + amount
+        self.data[key] = encode(value)
+        return value
+
+    # Sets
+    def sadd(self, key, *values):
+        members = self.data.setdefault(key_name(key), set())
+        added = {encode(value) for value in values} - members
+        members.update(added)
+        return len(added)
+
+    def srem(self, key, *values):
+        members = self.data.get(key_name(key), set())
+        removed = {encode(value) for value in values} & members
+        members -= removed
+        return len(removed)
+
+    def smismember(self, key, values, *args):
+        values = [values, *args] if isinstance(values, (str, bytes)) else [*values, *args]
+        members = self.data.get(key_name(key), set())
+        return [int(encode(value) in members) for value in values]
+
+    def smembers(self, key):
+        return set(self.data.get(key_name(key), set()))
+
+    # Hashes
+    def hset(self, key, field=None, value=None, mapping=None):
+        fields = self.data.setdefault(key_name(key), {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = 0
+        for name, item in items.items():
+            added += encode(name) not in fields
+            fields[encode(name)] = encode(item)
+        return added
+
+    def hget(self, key, field):
+        return self.data.get(key_name(key), {}).get(encode(field))
+
+    def hmget(self, key, fields, *args):
+        fields = [fields, *args] if isinstance(fields, (str, bytes)) else [*fields, *args]
+        values = self.data.get(key_name(key), {})
+        return [values.get(encode(field)) for field in fields]
+
+    def hkeys(self, key):
+        return list(self.data.get(key_name(key), {}))
+
+    def hvals(self, key):
+        return list(self.data.get(key_name(key), {}).values())
+
+    def hgetall(self, key):
+        return dict(self.data.get(key_name(key), {}))
+
+    def hdel(self, key, *fields):
+        values = self.data.get(key_name(key), {})
+        return sum(1 for field in fields if values.pop(encode(field), None) is not None)
+
+    # Sorted sets
+    def zadd(self, key, mapping):
+        scores = self.data.setdefault(key_name(key), {})
+        added = sum(1 for member in mapping if encode(member) not in scores)
+        scores.update({encode(member): float(score) for member, score in mapping.items()})
+        return added
+
+    def ranked(self, key):
+        return sorted(self.data.get(key_name(key), {}).items(), key=lambda item: (item[1], item[0]))
+
+    @staticmethod
+    def span(items, start, end):
+        end = len(items) + end if end < 0 else end
+        return items[start if start >= 0 else max(len(items) + start, 0):end + 1]
+
+    def zrevrange(self, key, start, end, withscores=False):
+        items = self.span(self.ranked(key)[::-1], start, end)
+        return items if withscores else [member for member, _ in items]
+
+    def zremrangebyrank(self, key, start, end):
+        scores = self.data.get(key_name(key), {})
+        removed = self.span(self.ranked(key), start, end)
+        for member, _ in removed:
+            del scores[member]
+        return len(removed)
+
+    def zcard(self, key):
+        return len(self.data.get(key_name(key), {}))
+
+
+class RedisStub:
+    """asyncio RESP server over a FakeRedis, for redis-py clients in other processes"""
+
+    def __init__(self, redis=None):
+        self.redis = redis or FakeRedis()
+        self.requests = 0
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Serve on the running loop; returns (server, bound port)"""
+        server = await asyncio.start_server(self.handle, host, port)
+        return server, server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.requests += 1
+                writer.write(self.reply(self.dispatch(args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, args):
+        command, args = args[0].decode().upper(), args[1:]
+        redis = self.redis
+        try:
+            if command == 'PING':
+                return 'PONG'
+            if command in ('CLIENT', 'SELECT'):
+                return True
+            if command == 'SET':
+                options = [arg.decode().upper() for arg in args[2:]]
+                return redis.set(args[0], args[1], nx='NX' in options, xx='XX' in options)
+            if command in ('HMGET', 'SADD', 'SREM', 'DEL', 'EXISTS', 'HDEL'):
+                return getattr(redis, {'DEL': 'delete'}.get(command, command.lower()))(*args)
+            if command == 'HSET':
+                return redis.hset(args[0], mapping=dict(zip(args[1::2], args[2::2])))
+            if command == 'ZADD':
+                return redis.zadd(args[0], dict(zip(args[2::2], (float(score) for score in args[1::2]))))
+            if command == 'ZREVRANGE':
+                items = redis.zrevrange(args[0], int(args[1]), int(args[2]), withscores=len(args) > 3)
+                return [part for item in items for part in item] if len(args) > 3 else items
+            if command in ('ZREMRANGEBYRANK', 'EXPIRE', 'INCR'):
+                return getattr(redis, command.lower())(args[0], *(int(arg) for arg in args[1:]))
+            return getattr(redis, command.lower())(*args)
+        except AttributeError:
+            return RuntimeError(f"unknown command '{command}'")
+
+    def reply(self, value):
+        if isinstance(value, RuntimeError):
+            return f"-ERR {value}\r\n".encode()
+        if value is None:
+            return b"$-1\r\n"
+        if value is True:
+            return b"+OK\r\n"
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, (list, set, tuple)):
+            return f"*{len(value)}\r\n".encode() + b''.join(self.reply(item) for item in value)
+        value = encode(value)
+        return f"${len(value)}\r\n".encode() + value + b"\r\n"
@@ -1,6 +1,40 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
+import { getRelatedArticles } from '../services/api';
+
+// Precomputed at index time, so opening the panel is a single cheap request
+const RelatedArticles = ({ articleId }) => {
+  const [related, setRelated] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    getRelatedArticles(articleId, { size: 5 })
+      .then((response) => setRelated(response.data.results))
+      .catch(() => setError('Could not load related stories.'));
+  }, [articleId]);
+
+  if (error) {
+    return <p className="text-danger mb-0">{error}</p>;
+  }
+  if (related === null) {
+    return <p className="mb-0">Loading...</p>;
+  }
+  if (related.length === 0) {
+    return <p className="text-muted mb-0">No related stories yet.</p>;
+  }
+  return (
+    <ul className="list-unstyled mb-0">
+      {related.map((item) => (
+        <li key={item.id}>
+          <a href={item.url} target="_blank" rel="noopener noreferrer">{item.headline}</a>
+        </li>
+      ))}
+    </ul>
+  );
+};
 
 const ArticleList = ({ articles, loading, error, page, totalPages, setPage }) => {
+  const [openRelated, setOpenRelated] = useState(null);
+
   return (
     <div className="mt-4">
       <h2>Articles</h2>
@@ -13,10 +47,21 @@ const ArticleList = ({ articles, loading, error, page, totalPages, setPage }) =>
             <p className="mb-1"><strong>Author:</strong> {article.author}</p>
             <p className="mb-1"><strong>Location:</strong> {article.location}</p>
             <p className="mb-1"><strong>Published:</strong> {new Date(article.published_at).toLocaleString()}</p>
-            <p className="mb-1"><strong>Category:</strong> {article.category}</p>
+            <p className="mb-1"><strong>Category:</strong> {[].concat(article.category).join(', ')}</p>
             <p className='mb-1'>
   <strong>Content:</strong> {article.content.slice(0, 300)}...
 </p>
+            <button
+              className="btn btn-link btn-sm p-0"
+              onClick={() => setOpenRelated(openRelated === article.id ? null : article.id)}
+            >
+              {openRelated === article.id ? 'Hide related stories' : 'Related stories'}
+            </button>
+            {openRelated === article.id && (
+              <div className="border-start ps-3 mt-2">
+                <RelatedArticles articleId={article.id} />
+              </div>
+            )}
 
           </li>
         ))}
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getCategories } from '../services/api';
+import { getCategories, getSuggestions } from '../services/api';
 
 const SearchBar = ({ onSearch, setPage, onReload }) => {
   const [query, setQuery] = useState('');
@@ -9,6 +9,7 @@ const SearchBar = ({ onSearch, setPage, onReload }) => {
   const [dateFrom, setDateFrom] = useState('');
   const [dateTo, setDateTo] = useState('');
   const [categories, setCategories] = useState([]);
+  const [suggestions, setSuggestions] = useState([]);
 
   useEffect(() => {
     const fetchCategories = async () => {
@@ -23,6 +24,27 @@ const SearchBar = ({ onSearch, setPage, onReload }) => {
     fetchCategories();
   }, []);
 
+  useEffect(() => {
+    const prefix = query.trim();
+    if (!prefix) {
+      setSuggestions([]);
+      return undefined;
+    }
+
+    // Debounce keystrokes so only the settled prefix hits the suggest endpoint
+    const timer = setTimeout(async () => {
+      try {
+        const params = category ? { q: prefix, category } : { q: prefix };
+        const response = await getSuggestions(params);
+        setSuggestions(response.data.suggestions);
+      } catch (err) {
+        console.error('Error fetching suggestions:', err);
+      }
+    }, 150);
+
+    return () => clearTimeout(timer);
+  }, [query, category]);
+
   const handleSubmit = (e) => {
     e.preventDefault();
     onSearch({ query, category, author, location, date_from: dateFrom, date_to: dateTo });
@@ -49,8 +71,14 @@ const SearchBar = ({ onSearch, setPage, onReload }) => {
               className="form-control"
               placeholder="Search for articles..."
               value={query}
+              list="headline-suggestions"
               onChange={(e) => setQuery(e.target.value)}
             />
+            <datalist id="headline-suggestions">
+              {suggestions.map((suggestion) => (
+                <option key={`${suggestion.url}-${suggestion.text}`} value={suggestion.text} />
+              ))}
+            </datalist>
           </div>
           <div className="col-lg-2 col-md-6 mb-2">
             <select
@@ -7,6 +7,7 @@ const StartScrapingForm = ({ onTaskStarted }) => {
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [notice, setNotice] = useState(null);
 
   useEffect(() => {
     const fetchCategories = async () => {
@@ -28,11 +29,21 @@ const StartScrapingForm = ({ onTaskStarted }) => {
     e.preventDefault();
     try {
       setLoading(true);
-      await startScraping({ category, max_pages: maxPages });
+      setNotice(null);
+      const response = await startScraping({ category, max_pages: maxPages });
       setError(null);
+      // Duplicate requests attach to (or extend) the crawl already running for the category
+      if (response.data.coalesced) {
+        setNotice(response.data.message);
+      }
       onTaskStarted();
     } catch (err) {
-      setError('Error starting scraping task.');
+      if (err.response?.status === 409) {
+        const minutes = Math.ceil(err.response.data.retry_after / 60);
+        setError(`${err.response.data.error}; try again in ${minutes} min or request more pages.`);
+      } else {
+        setError('Error starting scraping task.');
+      }
       console.error(err);
     } finally {
       setLoading(false);
@@ -77,6 +88,7 @@ const StartScrapingForm = ({ onTaskStarted }) => {
             </button>
           </div>
         </div>
+        {notice && <p className="text-info mt-2">{notice}</p>}
         {error && <p className="text-danger mt-2">{error}</p>}
       </form>
     </div>
@@ -7,6 +7,45 @@ const apiClient = axios.create({
   headers: {
     'Content-Type': 'application/json',
   },
+  // 304 Not Modified is answered from the local ETag cache below
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+});
+
+// Last ETag and body per GET URL, so polling unchanged pages costs an empty 304.
+// Bounded LRU: a Map iterates in insertion order, so re-inserting on use keeps the oldest first
+const ETAG_CACHE_SIZE = 100;
+const etagCache = new Map();
+
+const rememberEtag = (key, entry) => {
+  etagCache.delete(key);
+  etagCache.set(key, entry);
+  if (etagCache.size > ETAG_CACHE_SIZE) {
+    etagCache.delete(etagCache.keys().next().value);
+  }
+};
+
+apiClient.interceptors.request.use((config) => {
+  if ((config.method || 'get').toLowerCase() === 'get') {
+    const key = apiClient.getUri(config);
+    const cached = etagCache.get(key);
+    if (cached) {
+      rememberEtag(key, cached);
+      config.headers['If-None-Match'] = cached.etag;
+    }
+  }
+  return config;
+});
+
+apiClient.interceptors.response.use((response) => {
+  const key = apiClient.getUri(response.config);
+  if (response.status === 304 && etagCache.has(key)) {
+    return { ...response, status: 200, data: etagCache.get(key).data };
+  }
+  const etag = response.headers.etag;
+  if (etag && (response.config.method || 'get').toLowerCase() === 'get') {
+    rememberEtag(key, { etag, data: response.data });
+  }
+  return response;
 });
 
 export const getArticles = (params) => {
@@ -17,6 +56,10 @@ export const searchArticles = (params) => {
   return apiClient.get('/articles/search/', { params });
 };
 
+export const getSuggestions = (params) => {
+  return apiClient.get('/articles/suggest/', { params });
+};
+
 export const getCategories = () => {
   return apiClient.get('/categories/');
 };
@@ -28,3 +71,7 @@ export const getTasks = () => {
 export const startScraping = (data) => {
   return apiClient.post('/start/', data);
 };
+
+export const getRelatedArticles = (id, params) => {
+  return apiClient.get(`/articles/${encodeURIComponent(id)}/related/`, { params });
+};
@@ -1,9 +1,12 @@
 import os
 from celery import Celery
 from django.conf import settings
+from scraper.serialization import register_celery_serializer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prothomalo_api.settings')
 
+register_celery_serializer()
+
 app = Celery('prothomalo_api')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
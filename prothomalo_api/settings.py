@@ -14,6 +14,7 @@ from pathlib import Path
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +36,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -51,6 +53,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
 
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,27 +81,78 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'prothomalo_api.wsgi.application'
+# The article read views are async; daphne makes runserver serve them over ASGI too
+ASGI_APPLICATION = 'prothomalo_api.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite for local development; set DB_ENGINE=postgresql once several Celery
+# workers write task state, since SQLite serialises every writer on one lock
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'prothomalo'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
+    if os.getenv('DB_POOL', 'true').lower() == 'true':
+        # One psycopg pool per process, shared by the async views' threads and the worker.
+        # Processes x DB_POOL_MAX_SIZE must stay below the server's max_connections (100 by default)
+        DATABASES['default']['OPTIONS'] = {'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }}
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # WAL lets API reads proceed during a worker's write; IMMEDIATE takes the
+                # write lock up front so busy writers wait out `timeout` instead of failing
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+
+# Per-process cache for hot typeahead prefixes
+SUGGEST_CACHE_TIMEOUT = int(os.getenv('SUGGEST_CACHE_TIMEOUT', 30))
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'suggest': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'suggest',
+        'TIMEOUT': SUGGEST_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
-    # 'DEFAULT_RENDERER_CLASSES': [
-    #     'rest_framework.renderers.JSONRenderer',
-    # ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'scraper.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 
@@ -142,19 +196,125 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
+# 'orjson' is registered with kombu in celery_app.py; plain json is still accepted
+CELERY_ACCEPT_CONTENT = ['orjson', 'json']
+CELERY_TASK_SERIALIZER = 'orjson'
+CELERY_RESULT_SERIALIZER = 'orjson'
 CELERY_TIMEZONE = TIME_ZONE
+# Long crawls are acknowledged only when they finish, so a lost worker's task is redelivered
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': int(os.getenv('CELERY_VISIBILITY_TIMEOUT', 3600))}
+CELERY_BEAT_SCHEDULE = {
+    'retry-failed-fetches': {
+        'task': 'scraper.tasks.retry_failed_fetches',
+        'schedule': float(os.getenv('SCRAPER_RETRY_INTERVAL', 300)),
+    },
+    'requeue-stale-tasks': {
+        'task': 'scraper.tasks.requeue_stale_tasks',
+        'schedule': float(os.getenv('SCRAPER_WATCHDOG_INTERVAL', 120)),
+    },
+    'schedule-category-crawls': {
+        'task': 'scraper.tasks.schedule_crawls',
+        'schedule': float(os.getenv('SCRAPER_SCHEDULER_TICK', 60)),
+    },
+}
+
+# 'api' fills articles from story JSON and falls back to HTML; 'html' always parses the page
+SCRAPER_EXTRACTION_MODE = os.getenv('SCRAPER_EXTRACTION_MODE', 'api')
+SCRAPER_SOURCE_TIMEZONE = os.getenv('SCRAPER_SOURCE_TIMEZONE', 'Asia/Dhaka')
+
+# Article pages are fetched by a thread pool and parsed by a process pool (0 = one per core).
+# Every fetch thread waits SCRAPER_REQUEST_DELAY between requests, so the origin sees about
+# SCRAPER_FETCH_CONCURRENCY / SCRAPER_REQUEST_DELAY requests per second per crawl; raise with care.
+# The parse pool needs a non-prefork Celery worker (--pool threads), see scraper.parsing.ParsePool
+SCRAPER_FETCH_CONCURRENCY = int(os.getenv('SCRAPER_FETCH_CONCURRENCY', 1))
+SCRAPER_REQUEST_DELAY = float(os.getenv('SCRAPER_REQUEST_DELAY', 1.0))
+SCRAPER_PARSE_WORKERS = int(os.getenv('SCRAPER_PARSE_WORKERS', 0))
+
+# Near-duplicate detection: MinHash signatures banded into a Redis-backed LSH index
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+DEDUP_NUM_PERM = int(os.getenv('DEDUP_NUM_PERM', 128))
+DEDUP_BANDS = int(os.getenv('DEDUP_BANDS', 16))
+DEDUP_SHINGLE_SIZE = int(os.getenv('DEDUP_SHINGLE_SIZE', 5))
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.8))
+
+# Dead-letter queue for failed article/page fetches (delays in seconds)
+SCRAPER_RETRY_BASE_DELAY = int(os.getenv('SCRAPER_RETRY_BASE_DELAY', 300))
+SCRAPER_RETRY_MAX_DELAY = int(os.getenv('SCRAPER_RETRY_MAX_DELAY', 6 * 3600))
+SCRAPER_RETRY_MAX_ATTEMPTS = int(os.getenv('SCRAPER_RETRY_MAX_ATTEMPTS', 6))
+SCRAPER_RETRY_BATCH_SIZE = int(os.getenv('SCRAPER_RETRY_BATCH_SIZE', 50))
+
+# A scrape request for a category crawled successfully this recently (seconds) is rejected
+SCRAPER_COALESCE_WINDOW = int(os.getenv('SCRAPER_COALESCE_WINDOW', 600))
+
+# Adaptive crawl scheduler: each category is crawled often enough to find about
+# SCRAPER_SCHEDULE_TARGET_NEW new articles per crawl, within the interval bounds (seconds)
+# Off by default: enabling it starts crawls of every category without anyone asking
+SCRAPER_SCHEDULER_ENABLED = os.getenv('SCRAPER_SCHEDULER_ENABLED', 'false').lower() == 'true'
+SCRAPER_SCHEDULE_TARGET_NEW = int(os.getenv('SCRAPER_SCHEDULE_TARGET_NEW', 12))
+SCRAPER_SCHEDULE_MIN_INTERVAL = int(os.getenv('SCRAPER_SCHEDULE_MIN_INTERVAL', 10 * 60))
+SCRAPER_SCHEDULE_MAX_INTERVAL = int(os.getenv('SCRAPER_SCHEDULE_MAX_INTERVAL', 24 * 3600))
+SCRAPER_SCHEDULE_DEFAULT_INTERVAL = int(os.getenv('SCRAPER_SCHEDULE_DEFAULT_INTERVAL', 3600))
+SCRAPER_SCHEDULE_HISTORY = int(os.getenv('SCRAPER_SCHEDULE_HISTORY', 10))
+SCRAPER_SCHEDULE_STAGGER = int(os.getenv('SCRAPER_SCHEDULE_STAGGER', 120))
+SCRAPER_SCHEDULE_STARTS_PER_TICK = int(os.getenv('SCRAPER_SCHEDULE_STARTS_PER_TICK', 1))
+SCRAPER_MAX_CONCURRENT_CRAWLS = int(os.getenv('SCRAPER_MAX_CONCURRENT_CRAWLS', 3))
+
+# Crawl checkpoints: progress is saved to Redis after every batch of articles and the
+# watchdog requeues RUNNING tasks whose heartbeat is older than the timeout (seconds)
+SCRAPER_CHECKPOINT_BATCH_SIZE = int(os.getenv('SCRAPER_CHECKPOINT_BATCH_SIZE', 12))
+SCRAPER_CHECKPOINT_TTL = int(os.getenv('SCRAPER_CHECKPOINT_TTL', 7 * 24 * 3600))
+SCRAPER_HEARTBEAT_TIMEOUT = int(os.getenv('SCRAPER_HEARTBEAT_TIMEOUT', 600))
+SCRAPER_MAX_RESUMES = int(os.getenv('SCRAPER_MAX_RESUMES', 3))
+
+# Optional raw capture of fetched article pages for offline re-extraction
+SCRAPER_CAPTURE_ENABLED = os.getenv('SCRAPER_CAPTURE_ENABLED', 'false').lower() == 'true'
+SCRAPER_CAPTURE_DIR = os.getenv('SCRAPER_CAPTURE_DIR', str(BASE_DIR / 'captures'))
+
+# Historical backfill from the daily sitemaps, one partition per category and day
+SCRAPER_SITEMAP_URL = os.getenv(
+    'SCRAPER_SITEMAP_URL', 'https://www.prothomalo.com/sitemap/sitemap-daily-{date}.xml'
+)
+SCRAPER_BACKFILL_BATCH_SIZE = int(os.getenv('SCRAPER_BACKFILL_BATCH_SIZE', 50))
+# Each daily sitemap is downloaded once and shared by every category's partition (seconds)
+SCRAPER_SITEMAP_CACHE_TTL = int(os.getenv('SCRAPER_SITEMAP_CACHE_TTL', 24 * 3600))
+
+# 'elasticsearch', or 'sqlite' to search the embedded FTS5 article store instead
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'elasticsearch')
+# Mirror bulk loads into the article store so reads survive an Elasticsearch outage
+ARTICLE_STORE_ENABLED = os.getenv('ARTICLE_STORE_ENABLED', 'false').lower() == 'true'
+ARTICLE_STORE_PATH = os.getenv('ARTICLE_STORE_PATH', str(BASE_DIR / 'articles.sqlite3'))
+ARTICLE_STORE_MMAP_SIZE = int(os.getenv('ARTICLE_STORE_MMAP_SIZE', 256 * 1024 * 1024))
 
 ELASTICSEARCH_HOST = os.getenv('ELASTICSEARCH_HOST', 'http://localhost:9200')
 ELASTICSEARCH_USER = os.getenv('ELASTICSEARCH_USER', 'elastic')
 ELASTICSEARCH_PASSWORD = os.getenv('ELASTICSEARCH_PASSWORD', 'JvQhvZYl')
+ELASTICSEARCH_NUMBER_OF_SHARDS = int(os.getenv('ELASTICSEARCH_NUMBER_OF_SHARDS', 3))
+# Related stories precomputed per article after each bulk load
+RELATED_ARTICLES_SIZE = int(os.getenv('RELATED_ARTICLES_SIZE', 10))
+RELATED_ARTICLES_BATCH_SIZE = int(os.getenv('RELATED_ARTICLES_BATCH_SIZE', 50))
+RELATED_CACHE_TIMEOUT = int(os.getenv('RELATED_CACHE_TIMEOUT', 300))
+
+# Trends API window when no dates are given
+TRENDS_DEFAULT_DAYS = int(os.getenv('TRENDS_DEFAULT_DAYS', 30))
+
+# A replica can never be allocated on the single node we run; raise this on a real cluster
+ELASTICSEARCH_NUMBER_OF_REPLICAS = int(os.getenv('ELASTICSEARCH_NUMBER_OF_REPLICAS', 0))
+# 'standard' or 'compact' (best_compression codec, trimmed postings and norms); see compact_index.
+# Only for a new index: rebuilds and reindexes keep the profile recorded in the live index
+ELASTICSEARCH_MAPPING_PROFILE = os.getenv('ELASTICSEARCH_MAPPING_PROFILE', 'standard')
+# Longest a bulk load waits while an alias swap has paused writes to the live index (seconds)
+ELASTICSEARCH_WRITE_PAUSE_TIMEOUT = int(os.getenv('ELASTICSEARCH_WRITE_PAUSE_TIMEOUT', 120))
+ELASTICSEARCH_ASYNC_CONNECTIONS = int(os.getenv('ELASTICSEARCH_ASYNC_CONNECTIONS', 50))
 
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True if DEBUG else False
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+CORS_EXPOSE_HEADERS = ['ETag']
 
 
 
@@ -163,6 +323,10 @@ AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME')
 AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
 
+# Kept out of git; created here so a fresh checkout can log
+LOG_DIR = BASE_DIR / 'logs'
+LOG_DIR.mkdir(exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -170,7 +334,7 @@ LOGGING = {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
-            'filename': 'logs/scraper.log',
+            'filename': LOG_DIR / 'scraper.log',
         },
         'console': {
             'level': 'INFO',
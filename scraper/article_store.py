@@ -0,0 +1,307 @@
+"""Embedded SQLite FTS5 copy of the articles index.
+
+It is the SearchBackend when SEARCH_BACKEND is 'sqlite', for deployments
+without Elasticsearch. With ARTICLE_STORE_ENABLED it also mirrors the index
+as the fallback used when Elasticsearch is unreachable. The bulk-index stage
+feeds it with the same merge rules as MERGE_ARTICLE_SCRIPT.
+
+FTS5's unicode61 tokenizer only treats letters and digits as token
+characters. Bengali vowel signs, virama, nukta and the other combining marks
+would split every word into fragments, so they are added with tokenchars,
+together with the zero-width joiner and non-joiner that spell conjuncts such
+as the র‍্য in র‍্যাব. A store created with an older tokenizer is re-tokenized
+when it is first opened.
+"""
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from django.conf import settings
+from .search_backends import SearchBackend
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+# Combining marks of the Bengali block: candrabindu, anusvara, visarga (0981-0983), nukta (09BC),
+# vowel signs and virama (09BE-09CD), au length mark (09D7), vocalic vowel signs (09E2-09E3),
+# and the zero-width non-joiner and joiner (200C-200D)
+BENGALI_TOKENCHARS = ''.join(
+    chr(code) for code in [*range(0x0981, 0x0984), 0x09BC, *range(0x09BE, 0x09CE), 0x09D7, 0x09E2, 0x09E3,
+                           0x200C, 0x200D]
+)
+
+FTS_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    headline, content, author,
+    content='articles', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 0 tokenchars '{BENGALI_TOKENCHARS}'"
+)"""
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS articles (
+    rowid INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    url TEXT,
+    headline TEXT,
+    author TEXT,
+    location TEXT,
+    published_at TEXT,
+    content TEXT,
+    scraped_at TEXT,
+    word_count INTEGER,
+    category TEXT NOT NULL,
+    duplicate_urls TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+CREATE TABLE IF NOT EXISTS article_categories (
+    category TEXT NOT NULL,
+    article INTEGER NOT NULL,
+    PRIMARY KEY (category, article)
+) WITHOUT ROWID;
+{FTS_TABLE};
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, headline, content, author) VALUES (new.rowid, new.headline, new.content, new.author);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, content, author)
+    VALUES ('delete', old.rowid, old.headline, old.content, old.author);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF headline, content, author ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, content, author)
+    VALUES ('delete', old.rowid, old.headline, old.content, old.author);
+    INSERT INTO articles_fts (rowid, headline, content, author) VALUES (new.rowid, new.headline, new.content, new.author);
+END;
+"""
+
+SOURCE_FIELDS = ['url', 'headline', 'author', 'location', 'published_at', 'content', 'scraped_at', 'word_count']
+
+
+def phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class ArticleStore(SearchBackend):
+    def __init__(self, path):
+        self.path = Path(path)
+        self.local = threading.local()
+
+    @property
+    def db(self):
+        """This thread's connection, opened on first use"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; writes open their own BEGIN IMMEDIATE
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(f'PRAGMA mmap_size={settings.ARTICLE_STORE_MMAP_SIZE}')
+            connection.execute('PRAGMA temp_store=MEMORY')
+            connection.executescript(SCHEMA)
+            self.upgrade_tokenizer(connection)
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def upgrade_tokenizer(connection):
+        """Rebuild the full-text index of a store created with other tokenchars"""
+        def current():
+            return connection.execute("SELECT sql FROM sqlite_master WHERE name = 'articles_fts'").fetchone()[0]
+
+        if BENGALI_TOKENCHARS in current():
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Another process may have upgraded it meanwhile
+            if BENGALI_TOKENCHARS not in current():
+                logger.info("Re-tokenizing the article store's full-text index")
+                connection.execute('DROP TABLE articles_fts')
+                connection.execute(FTS_TABLE)
+                connection.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def close(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def index_articles(self, items):
+        """Merge (doc_id, article, replace) items like MERGE_ARTICLE_SCRIPT; returns the created doc ids"""
+        db = self.db
+        created = []
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for doc_id, article, replace in items:
+                row = db.execute(
+                    'SELECT rowid, category, duplicate_urls FROM articles WHERE doc_id = ?', (doc_id,)
+                ).fetchone()
+                if row is None:
+                    # Like the bulk upsert, a near-duplicate of a missing document takes its place
+                    cursor = db.execute(
+                        f'INSERT INTO articles (doc_id, {", ".join(SOURCE_FIELDS)}, category) '
+                        f'VALUES (?, {", ".join("?" * len(SOURCE_FIELDS))}, ?)',
+                        (doc_id, *(getattr(article, field) for field in SOURCE_FIELDS),
+                         serialization.dumps([article.category]).decode())
+                    )
+                    rowid = cursor.lastrowid
+                    created.append(doc_id)
+                else:
+                    rowid, categories, duplicate_urls = row
+                    categories = serialization.loads(categories)
+                    if article.category not in categories:
+                        categories.append(article.category)
+                    if replace:
+                        db.execute(
+                            f'UPDATE articles SET {", ".join(f"{field} = ?" for field in SOURCE_FIELDS)}, '
+                            f'category = ? WHERE rowid = ?',
+                            (*(getattr(article, field) for field in SOURCE_FIELDS),
+                             serialization.dumps(categories).decode(), rowid)
+                        )
+                    else:
+                        duplicate_urls = serialization.loads(duplicate_urls) if duplicate_urls else []
+                        if article.url not in duplicate_urls:
+                            duplicate_urls.append(article.url)
+                        db.execute(
+                            'UPDATE articles SET category = ?, duplicate_urls = ? WHERE rowid = ?',
+                            (serialization.dumps(categories).decode(), serialization.dumps(duplicate_urls).decode(),
+                             rowid)
+                        )
+                db.execute('INSERT OR IGNORE INTO article_categories (category, article) VALUES (?, ?)',
+                           (article.category, rowid))
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return created
+
+    def load_documents(self, docs):
+        """Write whole (doc_id, source) documents as Elasticsearch holds them, replacing any stored copy"""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for doc_id, source in docs:
+                categories = source.get('category') or []
+                if isinstance(categories, str):
+                    categories = [categories]
+                rowid = db.execute(
+                    f'INSERT INTO articles (doc_id, {", ".join(SOURCE_FIELDS)}, category, duplicate_urls) '
+                    f'VALUES (?, {", ".join("?" * len(SOURCE_FIELDS))}, ?, ?) '
+                    f'ON CONFLICT (doc_id) DO UPDATE SET '
+                    f'{", ".join(f"{field} = excluded.{field}" for field in SOURCE_FIELDS)}, '
+                    f'category = excluded.category, duplicate_urls = excluded.duplicate_urls RETURNING rowid',
+                    (doc_id, *(source.get(field) for field in SOURCE_FIELDS), serialization.dumps(categories).decode(),
+                     serialization.dumps(source['duplicate_urls']).decode() if source.get('duplicate_urls') else None)
+                ).fetchone()[0]
+                db.executemany('INSERT OR IGNORE INTO article_categories (category, article) VALUES (?, ?)',
+                               [(category, rowid) for category in categories])
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+
+    def retain(self, doc_ids):
+        """Delete every stored document not among doc_ids; returns how many went"""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS retained (doc_id TEXT PRIMARY KEY)')
+            db.execute('DELETE FROM retained')
+            db.executemany('INSERT OR IGNORE INTO retained VALUES (?)', ((doc_id,) for doc_id in doc_ids))
+            db.execute('DELETE FROM article_categories WHERE article IN '
+                       '(SELECT rowid FROM articles WHERE doc_id NOT IN (SELECT doc_id FROM retained))')
+            removed = db.execute('DELETE FROM articles WHERE doc_id NOT IN (SELECT doc_id FROM retained)').rowcount
+            db.execute('DELETE FROM retained')
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return removed
+
+    def get_documents(self, refs):
+        """{doc_id: source fields} of the stored documents among the (doc_id, routing) refs"""
+        doc_ids = [doc_id for doc_id, _ in refs]
+        documents = {}
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            rows = self.db.execute(
+                f'SELECT doc_id, {", ".join(SOURCE_FIELDS)} FROM articles '
+                f'WHERE doc_id IN ({", ".join("?" * len(chunk))})', chunk
+            ).fetchall()
+            documents.update((row[0], dict(zip(SOURCE_FIELDS, row[1:]))) for row in rows)
+        return documents
+
+    @staticmethod
+    def match_expression(query=None, author=None):
+        """FTS5 query: any query term in headline/content/author (multi_match), any author term (match)"""
+        parts = []
+        if query and query.split():
+            parts.append('{headline content author} : (' + ' OR '.join(phrase(term) for term in query.split()) + ')')
+        if author and author.split():
+            parts.append('author : (' + ' OR '.join(phrase(term) for term in author.split()) + ')')
+        return ' AND '.join(parts)
+
+    def search_articles(self, query=None, page=1, size=20, filters=None):
+        filters = filters or {}
+        where, params = [], []
+        match = self.match_expression(query, filters.get('author'))
+        if match:
+            where.append('rowid IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)')
+            params.append(match)
+        if filters.get('category'):
+            where.append('rowid IN (SELECT article FROM article_categories WHERE category = ?)')
+            params.append(filters['category'])
+        if filters.get('location'):
+            where.append('location = ?')
+            params.append(filters['location'])
+        if filters.get('date_from'):
+            where.append('published_at >= ?')
+            params.append(filters['date_from'])
+        if filters.get('date_to'):
+            # published_at is 'YYYY-MM-DD HH:MM'; include the whole last day
+            where.append('published_at <= ?')
+            params.append(f"{filters['date_to']} 23:59")
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+        try:
+            db = self.db
+            total = db.execute(f'SELECT count(*) FROM articles {where_sql}', params).fetchone()[0]
+            rows = db.execute(
+                f'SELECT doc_id, {", ".join(SOURCE_FIELDS)}, category, duplicate_urls FROM articles {where_sql} '
+                f'ORDER BY published_at DESC LIMIT ? OFFSET ?',
+                (*params, size, (page - 1) * size)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Article store search error: {e}")
+            return self.EMPTY_SEARCH_RESULT
+
+        hits = []
+        for doc_id, *values, category, duplicate_urls in rows:
+            source = dict(zip(SOURCE_FIELDS, values))
+            source['category'] = serialization.loads(category)
+            if duplicate_urls:
+                source['duplicate_urls'] = serialization.loads(duplicate_urls)
+            hits.append({'_id': doc_id, '_source': source})
+        return {"hits": {"hits": hits, "total": {"value": total}}}
+
+    def get_article_stats(self, category=None):
+        try:
+            if category:
+                count = self.db.execute(
+                    'SELECT count(*) FROM article_categories WHERE category = ?', (category,)
+                ).fetchone()[0]
+            else:
+                count = self.db.execute('SELECT count(*) FROM articles').fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Article store stats error: {e}")
+            return {"total_articles": 0}
+        return {"total_articles": count}
+
+
+article_store = (
+    ArticleStore(settings.ARTICLE_STORE_PATH)
+    if settings.SEARCH_BACKEND == 'sqlite' or settings.ARTICLE_STORE_ENABLED else None
+)
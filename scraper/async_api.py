@@ -0,0 +1,59 @@
+import inspect
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """APIView whose handlers are coroutines.
+
+    Keeps DRF's request parsing, authentication, permissions, throttling,
+    content negotiation and exception handling; only the handler runs on the
+    event loop. The checks in initial() may read the session or user from the
+    database, so they run in the thread pool.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            # OPTIONS is DRF's own synchronous handler
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def async_api_view(http_method_names):
+    """api_view() for coroutine functions; the view shows up in the schema like any other DRF view"""
+    def decorator(func):
+        async def handler(self, *args, **kwargs):
+            return await func(*args, **kwargs)
+
+        attrs = {'__doc__': func.__doc__, 'http_method_names': [method.lower() for method in {*http_method_names, 'options'}]}
+        attrs.update({method.lower(): handler for method in http_method_names})
+        for name in ('renderer_classes', 'parser_classes', 'authentication_classes', 'throttle_classes',
+                     'permission_classes', 'schema'):
+            attrs[name] = getattr(func, name, getattr(APIView, name))
+
+        WrappedAPIView = type(func.__name__, (AsyncAPIView,), attrs)
+        WrappedAPIView.__module__ = func.__module__
+        return WrappedAPIView.as_view()
+    return decorator
@@ -0,0 +1,90 @@
+"""Content-addressed store of raw article sources for offline re-extraction.
+
+Whatever an indexed article was extracted from is captured: the story JSON
+(from the collection payload or the story API) in 'api' extraction mode, the
+HTML page when extraction falls back to it. Each body is gzip-compressed once
+under its SHA-256 digest. Every capture appends a WARC-style record (target
+URI, fetch date, payload digest, ...) to a daily log, so the same page
+captured twice costs one blob and two small records.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from django.conf import settings
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+# Content type of captured story JSON, telling re-extraction to rebuild the article from it rather than parse HTML
+STORY_CONTENT_TYPE = 'application/json'
+
+
+class CaptureStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def blob_path(self, digest):
+        return self.root / 'blobs' / digest[:2] / digest[2:4] / f'{digest}.gz'
+
+    def log_path(self, day):
+        return self.root / 'records' / f'{day}.jsonl'
+
+    def save(self, url, content, category, status=200, content_type=None):
+        """Store a fetched body or story payload and append its record; returns the payload digest"""
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self.blob_path(digest)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent fetches of the same page never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=blob.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(content, compresslevel=6))
+            os.replace(tmp, blob)
+
+        fetched_at = datetime.now(timezone.utc)
+        record = {
+            'target_uri': url,
+            'date': fetched_at.isoformat(),
+            'payload_digest': f'sha256:{digest}',
+            'content_length': len(content),
+            'content_type': content_type,
+            'status': status,
+            'category': category,
+        }
+        log = self.log_path(fetched_at.date().isoformat())
+        log.parent.mkdir(parents=True, exist_ok=True)
+        # One short O_APPEND write per record keeps lines whole across worker processes
+        with open(log, 'ab') as f:
+            f.write(serialization.dumps(record) + b'\n')
+        return digest
+
+    def records(self, since=None, until=None):
+        """Yield records from the daily logs between two YYYY-MM-DD dates, inclusive"""
+        logs = sorted((self.root / 'records').glob('*.jsonl'))
+        for log in logs:
+            day = log.stem
+            if (since and day < since) or (until and day > until):
+                continue
+            with open(log, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield serialization.loads(line)
+
+    def latest(self, since=None, until=None):
+        """Most recent record per URL"""
+        latest = {}
+        for record in self.records(since, until):
+            current = latest.get(record['target_uri'])
+            if current is None or record['date'] > current['date']:
+                latest[record['target_uri']] = record
+        return latest
+
+    def read(self, digest):
+        return gzip.decompress(self.blob_path(digest.removeprefix('sha256:')).read_bytes())
+
+
+capture_store = CaptureStore(settings.SCRAPER_CAPTURE_DIR) if settings.SCRAPER_CAPTURE_ENABLED else None
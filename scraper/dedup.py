@@ -0,0 +1,271 @@
+import hashlib
+import logging
+import random
+import struct
+from array import array
+from urllib.parse import quote
+from django.conf import settings
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def article_doc_id(url):
+    return quote(url, safe='')
+
+
+class MinHasher:
+    """MinHash signatures over word shingles of article content"""
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text):
+        words = text.split()
+        if not words:
+            # Otherwise every empty article would share the one empty shingle
+            return set()
+        size = min(self.shingle_size, len(words))
+        hashes = set()
+        for i in range(len(words) - size + 1):
+            shingle = ' '.join(words[i:i + size]).encode('utf-8')
+            hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), 'little'))
+        return hashes
+
+    def signature(self, text):
+        hashes = self.shingles(text)
+        if not hashes:
+            return None
+        return [
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+            for a, b in self.permutations
+        ]
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded LSH buckets of MinHash signatures, persisted in Redis across tasks"""
+
+    KEY_PREFIX = "dedup"
+
+    def __init__(self, num_perm=128, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.sig_format = f'<{num_perm}I'
+
+    def doc_key(self, doc_id):
+        return f"{self.KEY_PREFIX}:doc:{doc_id}"
+
+    def band_keys(self, signature):
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f'<{self.rows}I', *rows), digest_size=8).hexdigest()
+            keys.append(f"{self.KEY_PREFIX}:band:{band}:{digest}")
+        return keys
+
+    def candidates(self, signature):
+        """Return {doc_id: (signature, category)} for every doc sharing a band bucket"""
+        pipe = redis_client.pipeline(transaction=False)
+        for key in self.band_keys(signature):
+            pipe.smembers(key)
+        doc_ids = set()
+        for members in pipe.execute():
+            doc_ids.update(member.decode() for member in members)
+        if not doc_ids:
+            return {}
+
+        doc_ids = sorted(doc_ids)
+        pipe = redis_client.pipeline(transaction=False)
+        for doc_id in doc_ids:
+            pipe.hmget(self.doc_key(doc_id), 'sig', 'category')
+        found = {}
+        for doc_id, (packed, category) in zip(doc_ids, pipe.execute()):
+            if packed:
+                found[doc_id] = (list(struct.unpack(self.sig_format, packed)), category.decode())
+        return found
+
+    def category_of(self, doc_id):
+        category = redis_client.hget(self.doc_key(doc_id), 'category')
+        return category.decode() if category else None
+
+    def insert(self, entries):
+        """Add (doc_id, signature, category) entries in one round trip"""
+        pipe = redis_client.pipeline(transaction=False)
+        for doc_id, signature, category in entries:
+            pipe.hset(self.doc_key(doc_id), mapping={
+                'sig': struct.pack(self.sig_format, *signature),
+                'category': category,
+            })
+            for key in self.band_keys(signature):
+                pipe.sadd(key, doc_id)
+        pipe.execute()
+
+
+class PendingSignatures:
+    """LSH buckets, kept in memory, of new documents assigned for a load that is not live yet.
+
+    A rebuild assigns its batches one after the other against the live LSH
+    index plus these, so near-duplicates in different batches still merge,
+    while the live index only learns about them after the alias swap.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.buckets = {}
+        self.docs = {}
+
+    def add(self, doc_id, signature, category):
+        self.docs[doc_id] = (array('I', signature), category)
+        for key in self.index.band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def candidates(self, signature):
+        doc_ids = set()
+        for key in self.index.band_keys(signature):
+            doc_ids.update(self.buckets.get(key, ()))
+        return {doc_id: self.docs[doc_id] for doc_id in doc_ids}
+
+    def category_of(self, doc_id):
+        entry = self.docs.get(doc_id)
+        return entry[1] if entry else None
+
+    def entries(self, doc_ids):
+        """(doc_id, signature, category) of those of doc_ids held here, for remember()"""
+        entries = []
+        for doc_id in doc_ids:
+            if doc_id in self.docs:
+                signature, category = self.docs[doc_id]
+                entries.append((doc_id, list(signature), category))
+        return entries
+
+
+class NearDuplicateDetector:
+    """Picks the document each scraped article merges into.
+
+    Signatures only enter the LSH index through remember(), once their
+    document is actually in Elasticsearch, so a failed bulk item can never
+    become the merge target of later near-duplicates.
+    """
+
+    def __init__(self):
+        self.hasher = MinHasher(settings.DEDUP_NUM_PERM, settings.DEDUP_SHINGLE_SIZE)
+        self.index = LSHIndex(settings.DEDUP_NUM_PERM, settings.DEDUP_BANDS)
+        self.threshold = settings.DEDUP_THRESHOLD
+
+    def find_canonical(self, article, signature, batch=(), pending=None):
+        """Return (doc_id, primary category) of the document this article should merge into.
+
+        The primary category is the one the document was first indexed under
+        and doubles as its shard routing key; it is None for a document the
+        LSH index has never seen. batch holds (doc_id, signature, category) of
+        new documents earlier in the same bulk load, not in Redis yet, and
+        pending (PendingSignatures) those of earlier loads of a rebuild.
+        """
+        doc_id = article_doc_id(article.url)
+        known_category = (pending and pending.category_of(doc_id)) or self.index.category_of(doc_id)
+        if known_category:
+            # A re-crawl of the same URL always merges into its own document
+            return doc_id, known_category
+
+        candidates = self.index.candidates(signature)
+        if pending is not None:
+            candidates.update(pending.candidates(signature))
+        candidates.update({batch_id: (batch_sig, category) for batch_id, batch_sig, category in batch})
+        best_id, best_category, best_score = None, None, self.threshold
+        for candidate_id, (candidate_sig, category) in candidates.items():
+            score = self.hasher.similarity(signature, candidate_sig)
+            if score >= best_score:
+                best_id, best_category, best_score = candidate_id, category, score
+
+        if best_id:
+            logger.debug(f"{article.url} is a near-duplicate of {best_id} ({best_score:.2f})")
+            return best_id, best_category
+        return doc_id, None
+
+    def assign(self, articles, lookup_routings=None, pending=None):
+        """Return (article, doc_id, routing, signature) for every article.
+
+        signature is set for articles indexed under their own URL, to be passed
+        to remember() once the bulk load accepted them, and None otherwise.
+
+        A document's routing must never change, or the same _id ends up on two
+        shards. Documents the LSH index cannot place (new URLs, and every URL
+        when dedup is off, Redis fails or the content is too short to sign)
+        keep the routing of a copy already in the index, found through
+        lookup_routings ({doc_id: routing} for a list of ids), and only fall
+        back to their own category when there is none.
+
+        With pending, the new documents among them are added to it, so the
+        next batch assigned against it can merge into them.
+        """
+        entries = []
+        routings = {}
+        fallback = {}
+        batch = []
+        for article in articles:
+            own_id = article_doc_id(article.url)
+            fallback.setdefault(own_id, article.category)
+            signature = self.hasher.signature(article.content or '') if settings.DEDUP_ENABLED else None
+            doc_id, routing = own_id, routings.get(own_id)
+            if own_id not in routings and signature is not None:
+                try:
+                    doc_id, routing = self.find_canonical(article, signature, batch, pending)
+                except Exception as e:
+                    logger.warning(f"Near-duplicate lookup failed for {article.url}: {e}")
+
+            if doc_id != own_id:
+                entries.append((article, doc_id, routing, None))
+                continue
+            if own_id not in routings:
+                routings[own_id] = routing
+                if signature is not None and routing is None:
+                    batch.append((own_id, signature, None))
+            entries.append((article, own_id, routing, signature))
+
+        unresolved = [doc_id for doc_id, routing in routings.items() if routing is None]
+        if unresolved:
+            found = {}
+            if lookup_routings:
+                try:
+                    found = lookup_routings(unresolved)
+                except Exception as e:
+                    logger.warning(f"Could not look up the routing of {len(unresolved)} documents: {e}")
+            for doc_id in unresolved:
+                routings[doc_id] = found.get(doc_id) or fallback[doc_id]
+        if pending is not None:
+            for doc_id, signature, _ in batch:
+                pending.add(doc_id, signature, routings[doc_id])
+
+        return [
+            (article, doc_id, routing or routings[doc_id], signature)
+            for article, doc_id, routing, signature in entries
+        ]
+
+    def remember(self, entries):
+        """Add (doc_id, signature, routing) of documents now in the index to the LSH index"""
+        if not entries:
+            return
+        try:
+            self.index.insert(entries)
+        except Exception as e:
+            logger.warning(f"Could not add {len(entries)} documents to the near-duplicate index: {e}")
+
+
+dedup_detector = NearDuplicateDetector()
@@ -1,15 +1,107 @@
 
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch, NotFoundError
+from elasticsearch.serializer import OrjsonSerializer
+from contextlib import contextmanager
+from datetime import timedelta
 from django.conf import settings
+from django.utils import timezone
+import asyncio
 import logging
+import time
+import uuid
+import weakref
+from .redis_client import redis_client
+from .article_store import article_store
+from .search_backends import SearchBackend
+from .models import ScrapingTask
 
 logger = logging.getLogger(__name__)
 
-class ElasticsearchClient:
+ROUTING_EXTRA_KEY = "routing:extra:{category}"
+DOC_ROUTING_KEY = "routing:doc"
+WRITES_PAUSED_KEY = "index:writes:paused"
+WRITER_KEY_PREFIX = "index:writes:writer:"
+# Slack on catch-up passes for clock skew between writers and the reindexing host
+CATCH_UP_MARGIN = timedelta(minutes=5)
+
+
+def record_routing_alias(category, routing):
+    """Remember that documents tagged `category` also live on the `routing` shard"""
+    try:
+        redis_client.sadd(ROUTING_EXTRA_KEY.format(category=category), routing)
+    except Exception as e:
+        logger.warning(f"Could not record routing alias {category} -> {routing}: {e}")
+
+
+def record_document_routings(routings):
+    """Remember the {doc_id: routing} shard of documents now in the live index"""
+    if not routings:
+        return
+    try:
+        redis_client.hset(DOC_ROUTING_KEY, mapping=routings)
+    except Exception as e:
+        logger.warning(f"Could not record the routing of {len(routings)} documents: {e}")
+
+
+def category_routing(category):
+    """Routing value reaching every document tagged with category.
+
+    That is the category's own shard plus the shards of primary categories its
+    near-duplicates were merged into. Returns None (search all shards) when
+    the extra routings cannot be read.
+    """
+    try:
+        extras = {member.decode() for member in redis_client.smembers(ROUTING_EXTRA_KEY.format(category=category))}
+    except Exception as e:
+        logger.warning(f"Could not read routing aliases for {category}: {e}")
+        return None
+    return ','.join(sorted({category, *extras}))
+
+
+@contextmanager
+def live_index_write():
+    """Wrap a bulk write to the live index: wait out an alias swap that paused writes, and show as in flight.
+
+    The writer registers before it checks the pause, so a swap that pauses
+    afterwards always sees it and waits for it to finish. Without Redis the
+    write goes ahead unguarded.
+    """
+    key = WRITER_KEY_PREFIX + uuid.uuid4().hex
+    deadline = time.monotonic() + settings.ELASTICSEARCH_WRITE_PAUSE_TIMEOUT
+    try:
+        while True:
+            redis_client.set(key, 1, ex=settings.ELASTICSEARCH_WRITE_PAUSE_TIMEOUT * 2)
+            if not redis_client.exists(WRITES_PAUSED_KEY):
+                break
+            redis_client.delete(key)
+            if time.monotonic() >= deadline:
+                logger.warning("Index writes are still paused, writing anyway")
+                break
+            time.sleep(1)
+    except Exception as e:
+        logger.warning(f"Could not check for paused index writes: {e}")
+    try:
+        yield
+    finally:
+        try:
+            redis_client.delete(key)
+        except Exception as e:
+            logger.warning(f"Could not deregister index writer: {e}")
+
+
+class ElasticsearchClient(SearchBackend):
     INDEX_NAME = "prothomalo_articles"
+    GENERATION_KEY = "articles:generation"
+    # Completion suggester over headline and author inputs, filterable by category
+    SUGGEST_MAPPING = {
+        "type": "completion",
+        "analyzer": "bengali_analyzer",
+        "contexts": [{"name": "category", "type": "category", "path": "category"}]
+    }
 
     def __init__(self):
         self.client = None
+        self.suggest_mapping_checked = False
         self.connect()
 
     def connect(self):
@@ -17,7 +109,8 @@ class ElasticsearchClient:
             self.client = Elasticsearch(
                 hosts=[settings.ELASTICSEARCH_HOST],
                 basic_auth=(settings.ELASTICSEARCH_USER, settings.ELASTICSEARCH_PASSWORD),
-                verify_certs=False
+                verify_certs=False,
+                serializer=OrjsonSerializer()
             )
             if self.client.ping():
                 logger.info("Connected to Elasticsearch")
@@ -26,14 +119,31 @@ class ElasticsearchClient:
         except Exception as e:
             logger.error(f"Elasticsearch connection error: {e}")
 
-    def create_index_if_not_exists(self):
-        if self.client.indices.exists(index=self.INDEX_NAME):
-            return True
+    def generation(self):
+        """Counter bumped after every bulk load; None if Redis is unavailable"""
+        try:
+            return int(redis_client.get(self.GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Could not read index generation: {e}")
+            return None
 
-        mapping = {
+    def bump_generation(self):
+        try:
+            redis_client.incr(self.GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Could not bump index generation: {e}")
+
+    MAPPING_PROFILES = ("standard", "compact")
+
+    def index_body(self, shards=None, profile=None):
+        profile = profile or settings.ELASTICSEARCH_MAPPING_PROFILE
+        if profile not in self.MAPPING_PROFILES:
+            raise ValueError(f"Unknown mapping profile {profile!r}; expected one of {self.MAPPING_PROFILES}")
+
+        body = {
             "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 1,
+                "number_of_shards": shards or settings.ELASTICSEARCH_NUMBER_OF_SHARDS,
+                "number_of_replicas": settings.ELASTICSEARCH_NUMBER_OF_REPLICAS,
                 "analysis": {
                     "analyzer": {
                         "bengali_analyzer": {
@@ -44,6 +154,10 @@ class ElasticsearchClient:
                 }
             },
             "mappings": {
+                # Read back by live_profile(), so rebuilds keep the profile
+                "_meta": {"profile": profile},
+                # Documents live on the shard of their primary category
+                "_routing": {"required": True},
                 "properties": {
                     "url": {"type": "keyword"},
                     "headline": {
@@ -57,22 +171,234 @@ class ElasticsearchClient:
                     "content": {"type": "text", "analyzer": "bengali_analyzer"},
                     "scraped_at": {"type": "date"},
                     "word_count": {"type": "integer"},
-                    "category": {"type": "keyword"}
+                    "category": {"type": "keyword"},
+                    # Set on every bulk write; reindexes catch up on documents written meanwhile
+                    "indexed_at": {"type": "date"},
+                    "suggest": self.SUGGEST_MAPPING
                 }
             }
         }
+        if profile == "compact":
+            self.compact(body)
+        return body
 
+    @staticmethod
+    def compact(body):
+        """Trim the standard body to what our queries actually use.
+
+        Searches are multi_match/match (no phrases or highlighting), so content
+        keeps term frequencies but not positions. Author names are a few words
+        long, so their frequencies and length norms add nothing to scoring.
+        Keywords longer than any real value are left out of the terms
+        dictionary instead of bloating it.
+        """
+        body["settings"]["codec"] = "best_compression"
+        properties = body["mappings"]["properties"]
+        properties["url"]["ignore_above"] = 2048
+        properties["headline"]["fields"]["raw"]["ignore_above"] = 512
+        properties["location"]["ignore_above"] = 256
+        properties["category"]["ignore_above"] = 64
+        properties["content"]["index_options"] = "freqs"
+        properties["author"].update({"index_options": "docs", "norms": False})
+        # Only read back from _source, never queried
+        properties["scraped_at"]["index"] = False
+        properties["word_count"]["index"] = False
+
+    def find_routings(self, doc_ids, index=None):
+        """{doc_id: routing} of those doc_ids already in the index, whichever shard they are on.
+
+        For the live index the routings recorded in Redis answer first; only
+        the ids missing there cost a realtime mget under every category
+        routing, which also finds documents of a bulk load that has not been
+        refreshed yet. Routings found that way are recorded for next time.
+        """
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return {}
+        live = index in (None, self.INDEX_NAME)
+        found = {}
+        if live:
+            try:
+                known = redis_client.hmget(DOC_ROUTING_KEY, doc_ids)
+            except Exception as e:
+                logger.warning(f"Could not read document routings: {e}")
+            else:
+                found = {doc_id: routing.decode() for doc_id, routing in zip(doc_ids, known) if routing}
+        misses = [doc_id for doc_id in doc_ids if doc_id not in found]
+        if not misses:
+            return found
+
+        categories = [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
+        docs = [{"_id": doc_id, "routing": category} for doc_id in misses for category in categories]
         try:
-            self.client.indices.create(index=self.INDEX_NAME, body=mapping)
+            result = self.client.mget(index=index or self.INDEX_NAME, docs=docs, source=False)
+        except NotFoundError:
+            return found
+        located = {doc["_id"]: doc["_routing"] for doc in result["docs"] if doc.get("found")}
+        if live:
+            record_document_routings(located)
+        return {**found, **located}
+
+    def get_documents(self, refs):
+        """{doc_id: source} of the (doc_id, routing) documents that exist in the live index"""
+        refs = list(refs)
+        if not refs:
+            return {}
+        result = self.client.mget(
+            index=self.INDEX_NAME, docs=[{"_id": doc_id, "routing": routing} for doc_id, routing in refs],
+            source_excludes=["suggest"]
+        )
+        return {doc["_id"]: doc["_source"] for doc in result["docs"] if doc.get("found")}
+
+    def live_profile(self):
+        """Mapping profile of the live index, ELASTICSEARCH_MAPPING_PROFILE when there is none"""
+        try:
+            mappings = self.client.indices.get_mapping(index=self.INDEX_NAME)
+            index_settings = self.client.indices.get_settings(index=self.INDEX_NAME, name="index.codec")
+        except NotFoundError:
+            return settings.ELASTICSEARCH_MAPPING_PROFILE
+        for name, mapping in mappings.items():
+            profile = mapping["mappings"].get("_meta", {}).get("profile")
+            if profile in self.MAPPING_PROFILES:
+                return profile
+            # Compacted before the profile was recorded
+            if index_settings.get(name, {}).get("settings", {}).get("index", {}).get("codec") == "best_compression":
+                return "compact"
+        return settings.ELASTICSEARCH_MAPPING_PROFILE
+
+    def create_index(self, name, shards=None, profile=None):
+        """Create an index; without a profile it takes the live index's, so a rebuild keeps a compaction"""
+        self.client.indices.create(index=name, body=self.index_body(shards, profile or self.live_profile()))
+
+    def drop_index(self, name):
+        """Delete an index a failed rebuild or reindex left behind"""
+        try:
+            self.client.indices.delete(index=name, ignore_unavailable=True)
+            logger.info(f"Deleted {name}")
+        except Exception as e:
+            logger.error(f"Could not delete {name}: {e}")
+
+    def catch_up(self, dest, since, script=None):
+        """Copy documents written to the live index since `since` into dest; returns how many"""
+        body = {
+            "source": {"index": self.INDEX_NAME,
+                       "query": {"range": {"indexed_at": {"gte": (since - CATCH_UP_MARGIN).isoformat()}}}},
+            "dest": {"index": dest},
+        }
+        if script:
+            body["script"] = {"source": script, "lang": "painless"}
+        result = self.client.options(request_timeout=3600).reindex(**body, wait_for_completion=True, refresh=True)
+        if result.get("failures"):
+            raise RuntimeError(f"Catch-up reindex into {dest} reported {len(result['failures'])} failures: "
+                               f"{result['failures'][:3]}")
+        return result["total"]
+
+    def swap_alias(self, new_index, since, delete_old=False, script=None, check_count=False):
+        """Point the alias at new_index without losing what the live index took since `since`.
+
+        Catch-up passes copy documents written meanwhile while writes go on;
+        the last one runs with live bulk writes paused and drained, right
+        before the swap. check_count then insists both indices hold the same
+        number of documents.
+        """
+        for _ in range(3):
+            mark = timezone.now()
+            copied = self.catch_up(new_index, since, script)
+            since = mark
+            logger.info(f"Caught up {copied} documents written during the reindex")
+            # Small enough to copy again within the write pause
+            if copied < 1000:
+                break
+
+        self.pause_writes()
+        try:
+            self.catch_up(new_index, since, script)
+            if check_count:
+                source_count = self.client.count(index=self.INDEX_NAME)["count"]
+                new_count = self.client.count(index=new_index)["count"]
+                if new_count != source_count:
+                    raise RuntimeError(f"{new_index} has {new_count} documents but {self.INDEX_NAME} has "
+                                       f"{source_count}")
+            return self.point_alias(new_index, delete_old=delete_old)
+        finally:
+            self.resume_writes()
+
+    def pause_writes(self):
+        """Hold new live bulk writes and wait for those in flight, up to ELASTICSEARCH_WRITE_PAUSE_TIMEOUT"""
+        timeout = settings.ELASTICSEARCH_WRITE_PAUSE_TIMEOUT
+        try:
+            redis_client.set(WRITES_PAUSED_KEY, 1, ex=timeout)
+            deadline = time.monotonic() + timeout
+            while redis_client.keys(WRITER_KEY_PREFIX + "*"):
+                if time.monotonic() >= deadline:
+                    logger.warning("Bulk writes in flight did not finish; swapping anyway")
+                    break
+                time.sleep(0.5)
+        except Exception as e:
+            logger.warning(f"Could not pause index writes, swapping without: {e}")
+
+    def resume_writes(self):
+        try:
+            redis_client.delete(WRITES_PAUSED_KEY)
+        except Exception as e:
+            logger.warning(f"Could not resume index writes: {e}")
+
+    def create_index_if_not_exists(self):
+        if self.client.indices.exists(index=self.INDEX_NAME):
+            self.ensure_suggest_mapping()
+            return True
+
+        try:
+            self.create_index(self.INDEX_NAME)
             return True
         except Exception as e:
             logger.error(f"Failed to create index {self.INDEX_NAME}: {e}")
             return False
 
-    def search_articles(self, query=None, page=1, size=20, filters=None):
-        if not self.client.indices.exists(index=self.INDEX_NAME):
-            return {"hits": {"hits": [], "total": {"value": 0}}}
+    def point_alias(self, new_index, delete_old=False):
+        """Atomically make INDEX_NAME an alias of new_index.
 
+        A concrete index still named INDEX_NAME is always removed in the same
+        step; indices behind a previous alias are only deleted with delete_old.
+        """
+        if self.client.indices.exists_alias(name=self.INDEX_NAME):
+            old_indices = [name for name in self.client.indices.get_alias(name=self.INDEX_NAME) if name != new_index]
+            actions = [{"add": {"index": new_index, "alias": self.INDEX_NAME}}]
+            for old_index in old_indices:
+                if delete_old:
+                    actions.append({"remove_index": {"index": old_index}})
+                else:
+                    actions.append({"remove": {"index": old_index, "alias": self.INDEX_NAME}})
+        elif self.client.indices.exists(index=self.INDEX_NAME):
+            old_indices = [self.INDEX_NAME]
+            actions = [
+                {"add": {"index": new_index, "alias": self.INDEX_NAME}},
+                {"remove_index": {"index": self.INDEX_NAME}}
+            ]
+        else:
+            old_indices = []
+            actions = [{"add": {"index": new_index, "alias": self.INDEX_NAME}}]
+
+        self.client.indices.update_aliases(actions=actions)
+        self.suggest_mapping_checked = False
+        self.bump_generation()
+        logger.info(f"Alias {self.INDEX_NAME} now points to {new_index} (was {old_indices or 'unset'})")
+        return old_indices
+
+    def ensure_suggest_mapping(self):
+        """Add the suggest and indexed_at fields to an index created before they existed"""
+        if self.suggest_mapping_checked:
+            return
+        try:
+            self.client.indices.put_mapping(
+                index=self.INDEX_NAME, properties={"suggest": self.SUGGEST_MAPPING, "indexed_at": {"type": "date"}}
+            )
+            self.suggest_mapping_checked = True
+        except Exception as e:
+            logger.error(f"Failed to add suggest mapping to {self.INDEX_NAME}: {e}")
+
+    @staticmethod
+    def build_search_body(query=None, page=1, size=20, filters=None):
         body = {
             "query": {"bool": {"must": [], "filter": []}},
             "sort": [{"published_at": {"order": "desc"}}],
@@ -102,27 +428,140 @@ class ElasticsearchClient:
             if filters.get('date_to'):
                 body["query"]["bool"]["filter"].append({"range": {"published_at": {"lte": filters['date_to']}}})
 
+        return body
+
+    @staticmethod
+    def build_suggest_body(prefix, category=None, size=5):
+        completion = {"field": "suggest", "size": size, "skip_duplicates": True}
+        if category:
+            completion["contexts"] = {"category": [category]}
+        return {
+            "_source": ["headline", "author", "url"],
+            "suggest": {"headline_suggest": {"prefix": prefix, "completion": completion}}
+        }
+
+    @staticmethod
+    def build_count_body(category=None):
+        if category:
+            return {"query": {"term": {"category": category}}}
+        return {"query": {"match_all": {}}}
+
+    def search_articles(self, query=None, page=1, size=20, filters=None):
+        body = self.build_search_body(query, page, size, filters)
+        routing = category_routing(filters['category']) if filters and filters.get('category') else None
+
         try:
-            result = self.client.search(index=self.INDEX_NAME, body=body)
+            if not self.client.indices.exists(index=self.INDEX_NAME):
+                return self.EMPTY_SEARCH_RESULT
+            result = self.client.search(index=self.INDEX_NAME, body=body, routing=routing)
             return result
         except Exception as e:
             logger.error(f"Search error: {e}")
-            return {"hits": {"hits": [], "total": {"value": 0}}}
+            if article_store is not None:
+                return article_store.search_articles(query, page, size, filters)
+            return self.EMPTY_SEARCH_RESULT
 
     def get_article_stats(self, category=None):
-        if not self.client.indices.exists(index=self.INDEX_NAME):
+        body = self.build_count_body(category)
+        routing = category_routing(category) if category else None
+
+        try:
+            if not self.client.indices.exists(index=self.INDEX_NAME):
+                return {"total_articles": 0}
+            result = self.client.count(index=self.INDEX_NAME, body=body, routing=routing)
+            return {"total_articles": result["count"]}
+        except Exception as e:
+            logger.error(f"Stats error: {e}")
+            if article_store is not None:
+                return article_store.get_article_stats(category)
             return {"total_articles": 0}
 
-        body = {"query": {"match_all": {}}}
-        if category:
-            body = {"query": {"term": {"category": category}}}
+    async def asearch_articles(self, query=None, page=1, size=20, filters=None):
+        return await async_es_client.search_articles(query, page, size, filters)
+
+    async def aget_article_stats(self, category=None):
+        return await async_es_client.get_article_stats(category)
+
+
+class AsyncElasticsearchClient:
+    """AsyncElasticsearch counterpart of the read path for the async views.
+
+    aiohttp sessions are bound to an event loop, so one client (and its
+    connection pool) is kept per running loop; under ASGI that is a single
+    pool shared by every request in the process.
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncElasticsearch(
+                hosts=[settings.ELASTICSEARCH_HOST],
+                basic_auth=(settings.ELASTICSEARCH_USER, settings.ELASTICSEARCH_PASSWORD),
+                verify_certs=False,
+                serializer=OrjsonSerializer(),
+                connections_per_node=settings.ELASTICSEARCH_ASYNC_CONNECTIONS
+            )
+            self._clients[loop] = client
+        return client
+
+    async def routing(self, category):
+        if not category:
+            return None
+        return await asyncio.to_thread(category_routing, category)
+
+    async def search_articles(self, query=None, page=1, size=20, filters=None):
+        body = ElasticsearchClient.build_search_body(query, page, size, filters)
+        routing = await self.routing(filters.get('category') if filters else None)
+        try:
+            return await self.client.search(index=ElasticsearchClient.INDEX_NAME, body=body, routing=routing)
+        except NotFoundError:
+            return ElasticsearchClient.EMPTY_SEARCH_RESULT
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            if article_store is not None:
+                return await asyncio.to_thread(article_store.search_articles, query, page, size, filters)
+            return ElasticsearchClient.EMPTY_SEARCH_RESULT
 
+    async def suggest(self, prefix, category=None, size=5):
+        body = ElasticsearchClient.build_suggest_body(prefix, category, size)
+        routing = await self.routing(category)
         try:
-            result = self.client.count(index=self.INDEX_NAME, body=body)
+            result = await self.client.search(index=ElasticsearchClient.INDEX_NAME, body=body, routing=routing)
+        except NotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Suggest error: {e}")
+            return []
+
+        return [
+            {
+                "text": option["text"],
+                "headline": option["_source"].get("headline"),
+                "author": option["_source"].get("author"),
+                "url": option["_source"].get("url")
+            }
+            for option in result["suggest"]["headline_suggest"][0]["options"]
+        ]
+
+    async def get_article_stats(self, category=None):
+        body = ElasticsearchClient.build_count_body(category)
+        routing = await self.routing(category)
+        try:
+            result = await self.client.count(index=ElasticsearchClient.INDEX_NAME, body=body, routing=routing)
             return {"total_articles": result["count"]}
+        except NotFoundError:
+            return {"total_articles": 0}
         except Exception as e:
             logger.error(f"Stats error: {e}")
+            if article_store is not None:
+                return await asyncio.to_thread(article_store.get_article_stats, category)
             return {"total_articles": 0}
 
-# Global instance
+# Global instances
 es_client = ElasticsearchClient()
+async_es_client = AsyncElasticsearchClient()
@@ -0,0 +1,80 @@
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Sum
+from django.utils import timezone
+from scraper.models import BackfillPartition, ScrapingTask
+from scraper.tasks import backfill_partition_task
+
+
+class Command(BaseCommand):
+    help = ("Backfill historical articles from the daily sitemaps, one resumable partition per category and day; "
+            "re-running resumes every partition that is neither done nor still running")
+
+    def add_arguments(self, parser):
+        categories = [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
+        parser.add_argument('--category', action='append', dest='categories', choices=categories,
+                            help="Category to backfill (repeatable, default all)")
+        parser.add_argument('--start', type=date.fromisoformat, help="First day, YYYY-MM-DD")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last day, YYYY-MM-DD (default yesterday)")
+        parser.add_argument('--inline', action='store_true',
+                            help="Run partitions in this process instead of handing them to Celery workers")
+        parser.add_argument('--status', action='store_true', help="Only report partition progress")
+
+    def report(self):
+        totals = BackfillPartition.objects.aggregate(
+            urls=Sum('urls_found'), scraped=Sum('scraped_articles'), failed=Sum('failed_articles')
+        )
+        by_status = dict(BackfillPartition.objects.values_list('status').annotate(count=Count('id')))
+        self.stdout.write(
+            f"Partitions: {', '.join(f'{status} {count}' for status, count in sorted(by_status.items())) or 'none'}\n"
+            f"URLs found {totals['urls'] or 0}, scraped {totals['scraped'] or 0}, failed {totals['failed'] or 0}"
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.report()
+            return
+
+        if not options['start']:
+            raise CommandError("--start is required")
+        end = options['end'] or date.today() - timedelta(days=1)
+        if end < options['start']:
+            raise CommandError("--end is before --start")
+
+        categories = options['categories'] or [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
+        days = [options['start'] + timedelta(days=n) for n in range((end - options['start']).days + 1)]
+        BackfillPartition.objects.bulk_create(
+            [BackfillPartition(category=category, date=day) for day in days for category in categories],
+            ignore_conflicts=True
+        )
+
+        # A RUNNING partition is resumed only once its worker stopped updating it
+        stale = timezone.now() - timedelta(seconds=settings.SCRAPER_HEARTBEAT_TIMEOUT)
+        pending = BackfillPartition.objects.filter(
+            category__in=categories, date__range=(options['start'], end)
+        ).exclude(status='DONE').exclude(status='RUNNING', updated_at__gt=stale).order_by('date', 'category')
+        partition_ids = list(pending.values_list('id', flat=True))
+        self.stdout.write(f"{len(days) * len(categories)} partitions in range, {len(partition_ids)} to run")
+
+        if not options['inline']:
+            for partition_id in partition_ids:
+                backfill_partition_task.delay(partition_id)
+            self.stdout.write(self.style.SUCCESS(
+                f"Queued {len(partition_ids)} partitions; throughput scales with the Celery workers consuming them. "
+                f"Check progress with --status"
+            ))
+            return
+
+        started = time.perf_counter()
+        scraped = 0
+        for done, partition_id in enumerate(partition_ids, 1):
+            result = backfill_partition_task(partition_id)
+            scraped += result['scraped_articles']
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"  [{done}/{len(partition_ids)}] partition {partition_id} {result['status']}, "
+                f"{scraped} articles ({scraped / elapsed * 60:.1f}/min)"
+            )
+        self.report()
@@ -0,0 +1,88 @@
+import os
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from scraper.capture import STORY_CONTENT_TYPE, CaptureStore
+from scraper.parsing import ParsePool, parse_article_page
+
+
+SYNTHETIC_PAGE = """<html><body>
+<h1 class="IiRps">শিরোনাম {n}</h1>
+<span class="contributor-name _8TSJC">নিজস্ব প্রতিবেদক</span>
+<span class="author-location _8-umj">ঢাকা</span>
+<div class="time-social-share-wrapper"><span>প্রকাশ: ১২ জুন ২০২৫, ১০:৩০</span></div>
+<div class="story-content">{paragraphs}</div>
+{filler}
+</body></html>"""
+
+
+class Command(BaseCommand):
+    help = "Measure parse-stage throughput (articles/sec) by worker count over a corpus of saved article pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corpus', help="Directory of saved article .html files")
+        parser.add_argument('--captures', action='store_true',
+                            help="Use the article pages captured by the scraper under SCRAPER_CAPTURE_DIR")
+        parser.add_argument('--synthetic', type=int, default=0,
+                            help="Generate this many synthetic article pages instead of reading a corpus")
+        parser.add_argument('--workers', default=None,
+                            help="Comma-separated worker counts to measure (default: 1..cores in powers of two)")
+        parser.add_argument('--repeat', type=int, default=1, help="Parse the corpus this many times per run")
+
+    def load_corpus(self, options):
+        if options['corpus']:
+            paths = sorted(Path(options['corpus']).glob('**/*.html'))
+            if not paths:
+                raise CommandError(f"No .html files under {options['corpus']}")
+            return [(str(path), path.read_bytes()) for path in paths]
+
+        if options['captures']:
+            store = CaptureStore(settings.SCRAPER_CAPTURE_DIR)
+            # The latest capture of each page; story JSON is not parsed by this stage
+            pages = [
+                (url, store.read(record['payload_digest'])) for url, record in sorted(store.latest().items())
+                if record.get('content_type') != STORY_CONTENT_TYPE
+            ]
+            if not pages:
+                raise CommandError(f"No captured article pages under {settings.SCRAPER_CAPTURE_DIR}")
+            return pages
+
+        if options['synthetic']:
+            paragraph = "<p>" + "বাংলাদেশের রাজনীতি নিয়ে আলোচনা " * 20 + "</p>"
+            filler = "<div class='related'>" + "<a href='/x'>সম্পর্কিত</a>" * 300 + "</div>"
+            return [
+                (f"synthetic-{n}", SYNTHETIC_PAGE.format(n=n, paragraphs=paragraph * 15, filler=filler).encode())
+                for n in range(options['synthetic'])
+            ]
+
+        raise CommandError("Pass --corpus DIR, --captures or --synthetic N")
+
+    def handle(self, *args, **options):
+        corpus = self.load_corpus(options) * options['repeat']
+        cores = len(os.sched_getaffinity(0))
+        if options['workers']:
+            worker_counts = [int(count) for count in options['workers'].split(',')]
+        else:
+            worker_counts = [1]
+            while worker_counts[-1] * 2 <= cores:
+                worker_counts.append(worker_counts[-1] * 2)
+
+        self.stdout.write(f"{len(corpus)} pages, {sum(len(c) for _, c in corpus) / 1e6:.1f} MB, {cores} cores available")
+        self.stdout.write(f"{'workers':>8} {'seconds':>9} {'articles/sec':>13} {'speedup':>8}")
+
+        baseline = None
+        for workers in worker_counts:
+            pool = ParsePool(workers)
+            try:
+                # Warm the pool so process start-up is not measured
+                list(pool.imap(parse_article_page, corpus[:workers]))
+                started = time.perf_counter()
+                parsed = sum(1 for _, fields, _ in pool.imap(parse_article_page, corpus) if fields)
+                elapsed = time.perf_counter() - started
+            finally:
+                pool.shutdown()
+
+            rate = parsed / elapsed
+            baseline = baseline or rate
+            self.stdout.write(f"{workers:>8} {elapsed:>9.2f} {rate:>13.1f} {rate / baseline:>7.2f}x")
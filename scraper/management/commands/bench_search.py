@@ -0,0 +1,123 @@
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from elasticsearch import helpers
+from scraper.article_store import ArticleStore
+from scraper.dedup import article_doc_id
+from scraper.es_client import es_client
+from devtools.es_stub import SAMPLE_QUERIES, seed_articles
+from scraper.management.commands.loadtest import percentile
+from scraper.models import ScrapingTask
+from scraper.records import Article
+
+CATEGORIES = [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
+
+# (label, query, filters, page) mirroring the search and list endpoints
+QUERY_SUITE = [
+    ('one term', SAMPLE_QUERIES[0], None, 1),
+    ('two terms', SAMPLE_QUERIES[1], None, 1),
+    ('term + category', SAMPLE_QUERIES[2], {'category': CATEGORIES[0]}, 1),
+    ('term + location + dates', SAMPLE_QUERIES[3],
+     {'location': 'ঢাকা', 'date_from': '2025-01-01 00:00', 'date_to': '2025-03-31 23:59'}, 1),
+    ('author filter', None, {'author': 'প্রতিবেদক'}, 1),
+    ('miss', SAMPLE_QUERIES[-1], None, 1),
+    ('browse', None, None, 1),
+    ('browse page 10', None, None, 10),
+]
+
+
+class Command(BaseCommand):
+    help = ("Compare the embedded SQLite FTS5 article store with Elasticsearch on the same synthetic corpus: "
+            "indexing throughput, query latency per query shape, hit counts and size on disk")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=20000, help="Synthetic articles in the corpus")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed runs per query")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--skip-es', action='store_true', help="Only measure the article store")
+
+    def load_store(self, store, corpus, batch_size):
+        started = time.perf_counter()
+        for start in range(0, len(corpus), batch_size):
+            store.index_articles([
+                (article_doc_id(article.url), article, True) for article in corpus[start:start + batch_size]
+            ])
+        return time.perf_counter() - started
+
+    def load_es(self, index, docs, batch_size):
+        client = es_client.client
+        started = time.perf_counter()
+        helpers.bulk(client.options(request_timeout=120), (
+            {'_index': index, '_id': article_doc_id(doc['url']), '_routing': doc['category'][0], '_source': doc}
+            for doc in docs
+        ), chunk_size=batch_size)
+        client.indices.refresh(index=index)
+        return time.perf_counter() - started
+
+    def time_queries(self, search, repeat):
+        """{label: (latencies, total hits)} for one backend"""
+        results = {}
+        for label, query, filters, page in QUERY_SUITE:
+            total = search(query, page, filters)['hits']['total']['value']
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                search(query, page, filters)
+                latencies.append(time.perf_counter() - started)
+            results[label] = (latencies, total)
+        return results
+
+    def handle(self, *args, **options):
+        docs = seed_articles(options['count'], CATEGORIES)
+        corpus = [Article.from_dict({**doc, 'category': doc['category'][0]}) for doc in docs]
+        self.stdout.write(f"Corpus: {len(corpus)} synthetic articles across {len(CATEGORIES)} categories")
+
+        timings = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ArticleStore(Path(tmp) / 'bench.sqlite3')
+            elapsed = self.load_store(store, corpus, options['batch_size'])
+            store_size = sum(path.stat().st_size for path in Path(tmp).iterdir())
+            self.stdout.write(f"store: indexed in {elapsed:.1f}s ({len(corpus) / elapsed:.0f} docs/s), "
+                              f"{store_size / 1024 / 1024:.1f}MB on disk")
+            timings['store'] = self.time_queries(
+                lambda query, page, filters: store.search_articles(query, page, 20, filters), options['repeat']
+            )
+            store.close()
+
+        if not options['skip_es']:
+            client = es_client.client
+            index = f"{es_client.INDEX_NAME}_bench_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            try:
+                es_client.create_index(index)
+                elapsed = self.load_es(index, docs, options['batch_size'])
+                es_size = client.indices.stats(index=index, metric='store')['_all']['primaries']['store']
+                self.stdout.write(f"es:    indexed in {elapsed:.1f}s ({len(docs) / elapsed:.0f} docs/s), "
+                                  f"{es_size['size_in_bytes'] / 1024 / 1024:.1f}MB on disk")
+
+                def es_search(query, page, filters):
+                    body = es_client.build_search_body(query, page, 20, filters)
+                    routing = filters.get('category') if filters else None
+                    return client.search(index=index, body=body, routing=routing)
+
+                timings['es'] = self.time_queries(es_search, options['repeat'])
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Elasticsearch not measured: {e}"))
+            finally:
+                try:
+                    client.options(ignore_status=404).indices.delete(index=index)
+                except Exception:
+                    pass
+
+        backends = list(timings)
+        header = f"{'query':<26}" + ''.join(f"{backend + ' p50':>11}{backend + ' p95':>11}{backend + ' hits':>11}"
+                                            for backend in backends)
+        self.stdout.write(header)
+        for label, *_ in QUERY_SUITE:
+            row = f"{label:<26}"
+            for backend in backends:
+                latencies, total = timings[backend][label]
+                row += (f"{percentile(latencies, 50) * 1000:>9.2f}ms{percentile(latencies, 95) * 1000:>9.2f}ms"
+                        f"{total:>11}")
+            self.stdout.write(row)
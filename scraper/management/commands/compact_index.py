@@ -0,0 +1,129 @@
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from scraper.es_client import es_client
+
+
+def human(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = ("Reindex articles under a mapping profile (default compact), force-merge the new index, "
+            "swap the alias over and report per-field disk usage before and after. "
+            "Run with --profile standard to see how much of the saving is the merge alone")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=es_client.MAPPING_PROFILES, default='compact')
+        parser.add_argument('--shards', type=int, default=None,
+                            help="Primary shards for the new index (default ELASTICSEARCH_NUMBER_OF_SHARDS)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-segments', type=int, default=1, help="Segments per shard after the force-merge")
+        parser.add_argument('--delete-old', action='store_true',
+                            help="Delete indices previously behind the alias after the swap")
+        parser.add_argument('--report-only', action='store_true',
+                            help="Only report per-field disk usage of the current index")
+
+    def disk_usage(self, index):
+        """Bytes on disk per field plus the store total, summed over the indices behind a name"""
+        client = es_client.client.options(request_timeout=3600)
+        result = client.indices.disk_usage(index=index, run_expensive_tasks=True, flush=True)
+        fields = {}
+        total = 0
+        for name, usage in result.items():
+            if name == '_shards':
+                continue
+            total += usage['store_size_in_bytes']
+            for field, field_usage in usage['fields'].items():
+                fields[field] = fields.get(field, 0) + field_usage['total_in_bytes']
+        return fields, total
+
+    def report(self, before, after=None):
+        before_fields, before_total = before
+        after_fields, after_total = after or ({}, None)
+        names = sorted(set(before_fields) | set(after_fields),
+                       key=lambda name: before_fields.get(name, after_fields.get(name, 0)), reverse=True)
+
+        if after is None:
+            self.stdout.write(f"{'field':<24}{'size':>12}")
+            for name in names:
+                self.stdout.write(f"{name:<24}{human(before_fields[name]):>12}")
+            self.stdout.write(f"{'store total':<24}{human(before_total):>12}")
+            return
+
+        self.stdout.write(f"{'field':<24}{'before':>12}{'after':>12}{'change':>10}")
+        for name in names:
+            old, new = before_fields.get(name, 0), after_fields.get(name, 0)
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "new"
+            self.stdout.write(f"{name:<24}{human(old):>12}{human(new):>12}{change:>10}")
+        change = (after_total - before_total) / before_total * 100 if before_total else 0
+        self.stdout.write(f"{'store total':<24}{human(before_total):>12}{human(after_total):>12}{change:>+9.0f}%")
+
+    def handle(self, *args, **options):
+        client = es_client.client
+        source = es_client.INDEX_NAME
+        if not client.indices.exists(index=source):
+            raise CommandError(f"{source} does not exist; nothing to compact")
+
+        self.stdout.write(f"Measuring {source}...")
+        before = self.disk_usage(source)
+        if options['report_only']:
+            self.report(before)
+            return
+
+        new_index = f"{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        es_client.create_index(new_index, shards=options['shards'], profile=options['profile'])
+        try:
+            old_indices = self.compact(new_index, before, options)
+        except BaseException:
+            es_client.drop_index(new_index)
+            raise
+        self.stdout.write(self.style.SUCCESS(
+            f"{source} now points to {new_index} (previously {', '.join(old_indices) or 'nothing'})"
+        ))
+
+    def compact(self, new_index, before, options):
+        """Fill, merge and measure new_index, then swap the alias over; returns the indices it replaced"""
+        client = es_client.client
+        source = es_client.INDEX_NAME
+        since = timezone.now()
+        # No refreshes or replica copies while loading; both are restored before the swap
+        client.indices.put_settings(index=new_index, settings={"index": {"refresh_interval": "-1",
+                                                                         "number_of_replicas": 0}})
+        self.stdout.write(f"Created {new_index} with the {options['profile']} profile; reindexing from {source}...")
+
+        started = time.perf_counter()
+        result = client.options(request_timeout=3600).reindex(
+            source={"index": source, "size": options['batch_size']},
+            dest={"index": new_index},
+            wait_for_completion=True,
+            refresh=True
+        )
+        if result.get('failures'):
+            raise CommandError(f"Reindex reported {len(result['failures'])} failures: {result['failures'][:3]}")
+        self.stdout.write(f"Reindexed {result['total']} documents in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        client.options(request_timeout=3600).indices.forcemerge(
+            index=new_index, max_num_segments=options['max_segments'], wait_for_completion=True
+        )
+        client.indices.put_settings(index=new_index, settings={"index": {
+            "refresh_interval": None,
+            "number_of_replicas": settings.ELASTICSEARCH_NUMBER_OF_REPLICAS
+        }})
+        self.stdout.write(f"Force-merged to {options['max_segments']} segment(s) per shard "
+                          f"in {time.perf_counter() - started:.1f}s")
+
+        after = self.disk_usage(new_index)
+        self.report(before, after)
+
+        # Documents written while this ran are copied over before the swap, the last ones with writes paused
+        try:
+            return es_client.swap_alias(new_index, since, delete_old=options['delete_old'], check_count=True)
+        except RuntimeError as e:
+            raise CommandError(str(e))
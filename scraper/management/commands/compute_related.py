@@ -0,0 +1,66 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from elasticsearch import helpers
+from scraper.es_client import es_client
+from scraper.related import related_articles
+from scraper.tasks import compute_related_articles
+
+
+class Command(BaseCommand):
+    help = ("Precompute related articles for every indexed article. New articles are handled after each bulk load; "
+            "this seeds the lists for an index that predates that")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inline', action='store_true',
+                            help="Compute in this process instead of handing batches to Celery workers")
+        parser.add_argument('--batch-size', type=int, default=settings.RELATED_ARTICLES_BATCH_SIZE)
+
+    def prune(self, seen):
+        """Drop the lists of documents the index no longer has, so they stop being served as related links"""
+        try:
+            removed = related_articles.retain(seen)
+        except Exception as e:
+            self.stderr.write(f"Could not prune related articles of removed documents: {e}")
+            return
+        if removed:
+            self.stdout.write(f"Removed the related articles of {removed} documents no longer indexed")
+
+    def handle(self, *args, **options):
+        client = es_client.client
+        if not client.indices.exists(index=es_client.INDEX_NAME):
+            raise CommandError(f"{es_client.INDEX_NAME} does not exist")
+
+        # One refresh for the whole run; the batches only read what is already searchable
+        related_articles.refresh_index()
+        batch = []
+        seen = set()
+        queued = computed = 0
+        started = time.perf_counter()
+
+        def flush():
+            nonlocal queued, computed
+            if not batch:
+                return
+            if options['inline']:
+                computed += compute_related_articles(list(batch), refresh_index=False)['computed']
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"  {computed} articles ({computed / elapsed:.0f}/s)")
+            else:
+                compute_related_articles.delay(list(batch), refresh_index=False)
+            queued += len(batch)
+            batch.clear()
+
+        for hit in helpers.scan(client, index=es_client.INDEX_NAME, query={"query": {"match_all": {}}},
+                                _source=False, size=1000):
+            batch.append((hit['_id'], hit['_routing']))
+            seen.add(hit['_id'])
+            if len(batch) >= options['batch_size']:
+                flush()
+        flush()
+        self.prune(seen)
+
+        if options['inline']:
+            self.stdout.write(self.style.SUCCESS(f"Computed related articles for {computed} of {queued} articles"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Queued {queued} articles for related-article computation"))
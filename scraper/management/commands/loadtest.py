@@ -0,0 +1,162 @@
+import asyncio
+import os
+import statistics
+import sys
+import time
+import aiohttp
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from devtools.es_stub import SAMPLE_QUERIES, ElasticsearchStub, seed_articles
+from devtools.redis_stub import RedisStub
+from scraper.models import ScrapingTask
+
+# Read-path endpoints exercised when no --path is given
+DEFAULT_SUITE = [
+    '/articles/',
+    '/articles/?page=10',
+    f'/articles/search/?query={SAMPLE_QUERIES[0]}',
+    f'/articles/search/?query={SAMPLE_QUERIES[1]}&category=business-all',
+    f'/articles/search/?query={SAMPLE_QUERIES[2]}&category=sports-all&page=2',
+    f'/articles/search/?query={SAMPLE_QUERIES[3]}&location=ঢাকা&date_from=2025-01-01&date_to=2025-06-30',
+    f'/articles/search/?query={SAMPLE_QUERIES[-1]}',
+    '/tasks/',
+    '/categories/politics/stats/',
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent GET requests at the API and report throughput and latency percentiles per endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000/api')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Endpoint path to request (repeatable, default: the read-path suite)")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=1000, help="Total requests per path")
+        parser.add_argument('--offline', action='store_true',
+                            help="Start in-process Elasticsearch and Redis stubs and a local ASGI server against them")
+        parser.add_argument('--seed', type=int, default=2000, help="Articles seeded into the stub with --offline")
+        parser.add_argument('--es-latency', type=float, default=0.0,
+                            help="Milliseconds the stub waits before answering each request")
+        parser.add_argument('--server-port', type=int, default=8765, help="Port of the --offline API server")
+
+    async def run_path(self, session, url, total, concurrency):
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    async def start_server(self, es_port, redis_port, port):
+        """Run the ASGI app in a daphne subprocess pointed at the stubs"""
+        env = {
+            **os.environ,
+            'ELASTICSEARCH_HOST': f'http://127.0.0.1:{es_port}',
+            'REDIS_URL': f'redis://127.0.0.1:{redis_port}/0',
+        }
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'prothomalo_api.asgi:application',
+            env=env, cwd=settings.BASE_DIR,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        url = f'http://127.0.0.1:{port}/api/categories/'
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                if process.returncode is not None:
+                    raise CommandError(f"API server exited with code {process.returncode}")
+                try:
+                    async with session.get(url) as response:
+                        if response.status == 200:
+                            return process
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.2)
+        process.terminate()
+        raise CommandError("API server did not become ready within 20s")
+
+    async def run(self, options):
+        paths = options['paths'] or DEFAULT_SUITE
+        base_url = options['base_url']
+        stub = runner = redis_server = server = None
+
+        if options['offline']:
+            categories = [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
+            stub = ElasticsearchStub(seed_articles(options['seed'], categories), latency=options['es_latency'] / 1000)
+            runner, es_port = await stub.start()
+            # The views read the index generation and routing aliases from Redis on every request
+            redis_server, redis_port = await RedisStub().start()
+            server = await self.start_server(es_port, redis_port, options['server_port'])
+            base_url = f"http://127.0.0.1:{options['server_port']}/api"
+            self.stdout.write(
+                f"Offline: stub ES on :{es_port} with {options['seed']} articles, "
+                f"API on :{options['server_port']}, {await ScrapingTask.objects.acount()} tasks in the database"
+            )
+
+        rows = []
+        try:
+            connector = aiohttp.TCPConnector(limit=options['concurrency'])
+            async with aiohttp.ClientSession(connector=connector) as session:
+                for path in paths:
+                    url = base_url.rstrip('/') + path
+                    es_before = stub.requests if stub else 0
+                    latencies, errors, elapsed = await self.run_path(
+                        session, url, options['requests'], options['concurrency']
+                    )
+                    rows.append((path, latencies, errors, elapsed, (stub.requests - es_before) if stub else None))
+                    self.stdout.write(
+                        f"{path}\n"
+                        f"  {len(latencies)} requests, {errors} errors in {elapsed:.2f}s "
+                        f"-> {len(latencies) / elapsed:.1f} req/s\n"
+                        f"  latency ms: mean {statistics.mean(latencies) * 1000:.1f} "
+                        f"p50 {percentile(latencies, 50) * 1000:.1f} "
+                        f"p95 {percentile(latencies, 95) * 1000:.1f} "
+                        f"p99 {percentile(latencies, 99) * 1000:.1f}"
+                    )
+        finally:
+            if server:
+                server.terminate()
+                await server.wait()
+            if runner:
+                await runner.cleanup()
+            if redis_server:
+                redis_server.close()
+                await redis_server.wait_closed()
+
+        self.stdout.write(f"\n{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'es/req':>7}  endpoint")
+        for path, latencies, errors, elapsed, es_requests in rows:
+            es_per_request = f"{es_requests / len(latencies):.1f}" if es_requests is not None else '-'
+            self.stdout.write(
+                f"{len(latencies) / elapsed:>8.1f} {percentile(latencies, 50) * 1000:>8.1f} "
+                f"{percentile(latencies, 95) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+                f"{errors:>7} {es_per_request:>7}  {path}"
+            )
+
+    def handle(self, *args, **options):
+        if options['offline']:
+            executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+            if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+                raise CommandError("The database has unapplied migrations; run `python manage.py migrate` first")
+        asyncio.run(self.run(options))
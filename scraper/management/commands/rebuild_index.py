@@ -0,0 +1,214 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from datetime import datetime
+from functools import partial
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from scraper.dedup import PendingSignatures, dedup_detector
+from scraper.es_client import es_client, record_document_routings, record_routing_alias
+from scraper.models import ScrapingTask
+from scraper.records import Article
+from scraper.tasks import S3Handler, bulk_index_articles
+
+
+class Command(BaseCommand):
+    help = "Rebuild the articles index from the task archives in S3, then swap the alias over"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', choices=[choice[0] for choice in ScrapingTask.CATEGORY_CHOICES],
+                            help="Only archives of this category")
+        parser.add_argument('--date-prefix', help="Only archives uploaded under this date prefix, e.g. 2025/06")
+        parser.add_argument('--workers', type=int, default=8, help="Parallel archive downloads")
+        parser.add_argument('--index-workers', type=int, default=2, help="Parallel bulk requests")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--delete-old', action='store_true',
+                            help="Delete indices previously behind the alias after the swap")
+        parser.add_argument('--dry-run', action='store_true', help="Read and de-duplicate archives without indexing")
+
+    def collect(self, handler, archives, workers):
+        """Download archives in parallel, keeping the latest copy of each URL and every category it was seen in"""
+        latest = {}
+        categories = {}
+        failed = []
+        total_bytes = 0
+        read = 0
+        report_every = max(1, len(archives) // 20)
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(handler.read_archive, key): (key, size) for key, size in archives}
+            for done, future in enumerate(as_completed(futures), 1):
+                key, size = futures[future]
+                try:
+                    docs = future.result()
+                except Exception as e:
+                    self.stderr.write(f"Skipping {key}: {e}")
+                    failed.append(key)
+                    continue
+
+                archive_category = key.split('/')[1]
+                for doc in docs:
+                    if isinstance(doc.get('category'), list):
+                        doc['category'] = doc['category'][0] if doc['category'] else None
+                    doc['category'] = doc.get('category') or archive_category
+                    article = Article.from_dict(doc)
+                    if not article.url:
+                        continue
+                    read += 1
+                    categories.setdefault(article.url, set()).add(article.category)
+                    current = latest.get(article.url)
+                    if current is None or (article.scraped_at or '') > (current.scraped_at or ''):
+                        latest[article.url] = article
+
+                total_bytes += size
+                if done % report_every == 0 or done == len(archives):
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"  archives {done}/{len(archives)}, {read} articles, {len(latest)} unique URLs "
+                        f"({total_bytes / 1e6 / elapsed:.1f} MB/s, {read / elapsed:.0f} articles/s)"
+                    )
+
+        return latest, categories, failed
+
+    def load(self, phases, index, options):
+        """Bulk-load each phase's batches in parallel, one phase after the other.
+
+        Near-duplicate assignment runs here, one batch after the other, so
+        concurrent batches cannot both make a near-duplicate canonical.
+        Returns the indexed count, the new documents' PendingSignatures and
+        the (article, doc_id, routing, signature) entries Elasticsearch accepted.
+        """
+        batch_size = options['batch_size']
+        batches = [phase[i:i + batch_size] for phase in phases for i in range(0, len(phase), batch_size)]
+        pending = PendingSignatures(dedup_detector.index)
+        lookup_routings = partial(es_client.find_routings, index=index)
+        accepted = []
+        indexed = 0
+        done = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['index_workers']) as executor:
+            for phase in phases:
+                futures = {}
+                for i in range(0, len(phase), batch_size):
+                    batch = phase[i:i + batch_size]
+                    assigned = dedup_detector.assign(batch, lookup_routings, pending)
+                    stats = {}
+                    futures[executor.submit(bulk_index_articles, batch, index, stats, assigned)] = (assigned, stats)
+                for future in as_completed(futures):
+                    count = future.result()
+                    if count is None:
+                        raise CommandError(f"A bulk request into {index} failed; alias unchanged")
+                    assigned, stats = futures[future]
+                    documents = stats['documents']
+                    accepted.extend(entry for entry in assigned if entry[0].url in documents)
+                    indexed += count
+                    done += 1
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f"  batches {done}/{len(batches)}, {indexed} actions ({indexed / elapsed:.0f}/s)")
+        return indexed, pending, accepted
+
+    def go_live(self, pending, accepted):
+        """Record the rebuilt documents' signatures and routings in the live state, once their index is live"""
+        dedup_detector.remember(pending.entries({doc_id for _, doc_id, _, _ in accepted}))
+        record_document_routings({doc_id: routing for _, doc_id, routing, _ in accepted})
+        for category, routing in {(article.category, routing) for article, _, routing, _ in accepted}:
+            if routing != category:
+                record_routing_alias(category, routing)
+
+    def reseed_related(self):
+        """Queue fresh related-article lists; the stored ones were computed from the replaced content"""
+        try:
+            call_command('compute_related', stdout=self.stdout, stderr=self.stderr)
+        except Exception as e:
+            self.stderr.write(f"Could not queue related articles ({e}); run compute_related once workers are up")
+
+    def sync_article_store(self):
+        """Bring the fallback article store in line with the rebuilt index"""
+        if not settings.ARTICLE_STORE_ENABLED:
+            return
+        try:
+            call_command('sync_article_store', stdout=self.stdout, stderr=self.stderr)
+        except Exception as e:
+            self.stderr.write(f"Could not sync the article store ({e}); run sync_article_store")
+
+    def handle(self, *args, **options):
+        filtered = bool(options['category'] or options['date_prefix'])
+        if filtered and options['delete_old']:
+            raise CommandError("--delete-old needs an unfiltered rebuild; a filtered one merges into the live index")
+        # Live writes from here on may be missing from the archives; they are caught up before the swap
+        since = timezone.now()
+        handler = S3Handler()
+        archives = list(handler.list_archives(options['category'], options['date_prefix']))
+        if not archives:
+            raise CommandError("No archives matched")
+        self.stdout.write(f"Reading {len(archives)} archives ({sum(size for _, size in archives) / 1e6:.1f} MB)...")
+
+        latest, categories, failed_archives = self.collect(handler, archives, options['workers'])
+        # Oldest first, so near-duplicates merge into the document that was indexed first originally;
+        # copies for the other categories a URL was scraped under follow and only add their category
+        articles = sorted(latest.values(), key=lambda article: article.scraped_at or '')
+        articles += [
+            replace(latest[url], category=category)
+            for url, seen in categories.items()
+            for category in sorted(seen - {latest[url].category})
+        ]
+        self.stdout.write(f"{len(latest)} unique URLs, {len(articles) - len(latest)} extra category memberships, "
+                          f"{len(failed_archives)} unreadable archives")
+        if options['dry_run']:
+            return
+
+        client = es_client.client
+        # Canonical copies go first, so the category copies behind them find their document
+        phases = [articles[:len(latest)], articles[len(latest):]]
+        if filtered:
+            # Only part of the archives was read, so it cannot replace the live index; merge into it instead
+            self.stdout.write(f"Filtered rebuild: merging into the live index {es_client.INDEX_NAME}...")
+            started = time.perf_counter()
+            indexed, _, _ = self.load(phases, es_client.INDEX_NAME, options)
+            client.indices.refresh(index=es_client.INDEX_NAME)
+            es_client.bump_generation()
+            self.stdout.write(self.style.SUCCESS(
+                f"Merged {indexed} of {len(articles)} actions into {es_client.INDEX_NAME} "
+                f"in {time.perf_counter() - started:.1f}s"
+            ))
+            self.reseed_related()
+            return
+
+        new_index = f"{es_client.INDEX_NAME}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        es_client.create_index(new_index)
+        # Bulk load without refreshes or replicas; both are restored before the swap
+        client.indices.put_settings(index=new_index, settings={"refresh_interval": "-1", "number_of_replicas": 0})
+        self.stdout.write(f"Created {new_index}; indexing...")
+
+        try:
+            started = time.perf_counter()
+            indexed, pending, accepted = self.load(phases, new_index, options)
+
+            client.indices.put_settings(index=new_index, settings={
+                "refresh_interval": None,
+                "number_of_replicas": settings.ELASTICSEARCH_NUMBER_OF_REPLICAS
+            })
+            client.indices.refresh(index=new_index)
+            doc_count = client.count(index=new_index)['count']
+            self.stdout.write(
+                f"Indexed {doc_count} documents from {len(articles)} actions in {time.perf_counter() - started:.1f}s "
+                f"({len(articles) - indexed} failed actions)"
+            )
+
+            # The live copy of anything indexed since the rebuild started wins over the archived one
+            old_indices = es_client.swap_alias(new_index, since, delete_old=options['delete_old'])
+        except RuntimeError as e:
+            es_client.drop_index(new_index)
+            raise CommandError(str(e))
+        except BaseException:
+            es_client.drop_index(new_index)
+            raise
+        self.go_live(pending, accepted)
+        self.stdout.write(self.style.SUCCESS(
+            f"{es_client.INDEX_NAME} now points to {new_index} (previously {', '.join(old_indices) or 'nothing'})"
+        ))
+        self.sync_article_store()
+        self.reseed_related()
@@ -0,0 +1,90 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from elasticsearch import helpers
+from scraper.es_client import es_client
+from scraper.models import DailyRollup, ScrapingTask
+from scraper.records import Article
+from scraper.rollups import COUNTED_WINDOW, add_facts, article_facts, finish_rebuild, publication_day, start_rebuild
+
+
+class Command(BaseCommand):
+    help = ("Recompute the daily rollups from the whole articles index. Bulk loads keep them current; "
+            "this seeds them for an existing index or repairs them after a rebuild")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', choices=[choice[0] for choice in ScrapingTask.CATEGORY_CHOICES],
+                            help="Only rollups of this category")
+
+    def scan(self, client, query, options):
+        """Rollups of every scanned article, plus the ids of recently indexed ones whose facts may be queued"""
+        recent = timezone.now() - COUNTED_WINDOW
+        rollups = {}
+        counted = []
+        scanned = skipped = 0
+        for hit in helpers.scan(client, index=es_client.INDEX_NAME, query={"query": query}, size=1000,
+                                _source=["category", "published_at", "scraped_at", "word_count", "author",
+                                         "location", "indexed_at"]):
+            source = hit['_source']
+            # Rollups count a document once, under its primary category
+            categories = source.get('category') or [None]
+            source['category'] = categories if isinstance(categories, str) else categories[0]
+            if options['category'] and source['category'] != options['category']:
+                continue
+            if not source['category']:
+                continue
+            indexed_at = source.pop('indexed_at', None)
+            facts = article_facts(hit['_id'], Article.from_dict(source))
+            day = publication_day(facts['date'])
+            if day is None:
+                self.stderr.write(f"Skipping {hit['_id']}: no readable publication date "
+                                  f"({source.get('published_at')!r}, scraped {source.get('scraped_at')!r})")
+                skipped += 1
+                continue
+            key = (facts['category'], day)
+            if key not in rollups:
+                rollups[key] = DailyRollup(category=facts['category'], date=day)
+            add_facts(rollups[key], [facts])
+            scanned += 1
+            if indexed_at and datetime.fromisoformat(indexed_at) >= recent:
+                counted.append(hit['_id'])
+        if skipped:
+            self.stderr.write(f"{skipped} articles without a readable publication date were left out")
+        return rollups, counted, scanned
+
+    def handle(self, *args, **options):
+        client = es_client.client
+        if not client.indices.exists(index=es_client.INDEX_NAME):
+            raise CommandError(f"{es_client.INDEX_NAME} does not exist")
+
+        query = {"match_all": {}}
+        if options['category']:
+            query = {"term": {"category": options['category']}}
+
+        # New facts wait until the rows are replaced, so none lands in rows about to be deleted
+        try:
+            holding = start_rebuild()
+        except Exception as e:
+            raise CommandError(f"Could not hold back rollup updates in Redis: {e}")
+        if not holding:
+            raise CommandError("Another rollup rebuild is running")
+        started = time.perf_counter()
+        try:
+            rollups, counted, scanned = self.scan(client, query, options)
+            with transaction.atomic():
+                existing = DailyRollup.objects.all()
+                if options['category']:
+                    existing = existing.filter(category=options['category'])
+                existing.delete()
+                DailyRollup.objects.bulk_create(rollups.values(), batch_size=500)
+        except BaseException:
+            finish_rebuild()
+            raise
+        # Held-back facts of documents the scan counted are dropped, the rest are applied
+        finish_rebuild(counted)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(rollups)} daily rollups from {scanned} articles in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,66 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from scraper.es_client import es_client
+
+# Route each document by its primary (first) category and normalise category to a list
+ROUTING_SCRIPT = """
+def categories = ctx._source.category;
+if (categories == null) {
+    categories = ['uncategorized'];
+} else if (!(categories instanceof List)) {
+    categories = [categories];
+}
+ctx._source.category = categories;
+ctx._routing = categories[0];
+"""
+
+
+class Command(BaseCommand):
+    help = "Reindex articles into a multi-shard index routed by category, then swap the alias over"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', type=int, default=None,
+                            help="Primary shards for the new index (default ELASTICSEARCH_NUMBER_OF_SHARDS)")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--delete-old', action='store_true',
+                            help="Delete indices previously behind the alias after the swap")
+
+    def handle(self, *args, **options):
+        client = es_client.client
+        source = es_client.INDEX_NAME
+        if not client.indices.exists(index=source):
+            raise CommandError(f"{source} does not exist; nothing to reindex")
+
+        since = timezone.now()
+        new_index = f"{source}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        es_client.create_index(new_index, shards=options['shards'])
+        self.stdout.write(f"Created {new_index}; reindexing from {source}...")
+        try:
+            started = time.perf_counter()
+            result = client.options(request_timeout=3600).reindex(
+                source={"index": source, "size": options['batch_size']},
+                dest={"index": new_index},
+                script={"source": ROUTING_SCRIPT, "lang": "painless"},
+                wait_for_completion=True,
+                refresh=True
+            )
+            if result.get('failures'):
+                raise CommandError(f"Reindex reported {len(result['failures'])} failures: {result['failures'][:3]}")
+            self.stdout.write(f"Reindexed {result['total']} documents in {time.perf_counter() - started:.1f}s")
+
+            # Documents written meanwhile are copied over too, the last ones with writes paused
+            old_indices = es_client.swap_alias(
+                new_index, since, delete_old=options['delete_old'], script=ROUTING_SCRIPT, check_count=True
+            )
+        except RuntimeError as e:
+            es_client.drop_index(new_index)
+            raise CommandError(str(e))
+        except BaseException:
+            es_client.drop_index(new_index)
+            raise
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{source} now points to {new_index} (previously {', '.join(old_indices) or 'nothing'})"
+        ))
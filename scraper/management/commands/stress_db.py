@@ -0,0 +1,176 @@
+import multiprocessing
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F, Sum
+from django.utils import timezone
+from scraper.management.commands.loadtest import percentile
+from scraper.models import ScrapingTask
+
+
+def write_worker(task_pks, ops, full_saves, seed):
+    """One Celery worker's task-state writes: heartbeats, recovered-article increments and result writes"""
+    rng = random.Random(seed)
+    latencies, errors = [], Counter()
+    increments = 0
+    for _ in range(ops):
+        pk = rng.choice(task_pks)
+        op = rng.choices(['heartbeat', 'recover', 'finish'], weights=[6, 3, 1])[0]
+        started = time.perf_counter()
+        try:
+            if full_saves:
+                # The read-modify-write pattern: every write rewrites the whole row
+                task = ScrapingTask.objects.get(pk=pk)
+                if op == 'heartbeat':
+                    task.heartbeat_at = timezone.now()
+                elif op == 'recover':
+                    task.recovered_articles += 1
+                else:
+                    task.scraped_articles = rng.randint(1, 100)
+                task.save()
+            elif op == 'heartbeat':
+                ScrapingTask.objects.filter(pk=pk).update(heartbeat_at=timezone.now())
+            elif op == 'recover':
+                ScrapingTask.objects.filter(pk=pk).update(recovered_articles=F('recovered_articles') + 1)
+            else:
+                task = ScrapingTask.objects.get(pk=pk)
+                task.scraped_articles = rng.randint(1, 100)
+                task.save(update_fields=['scraped_articles', 'updated_at'])
+            if op == 'recover':
+                increments += 1
+        except Exception as e:
+            errors[type(e).__name__ + (': database is locked' if 'locked' in str(e) else '')] += 1
+        latencies.append(time.perf_counter() - started)
+        # A request or Celery task ends here: a pooled connection goes back to the pool
+        close_old_connections()
+    connection.close()
+    return 'write', latencies, errors, increments
+
+
+def read_worker(ops, seed):
+    """The list_tasks read path"""
+    latencies, errors = [], Counter()
+    for _ in range(ops):
+        started = time.perf_counter()
+        try:
+            list(ScrapingTask.objects.all()[:100])
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - started)
+        close_old_connections()
+    connection.close()
+    return 'read', latencies, errors, 0
+
+
+def threaded_worker(threads, worker, *args, seed):
+    """worker in several threads of one process, which share its connection pool like the async views do"""
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(lambda n: worker(*args, seed * threads + n), range(threads)))
+    latencies = [latency for _, samples, _, _ in results for latency in samples]
+    errors = sum((errs for _, _, errs, _ in results), Counter())
+    return results[0][0], latencies, errors, sum(increments for _, _, _, increments in results)
+
+
+class Command(BaseCommand):
+    help = ("Hammer the configured database with concurrent task-state writers and list_tasks readers, "
+            "then check that no recovered_articles increment was lost")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Writer processes, like Celery workers")
+        parser.add_argument('--readers', type=int, default=2, help="Reader processes, like API workers")
+        parser.add_argument('--ops', type=int, default=500, help="Operations per process")
+        parser.add_argument('--tasks', type=int, default=5, help="Task rows the writers share")
+        parser.add_argument('--threads', type=int, default=1,
+                            help="Threads per process; above DB_POOL_MAX_SIZE they queue for pooled connections")
+        parser.add_argument('--full-saves', action='store_true',
+                            help="Write with whole-row task.save() to compare against narrowed updates")
+
+    def handle(self, *args, **options):
+        # Fork before this process touches the database, so no connection or psycopg pool
+        # (and its background threads) is inherited by the children
+        with multiprocessing.get_context('fork').Pool(options['writers'] + options['readers']) as pool:
+            self.run(pool, options)
+
+    def check_connection_budget(self, options):
+        """Warn when the processes can open more connections than the PostgreSQL server accepts"""
+        if connection.vendor != 'postgresql':
+            return
+        per_process = options['threads']
+        pool = connection.settings_dict.get('OPTIONS', {}).get('pool')
+        if isinstance(pool, dict) and 'max_size' in pool:
+            per_process = min(per_process, pool['max_size'])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('max_connections')::int "
+                           "- current_setting('superuser_reserved_connections')::int")
+            available = cursor.fetchone()[0]
+        # The parent keeps one connection for setup and the final check
+        needed = (options['writers'] + options['readers']) * per_process + 1
+        if needed > available:
+            self.stdout.write(self.style.WARNING(
+                f"Up to {needed} connections but the server accepts {available}; expect "
+                f"'too many clients' errors, lower --threads or DB_POOL_MAX_SIZE"
+            ))
+
+    def run(self, pool, options):
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError("The database has unapplied migrations; run `python manage.py migrate` first")
+
+        self.check_connection_budget(options)
+        prefix = f"stress-{uuid.uuid4().hex[:8]}"
+        ScrapingTask.objects.bulk_create([
+            ScrapingTask(task_id=f"{prefix}-{n}", category='politics', status='RUNNING')
+            for n in range(options['tasks'])
+        ])
+        task_pks = list(ScrapingTask.objects.filter(task_id__startswith=prefix).values_list('pk', flat=True))
+        self.stdout.write(
+            f"{connection.vendor}: {options['writers']} writers x {options['ops']} ops "
+            f"({'full-row saves' if options['full_saves'] else 'narrowed updates'}), "
+            f"{options['readers']} readers, {options['threads']} threads each, {len(task_pks)} shared task rows"
+        )
+
+        started = time.perf_counter()
+        try:
+            jobs = [
+                pool.apply_async(threaded_worker, (options['threads'], write_worker, task_pks, options['ops'],
+                                                   options['full_saves']), {'seed': seed})
+                for seed in range(options['writers'])
+            ] + [
+                pool.apply_async(threaded_worker, (options['threads'], read_worker, options['ops']), {'seed': seed})
+                for seed in range(options['readers'])
+            ]
+            results = [job.get() for job in jobs]
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(f"{'role':<8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+            all_errors = Counter()
+            for role in ('write', 'read'):
+                latencies = [latency for kind, samples, _, _ in results if kind == role for latency in samples]
+                errors = sum((errs for kind, _, errs, _ in results if kind == role), Counter())
+                all_errors += errors
+                if not latencies:
+                    continue
+                self.stdout.write(
+                    f"{role:<8}{len(latencies) / elapsed:>10.1f}{percentile(latencies, 50) * 1000:>10.1f}"
+                    f"{percentile(latencies, 95) * 1000:>10.1f}{percentile(latencies, 99) * 1000:>10.1f}"
+                    f"{sum(errors.values()):>8}"
+                )
+            for name, count in all_errors.most_common():
+                self.stdout.write(f"  {count} x {name}")
+
+            expected = sum(increments for _, _, _, increments in results)
+            stored = ScrapingTask.objects.filter(pk__in=task_pks).aggregate(
+                total=Sum('recovered_articles'))['total'] or 0
+            if stored == expected:
+                self.stdout.write(self.style.SUCCESS(f"All {expected} recovered_articles increments persisted"))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"Lost updates: {expected} recovered_articles increments succeeded but {stored} persisted"
+                ))
+        finally:
+            ScrapingTask.objects.filter(task_id__startswith=prefix).delete()
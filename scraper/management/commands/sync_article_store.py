@@ -0,0 +1,47 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from elasticsearch import helpers
+from scraper.article_store import ArticleStore
+from scraper.es_client import es_client
+from scraper.related import related_articles
+
+
+class Command(BaseCommand):
+    help = ("Copy every document of the articles index into the embedded article store and delete stored "
+            "documents the index no longer has, e.g. before switching SEARCH_BACKEND to sqlite, after enabling "
+            "ARTICLE_STORE_ENABLED or after a rebuild")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        client = es_client.client
+        if not client.indices.exists(index=es_client.INDEX_NAME):
+            raise CommandError(f"{es_client.INDEX_NAME} does not exist")
+
+        store = ArticleStore(settings.ARTICLE_STORE_PATH)
+        copied = 0
+        batch = []
+        seen = set()
+        started = time.perf_counter()
+        for hit in helpers.scan(client, index=es_client.INDEX_NAME, query={"query": {"match_all": {}}}, size=1000):
+            batch.append((hit['_id'], hit['_source']))
+            seen.add(hit['_id'])
+            if len(batch) >= options['batch_size']:
+                store.load_documents(batch)
+                copied += len(batch)
+                batch.clear()
+        store.load_documents(batch)
+        copied += len(batch)
+        removed = store.retain(seen)
+        try:
+            related_removed = related_articles.retain(seen)
+        except Exception as e:
+            self.stderr.write(f"Could not prune related articles of removed documents: {e}")
+            related_removed = 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {copied} documents to {settings.ARTICLE_STORE_PATH} and removed {removed} others "
+            f"({related_removed} related-article lists) in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_scrapingtask_s3_key_scrapingtask_s3_uploaded_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='failed_articles',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='recovered_articles',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='FailedFetch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ARTICLE', 'Article'), ('PAGE', 'Collection page')], max_length=20)),
+                ('category', models.CharField(choices=[('politics', 'Politics'), ('world-all', 'World'), ('opinion-all', 'Opinion'), ('crime-bangladesh', 'Crime Bangladesh'), ('business-all', 'Business'), ('sports-all', 'Sports'), ('entertainment-all', 'Entertainment'), ('chakri-all', 'Jobs'), ('lifestyle-all', 'Lifestyle')], max_length=50)),
+                ('url', models.URLField(max_length=1000)),
+                ('page_num', models.IntegerField(blank=True, help_text='Zero-based collection page for PAGE failures', null=True)),
+                ('error_class', models.CharField(max_length=255)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RECOVERED', 'Recovered'), ('EXHAUSTED', 'Exhausted')], default='PENDING', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_retry_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='failed_fetches', to='scraper.scrapingtask')),
+            ],
+            options={
+                'ordering': ['next_retry_at'],
+                'indexes': [models.Index(fields=['status', 'next_retry_at'], name='scraper_fai_status_de6cb7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0003_failedfetch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('politics', 'Politics'), ('world-all', 'World'), ('opinion-all', 'Opinion'), ('crime-bangladesh', 'Crime Bangladesh'), ('business-all', 'Business'), ('sports-all', 'Sports'), ('entertainment-all', 'Entertainment'), ('chakri-all', 'Jobs'), ('lifestyle-all', 'Lifestyle')], max_length=50)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('urls_found', models.IntegerField(default=0)),
+                ('cursor', models.IntegerField(default=0, help_text='Sitemap URLs already processed, in sorted order')),
+                ('scraped_articles', models.IntegerField(default=0)),
+                ('failed_articles', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'date'), name='unique_backfill_partition')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0004_backfillpartition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last checkpoint written by the running crawl', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='resume_count',
+            field=models.IntegerField(default=0, help_text='Times the watchdog requeued this task'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0005_scrapingtask_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('politics', 'Politics'), ('world-all', 'World'), ('opinion-all', 'Opinion'), ('crime-bangladesh', 'Crime Bangladesh'), ('business-all', 'Business'), ('sports-all', 'Sports'), ('entertainment-all', 'Entertainment'), ('chakri-all', 'Jobs'), ('lifestyle-all', 'Lifestyle')], max_length=50, unique=True)),
+                ('enabled', models.BooleanField(default=True)),
+                ('rate_per_hour', models.FloatField(blank=True, help_text='Observed new articles per hour', null=True)),
+                ('interval_seconds', models.IntegerField()),
+                ('max_pages', models.IntegerField()),
+                ('next_run_at', models.DateTimeField()),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['next_run_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='new_articles',
+            field=models.IntegerField(blank=True, help_text='Scraped articles not already in the index', null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0006_crawlschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('politics', 'Politics'), ('world-all', 'World'), ('opinion-all', 'Opinion'), ('crime-bangladesh', 'Crime Bangladesh'), ('business-all', 'Business'), ('sports-all', 'Sports'), ('entertainment-all', 'Entertainment'), ('chakri-all', 'Jobs'), ('lifestyle-all', 'Lifestyle')], max_length=50)),
+                ('date', models.DateField()),
+                ('article_count', models.IntegerField(default=0)),
+                ('word_count_sum', models.BigIntegerField(default=0)),
+                ('word_count_histogram', models.JSONField(default=list, help_text='Articles per rollups.WORD_COUNT_BUCKETS bucket')),
+                ('authors', models.JSONField(default=dict, help_text='author -> [articles, word_count_sum]')),
+                ('locations', models.JSONField(default=dict, help_text='location -> articles')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('category', 'date'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-19 21:10
+
+from django.db import migrations, models
+
+
+def copy_task_links(apps, schema_editor):
+    FailedFetch = apps.get_model('scraper', 'FailedFetch')
+    for fetch in FailedFetch.objects.exclude(task=None):
+        fetch.tasks.add(fetch.task_id)
+
+
+def restore_task_links(apps, schema_editor):
+    FailedFetch = apps.get_model('scraper', 'FailedFetch')
+    for fetch in FailedFetch.objects.all():
+        first = fetch.tasks.order_by('pk').first()
+        if first:
+            fetch.task = first
+            fetch.save(update_fields=['task'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0007_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='failedfetch',
+            name='task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=models.SET_NULL, related_name='+', to='scraper.scrapingtask'),
+        ),
+        migrations.AddField(
+            model_name='failedfetch',
+            name='tasks',
+            field=models.ManyToManyField(blank=True, related_name='failed_fetches', to='scraper.scrapingtask'),
+        ),
+        migrations.RunPython(copy_task_links, restore_task_links),
+        migrations.RemoveField(
+            model_name='failedfetch',
+            name='task',
+        ),
+        migrations.AlterField(
+            model_name='failedfetch',
+            name='page_num',
+            field=models.IntegerField(blank=True, help_text='Zero-based collection page for PAGE failures; retried by offset, so best-effort', null=True),
+        ),
+    ]
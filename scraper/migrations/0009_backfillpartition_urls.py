@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0008_failedfetch_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backfillpartition',
+            name='urls',
+            field=models.JSONField(default=list, help_text="The partition's sitemap URLs, fixed on its first run"),
+        ),
+        migrations.AlterField(
+            model_name='backfillpartition',
+            name='cursor',
+            field=models.IntegerField(default=0, help_text='URLs already processed, an offset into urls'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0009_backfillpartition_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapingtask',
+            name='extendable',
+            field=models.BooleanField(default=True, help_text='Coalesced requests may raise max_pages until the crawl stops reading it'),
+        ),
+    ]
@@ -26,9 +26,17 @@ class ScrapingTask(models.Model):
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     max_pages = models.IntegerField(default=2)
+    extendable = models.BooleanField(
+        default=True, help_text="Coalesced requests may raise max_pages until the crawl stops reading it"
+    )
     total_articles = models.IntegerField(default=0)
     scraped_articles = models.IntegerField(default=0)
+    failed_articles = models.IntegerField(default=0)
+    recovered_articles = models.IntegerField(default=0)
+    new_articles = models.IntegerField(null=True, blank=True, help_text="Scraped articles not already in the index")
     error_message = models.TextField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last checkpoint written by the running crawl")
+    resume_count = models.IntegerField(default=0, help_text="Times the watchdog requeued this task")
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -46,4 +54,115 @@ class ScrapingTask(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.category} - {self.status}"
\ No newline at end of file
+        return f"{self.category} - {self.status}"
+
+
+class FailedFetch(models.Model):
+    KIND_CHOICES = [
+        ('ARTICLE', 'Article'),
+        ('PAGE', 'Collection page'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RECOVERED', 'Recovered'),
+        ('EXHAUSTED', 'Exhausted'),
+    ]
+
+    # Every crawl that hit this URL while it was queued, so each one's failed/recovered counts see it
+    tasks = models.ManyToManyField(ScrapingTask, blank=True, related_name='failed_fetches')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    category = models.CharField(max_length=50, choices=ScrapingTask.CATEGORY_CHOICES)
+    url = models.URLField(max_length=1000)
+    page_num = models.IntegerField(
+        null=True, blank=True,
+        help_text="Zero-based collection page for PAGE failures; retried by offset, so best-effort"
+    )
+    error_class = models.CharField(max_length=255)
+    error_message = models.TextField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.IntegerField(default=0)
+    next_retry_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_retry_at']
+        indexes = [models.Index(fields=['status', 'next_retry_at'])]
+
+    def __str__(self):
+        return f"{self.kind} {self.url} - {self.status}"
+
+
+class BackfillPartition(models.Model):
+    """One day of one category's sitemap backfill, checkpointed so it can resume"""
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    category = models.CharField(max_length=50, choices=ScrapingTask.CATEGORY_CHOICES)
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    urls_found = models.IntegerField(default=0)
+    urls = models.JSONField(default=list, help_text="The partition's sitemap URLs, fixed on its first run")
+    cursor = models.IntegerField(default=0, help_text="URLs already processed, an offset into urls")
+    scraped_articles = models.IntegerField(default=0)
+    failed_articles = models.IntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'category']
+        constraints = [models.UniqueConstraint(fields=['category', 'date'], name='unique_backfill_partition')]
+
+    def __str__(self):
+        return f"{self.category} {self.date} - {self.status}"
+
+
+class CrawlSchedule(models.Model):
+    """Per-category crawl cadence learned from the new-article rate of past tasks"""
+
+    category = models.CharField(max_length=50, choices=ScrapingTask.CATEGORY_CHOICES, unique=True)
+    enabled = models.BooleanField(default=True)
+    rate_per_hour = models.FloatField(null=True, blank=True, help_text="Observed new articles per hour")
+    interval_seconds = models.IntegerField()
+    max_pages = models.IntegerField()
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_run_at']
+
+    def __str__(self):
+        return f"{self.category} every {self.interval_seconds}s x{self.max_pages} pages"
+
+
+class DailyRollup(models.Model):
+    """One category's articles on one publication day, summarised for the trends API.
+
+    Every field is mergeable, so new articles are added in place: word counts
+    are kept as a fixed-bucket histogram (percentiles are read off it) and
+    authors and locations as full per-day counts that are cut to top-k on read.
+    """
+
+    category = models.CharField(max_length=50, choices=ScrapingTask.CATEGORY_CHOICES)
+    date = models.DateField()
+    article_count = models.IntegerField(default=0)
+    word_count_sum = models.BigIntegerField(default=0)
+    word_count_histogram = models.JSONField(default=list, help_text="Articles per rollups.WORD_COUNT_BUCKETS bucket")
+    authors = models.JSONField(default=dict, help_text="author -> [articles, word_count_sum]")
+    locations = models.JSONField(default=dict, help_text="location -> articles")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'category']
+        constraints = [models.UniqueConstraint(fields=['category', 'date'], name='unique_daily_rollup')]
+
+    def __str__(self):
+        return f"{self.category} {self.date}: {self.article_count} articles"
@@ -0,0 +1,25 @@
+from dataclasses import dataclass, fields
+
+
+@dataclass(slots=True)
+class Article:
+    """One scraped article; slotted to keep per-article memory small"""
+    url: str
+    headline: str
+    author: str
+    location: str
+    published_at: str | None
+    content: str
+    scraped_at: str
+    word_count: int
+    category: str
+
+    def to_dict(self):
+        return {field.name: getattr(self, field.name) for field in ARTICLE_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field.name: data.get(field.name) for field in ARTICLE_FIELDS})
+
+
+ARTICLE_FIELDS = fields(Article)
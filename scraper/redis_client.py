@@ -0,0 +1,5 @@
+import redis
+from django.conf import settings
+
+# Connections are opened lazily on first command, so importing this is cheap
+redis_client = redis.Redis.from_url(settings.REDIS_URL)
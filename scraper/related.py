@@ -0,0 +1,155 @@
+"""Precomputed "related stories" per article.
+
+A more_like_this query over content is far too heavy to run per page view, so
+it runs once per newly indexed article in a background task. Each article
+keeps its top-N neighbours in a Redis sorted set (member = doc id, score =
+MLT score), and a shared hash holds the small summary shown for each id, so a
+read is a ZREVRANGE and an HMGET with no Elasticsearch query at all.
+
+A new article is also offered to the lists of the neighbours it found, which
+are trimmed back to N. MLT scores are not symmetric, so a neighbour's list is
+an approximation of a full recomputation, but only the new documents'
+neighbourhood is ever touched. A re-extracted article is recomputed the same
+way, which replaces its own list and summary. Documents that leave the index
+(rebuilds, store syncs) have their list and summary pruned by retain(), so
+they are no longer served as links.
+"""
+import logging
+from django.conf import settings
+from .es_client import es_client
+from .redis_client import redis_client
+from . import serialization
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ["url", "headline", "category", "published_at"]
+
+
+class RelatedArticles:
+    KEY = "related:{doc_id}"
+    SUMMARY_KEY = "related:summary"
+
+    def __init__(self, size=None):
+        self.size = size or settings.RELATED_ARTICLES_SIZE
+
+    def key(self, doc_id):
+        return self.KEY.format(doc_id=doc_id)
+
+    def mlt_body(self, doc_id, routing):
+        return {
+            "query": {
+                "more_like_this": {
+                    "fields": ["headline", "content"],
+                    "like": [{"_index": es_client.INDEX_NAME, "_id": doc_id, "routing": routing}],
+                    "min_term_freq": 2,
+                    "min_doc_freq": 2,
+                    "max_query_terms": 25,
+                    "minimum_should_match": "30%"
+                }
+            },
+            "_source": SUMMARY_FIELDS,
+            "size": self.size
+        }
+
+    def compute(self, docs):
+        """Neighbours of each (doc_id, routing) in one msearch; {doc_id: [hit, ...]}"""
+        searches = []
+        for doc_id, routing in docs:
+            searches.append({"index": es_client.INDEX_NAME})
+            searches.append(self.mlt_body(doc_id, routing))
+        responses = es_client.client.msearch(searches=searches)["responses"]
+
+        neighbours = {}
+        for (doc_id, _), response in zip(docs, responses):
+            if "error" in response:
+                logger.warning(f"Related articles query for {doc_id} failed: {response['error']}")
+                continue
+            neighbours[doc_id] = response["hits"]["hits"]
+        return neighbours
+
+    def refresh_index(self):
+        """Make newly indexed documents searchable, so they can find each other"""
+        es_client.client.indices.refresh(index=es_client.INDEX_NAME)
+
+    def refresh(self, docs):
+        """Recompute the lists of new or changed docs and offer them to their neighbours.
+
+        The caller refreshes the index once beforehand (refresh_index), not per batch.
+        """
+        if not docs:
+            return 0
+        neighbours = self.compute(docs)
+
+        pipe = redis_client.pipeline(transaction=False)
+        summaries = {}
+        for doc_id, hits in neighbours.items():
+            key = self.key(doc_id)
+            pipe.delete(key)
+            if not hits:
+                continue
+            pipe.zadd(key, {hit["_id"]: hit["_score"] for hit in hits})
+            for hit in hits:
+                summaries[hit["_id"]] = serialization.dumps({"id": hit["_id"], **hit["_source"]})
+                neighbour_key = self.key(hit["_id"])
+                pipe.zadd(neighbour_key, {doc_id: hit["_score"]})
+                pipe.zremrangebyrank(neighbour_key, 0, -(self.size + 1))
+        if summaries:
+            pipe.hset(self.SUMMARY_KEY, mapping=summaries)
+        pipe.execute()
+
+        # New docs only get a summary once something links to them, so add theirs too
+        missing = [doc_id for doc_id in neighbours if doc_id not in summaries]
+        if missing:
+            self.store_summaries(missing, dict(docs))
+        return len(neighbours)
+
+    def store_summaries(self, doc_ids, routings):
+        docs = [{"_id": doc_id, "routing": routings[doc_id]} for doc_id in doc_ids]
+        result = es_client.client.mget(index=es_client.INDEX_NAME, docs=docs, source=SUMMARY_FIELDS)
+        summaries = {
+            doc["_id"]: serialization.dumps({"id": doc["_id"], **doc["_source"]})
+            for doc in result["docs"] if doc.get("found")
+        }
+        if summaries:
+            redis_client.hset(self.SUMMARY_KEY, mapping=summaries)
+
+    def retain(self, doc_ids):
+        """Delete the lists and summaries of documents outside doc_ids that the index no longer has.
+
+        doc_ids comes from a scan, so ids it missed are checked against the
+        live index first; a document indexed during the scan keeps its list.
+        Returns the number of documents removed.
+        """
+        doc_ids = set(doc_ids)
+        candidates = [doc_id for doc_id in (key.decode() for key in redis_client.hkeys(self.SUMMARY_KEY))
+                      if doc_id not in doc_ids]
+        removed = 0
+        for start in range(0, len(candidates), 1000):
+            chunk = candidates[start:start + 1000]
+            result = es_client.client.search(index=es_client.INDEX_NAME, query={"ids": {"values": chunk}},
+                                             _source=False, size=len(chunk))
+            indexed = {hit["_id"] for hit in result["hits"]["hits"]}
+            gone = [doc_id for doc_id in chunk if doc_id not in indexed]
+            if not gone:
+                continue
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hdel(self.SUMMARY_KEY, *gone)
+            pipe.delete(*(self.key(doc_id) for doc_id in gone))
+            pipe.execute()
+            removed += len(gone)
+        return removed
+
+    def get(self, doc_id, size=None):
+        """Stored related articles for doc_id, best first; None if Redis is unavailable"""
+        try:
+            ids = redis_client.zrevrange(self.key(doc_id), 0, (size or self.size) - 1)
+            if not ids:
+                return []
+            summaries = redis_client.hmget(self.SUMMARY_KEY, ids)
+        except Exception as e:
+            logger.warning(f"Could not read related articles for {doc_id}: {e}")
+            return None
+        return [serialization.loads(summary) for summary in summaries if summary]
+
+
+related_articles = RelatedArticles()
@@ -0,0 +1,12 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from . import serialization
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson; DRF-specific types fall back to DRF's encoder"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return serialization.dumps(data, default=JSONEncoder().default)
@@ -0,0 +1,204 @@
+"""Daily per-category rollups of the articles index for the trends API.
+
+Aggregating the whole index on every dashboard load gets slower as the
+corpus grows, so each bulk load folds its new articles into one small
+DailyRollup row per (category, publication day) instead, and the trends API
+reads only those rows.
+
+`rebuild_rollups` replaces the rows from a scan of the index. While it runs,
+new facts wait, and afterwards the facts of articles the scan already counted
+are dropped, so no article is counted twice or lost between the two.
+"""
+import bisect
+import logging
+from collections import Counter
+from datetime import date, timedelta
+from dateutil import parser as date_parser
+from django.db import transaction
+from .models import DailyRollup
+from .redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the word_count histogram buckets; the last bucket is open-ended.
+# Stored histograms follow these, so run `rebuild_rollups` after changing them
+WORD_COUNT_BUCKETS = [100, 200, 300, 400, 500, 600, 700, 800, 900, 1000, 1250, 1500, 1750, 2000, 2500, 3000, 4000, 5000]
+
+# Set while rebuild_rollups runs; new facts are retried until it is gone
+REBUILD_KEY = "rollups:rebuilding"
+REBUILD_TIMEOUT = 6 * 3600
+REBUILD_RETRY_DELAY = 30
+# Recently indexed documents the last rebuild counted, whose facts may still be queued
+COUNTED_KEY = "rollups:counted"
+COUNTED_WINDOW = timedelta(days=1)
+
+
+def known(value):
+    return value if value and not value.endswith("not found") else None
+
+
+def publication_day(value):
+    """Calendar day of a published_at/scraped_at string, None if unreadable"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        pass
+    try:
+        # Older documents carry unpadded days, e.g. "2025-06-5 12:30"
+        return date_parser.parse(value).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+def article_facts(doc_id, article):
+    """The few fields a rollup needs, small enough to pass through the broker"""
+    day = publication_day(article.published_at) or publication_day(article.scraped_at)
+    return {
+        'id': doc_id,
+        'category': article.category,
+        'date': day.isoformat() if day else None,
+        'word_count': article.word_count or 0,
+        'author': known(article.author),
+        'location': known(article.location),
+    }
+
+
+def empty_histogram():
+    return [0] * (len(WORD_COUNT_BUCKETS) + 1)
+
+
+def add_facts(rollup, facts):
+    """Fold articles into a rollup in place"""
+    histogram = rollup.word_count_histogram or empty_histogram()
+    for fact in facts:
+        rollup.article_count += 1
+        rollup.word_count_sum += fact['word_count']
+        histogram[bisect.bisect_left(WORD_COUNT_BUCKETS, fact['word_count'])] += 1
+        if fact['author']:
+            count, words = rollup.authors.get(fact['author'], (0, 0))
+            rollup.authors[fact['author']] = [count + 1, words + fact['word_count']]
+        if fact['location']:
+            rollup.locations[fact['location']] = rollup.locations.get(fact['location'], 0) + 1
+    rollup.word_count_histogram = histogram
+
+
+def start_rebuild():
+    """Hold new facts back while rebuild_rollups scans; False if another rebuild is running"""
+    return bool(redis_client.set(REBUILD_KEY, 1, nx=True, ex=REBUILD_TIMEOUT))
+
+
+def finish_rebuild(counted_ids=None):
+    """Release the held-back facts, dropping those of counted_ids; None after a failed rebuild"""
+    pipe = redis_client.pipeline()
+    if counted_ids is not None:
+        pipe.delete(COUNTED_KEY)
+        if counted_ids:
+            pipe.sadd(COUNTED_KEY, *counted_ids)
+            pipe.expire(COUNTED_KEY, int(COUNTED_WINDOW.total_seconds()))
+    pipe.delete(REBUILD_KEY)
+    pipe.execute()
+
+
+def rebuild_in_progress():
+    try:
+        return bool(redis_client.exists(REBUILD_KEY))
+    except Exception as e:
+        logger.warning(f"Could not check for a rollup rebuild: {e}")
+        return False
+
+
+def already_counted(facts):
+    """Facts of documents the last rebuild's scan already counted"""
+    ids = [fact['id'] for fact in facts if fact.get('id')]
+    if not ids:
+        return set()
+    try:
+        flags = redis_client.smismember(COUNTED_KEY, ids)
+    except Exception as e:
+        logger.warning(f"Could not read the documents counted by the last rollup rebuild: {e}")
+        return set()
+    return {doc_id for doc_id, counted in zip(ids, flags) if counted}
+
+
+def apply_facts(facts):
+    """Add new articles to their daily rollups; returns the number of rollups touched"""
+    counted = already_counted(facts)
+    by_day = {}
+    for fact in facts:
+        if fact.get('id') in counted:
+            continue
+        day = publication_day(fact['date'])
+        if day is None:
+            logger.warning(f"Leaving article {fact.get('id')} ({fact['category']}) out of the rollups: "
+                           f"no readable publication date")
+            continue
+        by_day.setdefault((fact['category'], day), []).append(fact)
+
+    for (category, day), day_facts in sorted(by_day.items()):
+        # Row lock so concurrent bulk loads of the same day add up instead of overwriting
+        with transaction.atomic():
+            DailyRollup.objects.get_or_create(category=category, date=day)
+            rollup = DailyRollup.objects.select_for_update().get(category=category, date=day)
+            add_facts(rollup, day_facts)
+            rollup.save()
+    return len(by_day)
+
+
+def histogram_percentile(histogram, pct):
+    """Percentile estimated by interpolating inside the histogram bucket it falls in"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = pct / 100 * total
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= rank:
+            lower = WORD_COUNT_BUCKETS[index - 1] if index else 0
+            # The open-ended last bucket reports its lower bound
+            upper = WORD_COUNT_BUCKETS[index] if index < len(WORD_COUNT_BUCKETS) else lower
+            return round(lower + (upper - lower) * (rank - seen) / count)
+        seen += count
+    return WORD_COUNT_BUCKETS[-1]
+
+
+def summarize(rollups, top=10):
+    """Per-day series plus range totals from a set of rollups, merging categories per day"""
+    days = {}
+    histogram = empty_histogram()
+    authors = {}
+    locations = Counter()
+    for rollup in rollups:
+        day = days.setdefault(rollup.date, {'count': 0, 'words': 0, 'histogram': empty_histogram()})
+        day['count'] += rollup.article_count
+        day['words'] += rollup.word_count_sum
+        for index, count in enumerate(rollup.word_count_histogram):
+            day['histogram'][index] += count
+            histogram[index] += count
+        for author, (count, words) in rollup.authors.items():
+            total_count, total_words = authors.get(author, (0, 0))
+            authors[author] = (total_count + count, total_words + words)
+        locations.update(rollup.locations)
+
+    series = [
+        {
+            'date': day.isoformat(),
+            'articles': values['count'],
+            'avg_word_count': round(values['words'] / values['count']) if values['count'] else None,
+            'p50_word_count': histogram_percentile(values['histogram'], 50),
+            'p90_word_count': histogram_percentile(values['histogram'], 90),
+        }
+        for day, values in sorted(days.items())
+    ]
+    top_authors = sorted(authors.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        'articles': sum(values['count'] for values in days.values()),
+        'word_count_percentiles': {f'p{pct}': histogram_percentile(histogram, pct) for pct in (50, 90, 99)},
+        'series': series,
+        'top_authors': [
+            {'author': author, 'articles': count, 'avg_word_count': round(words / count)}
+            for author, (count, words) in top_authors
+        ],
+        'top_locations': [{'location': location, 'articles': count} for location, count in locations.most_common(top)],
+    }
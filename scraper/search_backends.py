@@ -0,0 +1,52 @@
+import asyncio
+from abc import ABC, abstractmethod
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+# SEARCH_BACKEND name -> the global instance that serves it
+SEARCH_BACKENDS = {
+    'elasticsearch': 'scraper.es_client.es_client',
+    'sqlite': 'scraper.article_store.article_store',
+}
+
+
+class SearchBackend(ABC):
+    """Read interface behind the article views.
+
+    Results keep the Elasticsearch response shape ({"hits": {"hits": [...],
+    "total": {"value": n}}}) so views do not care which backend answered.
+    The async methods run the sync ones in a thread unless a backend has a
+    native async client.
+    """
+
+    EMPTY_SEARCH_RESULT = {"hits": {"hits": [], "total": {"value": 0}}}
+
+    @abstractmethod
+    def search_articles(self, query=None, page=1, size=20, filters=None):
+        """One page of matching articles in the Elasticsearch response shape"""
+
+    @abstractmethod
+    def get_article_stats(self, category=None):
+        """{"total_articles": n}, for one category or all of them"""
+
+    @abstractmethod
+    def get_documents(self, refs):
+        """{doc_id: source} of the (doc_id, routing) documents that exist"""
+
+    async def asearch_articles(self, query=None, page=1, size=20, filters=None):
+        return await asyncio.to_thread(self.search_articles, query, page, size, filters)
+
+    async def aget_article_stats(self, category=None):
+        return await asyncio.to_thread(self.get_article_stats, category)
+
+
+def get_search_backend():
+    """The SearchBackend instance SEARCH_BACKEND names; live loads and the article views go to it"""
+    try:
+        path = SEARCH_BACKENDS[settings.SEARCH_BACKEND]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"SEARCH_BACKEND must be one of {', '.join(SEARCH_BACKENDS)}, not {settings.SEARCH_BACKEND!r}"
+        )
+    return import_string(path)
@@ -0,0 +1,27 @@
+"""Single fast JSON codec shared by the ES transport, archives, API responses and Celery."""
+import orjson
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj, indent=False, default=None):
+    """Serialize to UTF-8 JSON bytes; dataclasses such as Article are handled natively"""
+    option = JSON_OPTIONS | orjson.OPT_INDENT_2 if indent else JSON_OPTIONS
+    return orjson.dumps(obj, default=default, option=option)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+def register_celery_serializer():
+    """Register 'orjson' with kombu so Celery task payloads skip stdlib json"""
+    from kombu.serialization import register
+
+    register(
+        'orjson',
+        dumps,
+        loads,
+        content_type='application/x-orjson',
+        content_encoding='utf-8',
+    )
@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import ScrapingTask
 
 class ScrapingTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScrapingTask
         fields = '__all__'
-        read_only_fields = ['task_id', 'status', 'total_articles', 'scraped_articles', 'error_message', 'created_at', 'updated_at']
+        read_only_fields = ['task_id', 'status', 'total_articles', 'scraped_articles', 'failed_articles', 'recovered_articles', 'new_articles', 'error_message', 'heartbeat_at', 'resume_count', 'created_at', 'updated_at']
 
 class StartScrapingSerializer(serializers.Serializer):
     category = serializers.ChoiceField(choices=ScrapingTask.CATEGORY_CHOICES)
@@ -21,6 +22,14 @@ class ArticleSearchSerializer(serializers.Serializer):
     date_from = serializers.DateField(required=False)
     date_to = serializers.DateField(required=False)
 
+class SuggestSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    category = serializers.ChoiceField(choices=ScrapingTask.CATEGORY_CHOICES, required=False)
+    size = serializers.IntegerField(min_value=1, max_value=10, default=5)
+
+class RelatedSerializer(serializers.Serializer):
+    size = serializers.IntegerField(min_value=1, max_value=settings.RELATED_ARTICLES_SIZE, default=5)
+
 class ArticleSerializer(serializers.Serializer):
     url = serializers.URLField()
     headline = serializers.CharField()
@@ -30,8 +39,15 @@ class ArticleSerializer(serializers.Serializer):
     content = serializers.CharField()
     scraped_at = serializers.CharField()
     word_count = serializers.IntegerField()
-    category = serializers.CharField()
+    category = serializers.ListField(child=serializers.CharField())
+    duplicate_urls = serializers.ListField(child=serializers.URLField(), required=False)
 
 class S3DownloadSerializer(serializers.Serializer):
     """Serializer for S3 download requests"""
-    task_id = serializers.CharField()
\ No newline at end of file
+    task_id = serializers.CharField()
+
+class TrendsSerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=ScrapingTask.CATEGORY_CHOICES, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    top = serializers.IntegerField(min_value=1, max_value=50, default=10)
@@ -1,22 +1,79 @@
 from celery import shared_task
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, quote
+from urllib.parse import urljoin, urlparse
+from zoneinfo import ZoneInfo
+import html
+import math
+import re
 import time
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from datetime import datetime, timedelta
 from elasticsearch import helpers
 import logging
-import json
+import uuid
 import zipfile
 import io
+import xml.etree.ElementTree as ElementTree
 import boto3
 from botocore.exceptions import ClientError
 from django.conf import settings
-from .models import ScrapingTask
-from .es_client import es_client
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import ScrapingTask, FailedFetch, BackfillPartition, CrawlSchedule
+from .es_client import es_client, live_index_write, record_document_routings, record_routing_alias
+from .redis_client import redis_client
+from .dedup import dedup_detector, article_doc_id
+from . import serialization
+from .records import Article
+from .parsing import ParsePool, parse_article_html, parse_article_page
+from .capture import STORY_CONTENT_TYPE, capture_store
+from .article_store import article_store
+from .search_backends import get_search_backend
+from .related import related_articles
+from .rollups import REBUILD_RETRY_DELAY, apply_facts, article_facts, rebuild_in_progress
 
 logger = logging.getLogger(__name__)
 
+# Shared per worker process; pool processes start on first use
+parse_pool = ParsePool(settings.SCRAPER_PARSE_WORKERS or None)
+
+PARAGRAPH_SPLIT_RE = re.compile(r'</p>|<br\s*/?>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]+>')
+
+# Overwrites the document for a re-crawl of its own URL, otherwise only records
+# the near-duplicate; either way the category joins the document's category list
+MERGE_ARTICLE_SCRIPT = """
+if (params.replace) {
+    for (entry in params.doc.entrySet()) {
+        if (entry.getKey() != 'category') {
+            ctx._source[entry.getKey()] = entry.getValue();
+        }
+    }
+} else {
+    if (ctx._source.duplicate_urls == null) {
+        ctx._source.duplicate_urls = [];
+    }
+    if (!ctx._source.duplicate_urls.contains(params.url)) {
+        ctx._source.duplicate_urls.add(params.url);
+    }
+}
+def categories = ctx._source.category;
+if (categories == null) {
+    categories = [];
+} else if (!(categories instanceof List)) {
+    categories = [categories];
+}
+if (!categories.contains(params.category)) {
+    categories.add(params.category);
+}
+ctx._source.category = categories;
+ctx._source.indexed_at = params.indexed_at;
+"""
+
 class S3Handler:
     def __init__(self):
         self.s3_client = boto3.client(
@@ -32,8 +89,7 @@ class S3Handler:
         zip_buffer = io.BytesIO()
         
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            articles_json = json.dumps(articles, indent=2, ensure_ascii=False)
-            zip_file.writestr(f'{task_id}_articles.json', articles_json.encode('utf-8'))
+            zip_file.writestr(f'{task_id}_articles.json', serialization.dumps(articles, indent=True))
             
             metadata = {
                 'task_id': task_id,
@@ -43,14 +99,12 @@ class S3Handler:
                 'file_format': 'json',
                 'encoding': 'utf-8'
             }
-            metadata_json = json.dumps(metadata, indent=2, ensure_ascii=False)
-            zip_file.writestr(f'{task_id}_metadata.json', metadata_json.encode('utf-8'))
+            zip_file.writestr(f'{task_id}_metadata.json', serialization.dumps(metadata, indent=True))
             
             for i, article in enumerate(articles):
-                article_json = json.dumps(article, indent=2, ensure_ascii=False)
                 zip_file.writestr(
                     f'articles/article_{i+1:04d}.json', 
-                    article_json.encode('utf-8')
+                    serialization.dumps(article, indent=True)
                 )
         
         zip_buffer.seek(0)
@@ -102,28 +156,148 @@ class S3Handler:
             logger.error(f"Failed to save articles to S3: {e}")
             raise
 
-@shared_task(bind=True)
+    def list_archives(self, category=None, date_prefix=None):
+        """Yield (key, size) of task archives, optionally limited to a category and a YYYY/MM/DD prefix"""
+        date_prefix = (date_prefix or '').replace('-', '/')
+        prefix = f'scraped-data/{category}/{date_prefix}' if category else 'scraped-data/'
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                # scraped-data/{category}/{YYYY}/{MM}/{DD}/{task_id}.zip
+                parts = obj['Key'].split('/')
+                if not obj['Key'].endswith('.zip') or len(parts) != 6:
+                    continue
+                if date_prefix and not '/'.join(parts[2:5]).startswith(date_prefix):
+                    continue
+                yield obj['Key'], obj['Size']
+
+    def read_archive(self, key):
+        """Download a task archive and return the article dicts it holds"""
+        body = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read()
+        with zipfile.ZipFile(io.BytesIO(body)) as zip_file:
+            name = next(name for name in zip_file.namelist() if name.endswith('_articles.json'))
+            return serialization.loads(zip_file.read(name))
+
+SCRAPE_START_LOCK = "scrape:start:{category}"
+
+
+def start_category_scrape(category, max_pages):
+    """Start a crawl of category unless an equivalent one is running or just finished.
+
+    Returns (task, outcome) where outcome is 'created', 'attached' (to a
+    pending or running crawl), 'extended' (a running crawl's max_pages was
+    raised), 'recent' (a crawl at least this deep finished within
+    SCRAPER_COALESCE_WINDOW) or 'busy' (task None: another request held the
+    category's lock too long). A per-category Redis lock serialises the
+    check across API processes.
+    """
+    lock = redis_client.lock(SCRAPE_START_LOCK.format(category=category), timeout=30, blocking_timeout=10)
+    try:
+        locked = lock.acquire()
+    except Exception as e:
+        logger.warning(f"Could not lock scrape start for {category}, continuing unlocked: {e}")
+        locked = None
+    if locked is False:
+        logger.warning(f"Timed out waiting for the scrape start lock of {category}")
+        return None, 'busy'
+
+    try:
+        active = ScrapingTask.objects.filter(
+            category=category, status__in=['PENDING', 'RUNNING']
+        ).order_by('-created_at').first()
+        if active:
+            if max_pages <= active.max_pages:
+                return active, 'attached'
+            # Only while the crawl still reads max_pages; it clears extendable in its own final check
+            if ScrapingTask.objects.filter(
+                pk=active.pk, status__in=['PENDING', 'RUNNING'], extendable=True, max_pages__lt=max_pages
+            ).update(max_pages=max_pages, updated_at=timezone.now()):
+                active.max_pages = max_pages
+                return active, 'extended'
+            active.refresh_from_db()
+            if active.max_pages >= max_pages:
+                return active, 'attached'
+            # Too late to extend: the deeper pages get a crawl of their own
+
+        window = settings.SCRAPER_COALESCE_WINDOW
+        if window:
+            recent = ScrapingTask.objects.filter(
+                category=category, status='SUCCESS', max_pages__gte=max_pages,
+                updated_at__gte=timezone.now() - timedelta(seconds=window)
+            ).order_by('-updated_at').first()
+            if recent:
+                return recent, 'recent'
+
+        task = ScrapingTask.objects.create(task_id=str(uuid.uuid4()), category=category, max_pages=max_pages)
+        try:
+            scrape_category_task.delay(task.task_id, category, max_pages)
+        except Exception as e:
+            # A PENDING row nobody will run would have every later request attach to it
+            task.status = 'FAILURE'
+            task.error_message = f"Could not queue the crawl: {e}"
+            task.save(update_fields=['status', 'error_message', 'updated_at'])
+            raise
+        return task, 'created'
+    finally:
+        if locked:
+            try:
+                lock.release()
+            except Exception as e:
+                logger.warning(f"Could not release scrape start lock for {category}: {e}")
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def scrape_category_task(self, task_id, category, max_pages=2):
     try:
         task = ScrapingTask.objects.get(task_id=task_id)
-        task.status = 'RUNNING'
-        task.save()
-        logger.info(f"[Task {task_id}] Starting scrape for category: {category}")
+        if task.status in ('SUCCESS', 'FAILURE'):
+            # Redelivered after it already finished
+            logger.info(f"[Task {task_id}] Already {task.status}, skipping")
+            return {'skipped': True, 'status': task.status}
 
         scraper = CategoryScraper(category)
-        result = scraper.run_scraping_pipeline(max_pages, task_id)
+        checkpoint = CrawlCheckpoint(task, scraper)
+        if not checkpoint.acquire():
+            logger.info(f"[Task {task_id}] Another worker holds the crawl, skipping duplicate delivery")
+            return {'skipped': True, 'status': task.status}
+
+        resuming = task.status == 'RUNNING'
+        task.status = 'RUNNING'
+        task.heartbeat_at = timezone.now()
+        task.save(update_fields=['status', 'heartbeat_at', 'updated_at'])
+        logger.info(f"[Task {task_id}] {'Resuming' if resuming else 'Starting'} scrape for category: {category}")
+
+        try:
+            # The row, not the message, holds max_pages: coalesced requests may have raised it
+            result = scraper.run_scraping_pipeline(task.max_pages, task_id, checkpoint)
+            checkpoint.flush_failures()
+        finally:
+            checkpoint.release()
 
         task.status = 'SUCCESS' if result['success'] else 'FAILURE'
         task.total_articles = result.get('total_articles', 0)
         task.scraped_articles = result.get('scraped_articles', 0)
+        # Fetches the retry queue recovered meanwhile count as recovered, not failed
+        task.failed_articles = task.failed_fetches.filter(kind='ARTICLE', status__in=['PENDING', 'EXHAUSTED']).count()
         task.error_message = result.get('error_message')
-        
+        # Checkpointed batches, of this delivery and of earlier ones that crashed, already counted theirs
+        task.new_articles = Coalesce(F('new_articles'), 0) + checkpoint.uncounted_created()
+        # Only this task's result columns: the coalescer may have raised max_pages
+        # and the retry queue may be incrementing recovered_articles meanwhile
+        task.extendable = False
+        update_fields = ['status', 'extendable', 'total_articles', 'scraped_articles', 'failed_articles',
+                         'error_message', 'new_articles', 'updated_at']
+
         # Save S3 information if successful
         if result['success'] and result.get('s3_url'):
             task.s3_url = result['s3_url']
             task.s3_key = result['s3_key']
-        
-        task.save()
+            update_fields += ['s3_url', 's3_key', 's3_uploaded_at']
+
+        task.save(update_fields=update_fields)
+        task.refresh_from_db(fields=['new_articles'])
+        if result['success'] and not result.get('partial'):
+            checkpoint.clear()
 
         logger.info(f"[Task {task_id}] Completed with status: {task.status}")
         return result
@@ -131,20 +305,685 @@ def scrape_category_task(self, task_id, category, max_pages=2):
     except Exception as e:
         logger.error(f"[Task {task_id}] Failed: {e}")
         try:
-            task = ScrapingTask.objects.get(task_id=task_id)
-            task.status = 'FAILURE'
-            task.error_message = str(e)
-            task.save()
-        except:
+            ScrapingTask.objects.filter(task_id=task_id).update(
+                status='FAILURE', error_message=str(e), updated_at=timezone.now()
+            )
+        except Exception:
             pass
         raise
 
 
+@shared_task
+def requeue_stale_tasks():
+    """Watchdog: redeliver RUNNING crawls whose heartbeat stopped, giving up after SCRAPER_MAX_RESUMES.
+
+    PENDING crawls no worker started within the heartbeat timeout (the
+    message was lost, or is stuck behind a dead worker) are redelivered the
+    same way; a duplicate delivery finds the crawl locked or finished.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.SCRAPER_HEARTBEAT_TIMEOUT)
+    stale = ScrapingTask.objects.filter(status__in=['PENDING', 'RUNNING']).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, updated_at__lt=cutoff)
+    )
+
+    requeued = abandoned = 0
+    for task in stale:
+        if task.resume_count >= settings.SCRAPER_MAX_RESUMES:
+            task.status = 'FAILURE'
+            task.error_message = (f"Not started after {task.resume_count + 1} deliveries; giving up"
+                                  if task.status == 'PENDING'
+                                  else f"Heartbeat lost {task.resume_count + 1} times; giving up")
+            task.save(update_fields=['status', 'error_message', 'updated_at'])
+            abandoned += 1
+            continue
+
+        # Pushing the heartbeat forward keeps the next sweep from requeueing it again
+        updated = ScrapingTask.objects.filter(
+            pk=task.pk, status=task.status, heartbeat_at=task.heartbeat_at, updated_at=task.updated_at
+        ).update(heartbeat_at=timezone.now(), resume_count=F('resume_count') + 1, updated_at=timezone.now())
+        if updated:
+            logger.warning(f"[Task {task.task_id}] {task.status} with no heartbeat since "
+                           f"{task.heartbeat_at or task.updated_at}, requeueing")
+            scrape_category_task.delay(task.task_id, task.category, task.max_pages)
+            requeued += 1
+
+    return {'requeued': requeued, 'abandoned': abandoned}
+
+
+def learn_crawl_plan(category):
+    """Return (new articles per hour, interval seconds, max_pages) from the category's recent crawls.
+
+    Each crawl finds what was published since the previous one, so a crawl's
+    new articles over the time since the previous crawl is one rate sample. A
+    crawl whose every listed story was new (or failed) was capped by max_pages
+    and only gives a lower bound: the rate comes from the uncapped samples and
+    is raised to the highest lower bound. The interval aims for
+    SCRAPER_SCHEDULE_TARGET_NEW new articles per crawl, and max_pages leaves
+    half a crawl of headroom.
+    """
+    history = list(
+        ScrapingTask.objects.filter(category=category, status='SUCCESS', new_articles__isnull=False)
+        .order_by('-created_at')
+        .values_list('created_at', 'new_articles', 'max_pages', 'failed_articles')[:settings.SCRAPER_SCHEDULE_HISTORY]
+    )
+    if len(history) < 2:
+        return None, settings.SCRAPER_SCHEDULE_DEFAULT_INTERVAL, 2
+
+    history.reverse()
+    uncapped_new = uncapped_hours = lower_bound = 0
+    for previous, (created_at, new, pages, failed) in zip(history, history[1:]):
+        hours = (created_at - previous[0]).total_seconds() / 3600
+        if hours <= 0:
+            continue
+        if new + failed >= pages * CategoryScraper.stories_per_page:
+            lower_bound = max(lower_bound, new / hours)
+        else:
+            uncapped_new += new
+            uncapped_hours += hours
+    if not uncapped_hours and not lower_bound:
+        return None, settings.SCRAPER_SCHEDULE_DEFAULT_INTERVAL, 2
+    rate = max(uncapped_new / uncapped_hours if uncapped_hours else 0, lower_bound)
+
+    if rate > 0:
+        interval = settings.SCRAPER_SCHEDULE_TARGET_NEW / rate * 3600
+    else:
+        interval = settings.SCRAPER_SCHEDULE_MAX_INTERVAL
+    interval = int(min(max(interval, settings.SCRAPER_SCHEDULE_MIN_INTERVAL), settings.SCRAPER_SCHEDULE_MAX_INTERVAL))
+
+    expected = rate * interval / 3600
+    max_pages = min(max(math.ceil(expected * 1.5 / CategoryScraper.stories_per_page), 1), 10)
+    return rate, interval, max_pages
+
+
+def staggered(run_at, taken):
+    """The first time from run_at on that is SCRAPER_SCHEDULE_STAGGER away from every time in taken"""
+    gap = timedelta(seconds=settings.SCRAPER_SCHEDULE_STAGGER)
+    for other in sorted(taken):
+        if other - gap < run_at < other + gap:
+            run_at = other + gap
+    return run_at
+
+
+@shared_task
+def schedule_crawls():
+    """Beat tick: start the most overdue category crawls that fit under the global concurrency ceiling"""
+    if not settings.SCRAPER_SCHEDULER_ENABLED:
+        return {'started': []}
+
+    now = timezone.now()
+    known = set(CrawlSchedule.objects.values_list('category', flat=True))
+    taken = dict(CrawlSchedule.objects.filter(enabled=True).values_list('category', 'next_run_at'))
+    new_categories = [category for category, _ in ScrapingTask.CATEGORY_CHOICES if category not in known]
+    # Categories seen for the first time are staggered instead of all falling due at once
+    for category in new_categories:
+        rate, interval, max_pages = learn_crawl_plan(category)
+        taken[category] = staggered(now, taken.values())
+        CrawlSchedule.objects.create(
+            category=category, rate_per_hour=rate, interval_seconds=interval, max_pages=max_pages,
+            next_run_at=taken[category]
+        )
+
+    active = ScrapingTask.objects.filter(status__in=['PENDING', 'RUNNING']).count()
+    slots = min(settings.SCRAPER_SCHEDULE_STARTS_PER_TICK, settings.SCRAPER_MAX_CONCURRENT_CRAWLS - active)
+    if slots <= 0:
+        return {'started': [], 'active': active}
+
+    started = []
+    for schedule in CrawlSchedule.objects.filter(enabled=True, next_run_at__lte=now).order_by('next_run_at'):
+        if len(started) >= slots:
+            break
+        rate, interval, max_pages = learn_crawl_plan(schedule.category)
+        task, outcome = start_category_scrape(schedule.category, max_pages)
+        if outcome == 'busy':
+            continue
+        logger.info(f"Scheduled crawl of {schedule.category}: {outcome} task {task.task_id}, "
+                    f"{max_pages} pages, next in {interval}s")
+
+        schedule.rate_per_hour = rate
+        schedule.interval_seconds = interval
+        schedule.max_pages = max_pages
+        if outcome == 'recent':
+            # A manual crawl just ran; count the interval from it without using a slot
+            next_run_at = task.updated_at + timedelta(seconds=interval)
+        else:
+            schedule.last_run_at = now
+            next_run_at = now + timedelta(seconds=interval)
+            started.append({'category': schedule.category, 'task_id': task.task_id, 'outcome': outcome})
+        # Every reschedule keeps its distance from the other categories, so crawls never bunch up
+        taken.pop(schedule.category, None)
+        schedule.next_run_at = taken[schedule.category] = staggered(next_run_at, taken.values())
+        schedule.save(update_fields=['rate_per_hour', 'interval_seconds', 'max_pages', 'next_run_at', 'last_run_at',
+                                     'updated_at'])
+
+    return {'started': started, 'active': active}
+
+
+class CrawlCheckpoint:
+    """Redis checkpoint of one crawl: its URL frontier and the documents already indexed.
+
+    Every saved batch also records the batch's failed fetches, adds the
+    documents it created to the task's new_articles and bumps the task's
+    heartbeat, so a redelivered or requeued task resumes without re-fetching
+    finished URLs or losing their count. A lock that expires with the heartbeat keeps a
+    second delivery from crawling alongside a live worker. Redis errors are
+    logged and the crawl carries on without checkpoints.
+    """
+
+    KEY_PREFIX = "crawl"
+
+    def __init__(self, task, scraper):
+        self.task = task
+        self.scraper = scraper
+        self.recorded_failures = 0
+        self.counted_created = 0
+        self.ttl = settings.SCRAPER_CHECKPOINT_TTL
+        self.token = uuid.uuid4().hex
+
+    def key(self, name):
+        return f"{self.KEY_PREFIX}:{self.task.task_id}:{name}"
+
+    def acquire(self):
+        try:
+            return bool(redis_client.set(
+                self.key('lock'), self.token, nx=True, ex=settings.SCRAPER_HEARTBEAT_TIMEOUT
+            ))
+        except Exception as e:
+            logger.warning(f"Could not lock crawl {self.task.task_id}, continuing unlocked: {e}")
+            return True
+
+    def release(self):
+        try:
+            if redis_client.get(self.key('lock')) == self.token.encode():
+                redis_client.delete(self.key('lock'))
+        except Exception as e:
+            logger.warning(f"Could not release crawl lock {self.task.task_id}: {e}")
+
+    def load_frontier(self):
+        """Return {'urls': [...], 'pages': collection pages walked}, or None"""
+        try:
+            frontier = redis_client.get(self.key('frontier'))
+            return serialization.loads(frontier) if frontier else None
+        except Exception as e:
+            logger.warning(f"Could not load crawl frontier for {self.task.task_id}: {e}")
+            return None
+
+    def save_frontier(self, urls, pages):
+        self.flush_failures()
+        try:
+            frontier = {'urls': urls, 'pages': pages}
+            redis_client.set(self.key('frontier'), serialization.dumps(frontier), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not save crawl frontier for {self.task.task_id}: {e}")
+        self.heartbeat()
+
+    def completed(self):
+        """Return ({url: (doc_id, routing)} of indexed articles, every finished URL) from earlier runs"""
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.key('documents'))
+            pipe.smembers(self.key('done'))
+            documents, done = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not load crawl checkpoint for {self.task.task_id}: {e}")
+            return {}, set()
+        return (
+            {url.decode(): tuple(serialization.loads(ref)) for url, ref in documents.items()},
+            {url.decode() for url in done}
+        )
+
+    def save_batch(self, urls, documents):
+        """Mark urls finished once their articles are indexed; documents maps url -> (doc_id, routing).
+
+        Only references are kept, not article bodies, so a week-long TTL costs little Redis memory.
+        """
+        self.flush_failures()
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            if documents:
+                pipe.hset(self.key('documents'), mapping={
+                    url: serialization.dumps(list(ref)) for url, ref in documents.items()
+                })
+            if urls:
+                pipe.sadd(self.key('done'), *urls)
+            for name in ('documents', 'done'):
+                pipe.expire(self.key(name), self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not save crawl checkpoint for {self.task.task_id}: {e}")
+        self.heartbeat()
+
+    def flush_failures(self):
+        """Queue failures recorded since the last checkpoint, so a crash cannot lose them"""
+        record_failed_fetches(self.scraper.failures[self.recorded_failures:], self.task.category, [self.task])
+        self.recorded_failures = len(self.scraper.failures)
+
+    def uncounted_created(self):
+        """Documents this delivery created since the last count; a redelivery would see them as updates"""
+        created = self.scraper.index_stats['created'] - self.counted_created
+        self.counted_created += created
+        return created
+
+    def heartbeat(self):
+        ScrapingTask.objects.filter(pk=self.task.pk).update(
+            heartbeat_at=timezone.now(), updated_at=timezone.now(),
+            new_articles=Coalesce(F('new_articles'), 0) + self.uncounted_created()
+        )
+        try:
+            redis_client.expire(self.key('lock'), settings.SCRAPER_HEARTBEAT_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Could not extend crawl lock {self.task.task_id}: {e}")
+
+    def clear(self):
+        try:
+            redis_client.delete(*(self.key(name) for name in ('frontier', 'documents', 'done')))
+        except Exception as e:
+            logger.warning(f"Could not clear crawl checkpoint for {self.task.task_id}: {e}")
+
+
+def suggest_inputs(article):
+    """Completion-suggester inputs for an article, skipping extraction placeholders"""
+    return [
+        value for value in (article.headline, article.author)
+        if value and not value.endswith("not found")
+    ]
+
+
+def bulk_index_articles(articles, index=None, stats=None, assigned=None):
+    """Merge articles into the index (default the live alias); returns the indexed count, None on failure.
+
+    stats, if given, accumulates the 'indexed' count, how many documents were 'created',
+    the url -> (doc_id, routing) 'documents' each accepted article went into, and the
+    (url, error) of each article the bulk load 'rejected'. assigned holds the articles'
+    dedup_detector.assign() entries when the caller assigned them already. A load into
+    any other index than the live one leaves the live near-duplicate and routing state
+    alone; a rebuild records it after its alias swap.
+    """
+    if not articles:
+        return None
+
+    live = index in (None, es_client.INDEX_NAME)
+    # The embedded store replaces Elasticsearch for live loads, rebuilds always target ES
+    store_only = index is None and get_search_backend() is article_store
+    try:
+        if index is None and not store_only:
+            es_client.create_index_if_not_exists()
+
+        actions = []
+        store_items = []
+        canonical = {}
+        signatures = {}
+        indexed_at = timezone.now().isoformat()
+        # The embedded store has no shards to keep a document on
+        lookup_routings = None if store_only else partial(es_client.find_routings, index=index)
+        if assigned is None:
+            assigned = dedup_detector.assign(articles, lookup_routings)
+        for article, doc_id, routing, signature in assigned:
+            replace = doc_id == article_doc_id(article.url)
+            store_items.append((doc_id, article, replace))
+            doc = article.to_dict()
+            doc['category'] = [article.category]
+            doc['suggest'] = {'input': suggest_inputs(article)}
+            doc['indexed_at'] = indexed_at
+            if replace:
+                canonical[doc_id] = article
+                params = {'replace': True, 'doc': doc, 'category': article.category, 'indexed_at': indexed_at}
+            else:
+                # The upsert makes the duplicate the document itself if the canonical one is missing
+                canonical.setdefault(doc_id, article)
+                params = {'replace': False, 'url': article.url, 'category': article.category,
+                          'indexed_at': indexed_at}
+            if signature is not None:
+                signatures[doc_id] = (doc_id, signature, routing)
+
+            if routing != article.category and live:
+                record_routing_alias(article.category, routing)
+
+            actions.append({
+                "_op_type": "update",
+                "_index": index or es_client.INDEX_NAME,
+                "_id": doc_id,
+                "_routing": routing,
+                "script": {"source": MERGE_ARTICLE_SCRIPT, "lang": "painless", "params": params},
+                "upsert": doc,
+            })
+
+        success = created = failed = 0
+        new_docs = []
+        # Canonical documents whose content was replaced, e.g. by a re-extraction
+        changed_docs = []
+        replaced = {doc_id for doc_id, _, replace in store_items if replace}
+        rejected = {}
+        if store_only:
+            new_docs = article_store.index_articles(store_items)
+            success = len(store_items)
+            created = len(new_docs)
+            indexed_ids = {doc_id for doc_id, _, _ in store_items}
+        else:
+            indexed_ids = set()
+            # Writes to the live index hold off while an alias swap catches up on them
+            with live_index_write() if live else nullcontext():
+                # Results come back in action order
+                for position, (ok, item) in enumerate(helpers.streaming_bulk(
+                    es_client.client,
+                    actions,
+                    chunk_size=100,
+                    request_timeout=60,
+                    raise_on_error=False
+                )):
+                    if not ok:
+                        failed += 1
+                        rejected[store_items[position][1].url] = item['update'].get('error')
+                        continue
+                    success += 1
+                    indexed_ids.add(item['update']['_id'])
+                    if item['update'].get('result') == 'created':
+                        created += 1
+                        new_docs.append(item['update']['_id'])
+                    elif item['update']['_id'] in replaced:
+                        changed_docs.append(item['update']['_id'])
+            if live and article_store is not None and indexed_ids:
+                # The fallback copy holds only what Elasticsearch accepted
+                mirrored = [item for item in store_items if item[0] in indexed_ids]
+                try:
+                    article_store.index_articles(mirrored)
+                except Exception as e:
+                    logger.warning(f"Could not mirror {len(mirrored)} articles to the article store: {e}")
+        if live:
+            # Only documents Elasticsearch accepted may become merge targets
+            dedup_detector.remember([signatures[doc_id] for doc_id in indexed_ids if doc_id in signatures])
+            if not store_only:
+                record_document_routings({
+                    action['_id']: action['_routing'] for action in actions if action['_id'] in indexed_ids
+                })
+
+        if stats is not None:
+            stats['indexed'] = stats.get('indexed', 0) + success
+            stats['created'] = stats.get('created', 0) + created
+            documents = stats.setdefault('documents', {})
+            for action, (_, article, _) in zip(actions, store_items):
+                if action['_id'] in indexed_ids:
+                    documents[article.url] = (action['_id'], action['_routing'])
+            stats.setdefault('rejected', []).extend(rejected.items())
+        logger.info(f"Indexed {success} articles to {index or ('article store' if store_only else 'unified index')} "
+                    f"({created} new, {failed} failed)")
+        if index is None:
+            es_client.bump_generation()
+            if not store_only:
+                # more_like_this needs Elasticsearch; changed documents get fresh lists and summaries
+                routings = {action['_id']: action['_routing'] for action in actions}
+                queue_after_bulk(compute_related_articles, [
+                    (doc_id, routings[doc_id]) for doc_id in dict.fromkeys(new_docs + changed_docs)
+                ])
+            if new_docs:
+                queue_after_bulk(update_daily_rollups, [
+                    article_facts(doc_id, canonical[doc_id]) for doc_id in new_docs if doc_id in canonical
+                ])
+        return success
+
+    except Exception as e:
+        logger.error(f"Bulk indexing failed: {e}")
+        return None
+
+
+def queue_after_bulk(task, items):
+    """Hand new documents to a follow-up task; a broker outage must not fail the bulk load"""
+    if not items:
+        return
+    try:
+        task.delay(items)
+    except Exception as e:
+        logger.warning(f"Could not queue {task.name} for {len(items)} new documents: {e}")
+
+
+@shared_task
+def compute_related_articles(docs, refresh_index=True):
+    """Precompute related articles for new or re-extracted (doc_id, routing) pairs and their neighbourhood.
+
+    refresh_index=False skips the index refresh when the caller (a seeding run) already did it.
+    """
+    batch_size = settings.RELATED_ARTICLES_BATCH_SIZE
+    computed = 0
+    if docs and refresh_index:
+        related_articles.refresh_index()
+    for start in range(0, len(docs), batch_size):
+        computed += related_articles.refresh([tuple(doc) for doc in docs[start:start + batch_size]])
+    logger.info(f"Computed related articles for {computed} of {len(docs)} documents")
+    return {'computed': computed}
+
+
+@shared_task(bind=True, max_retries=None)
+def update_daily_rollups(self, facts):
+    """Fold newly indexed articles into their daily per-category rollups"""
+    if rebuild_in_progress():
+        # The rebuild's scan may or may not see these articles; it records which ones it counted
+        raise self.retry(countdown=REBUILD_RETRY_DELAY)
+    touched = apply_facts(facts)
+    logger.info(f"Added {len(facts)} new articles to {touched} daily rollups")
+    return {'articles': len(facts), 'rollups': touched}
+
+
+def retry_delay(retry_number):
+    """Exponential backoff before the n-th retry of a failed fetch"""
+    delay = settings.SCRAPER_RETRY_BASE_DELAY * (2 ** (retry_number - 1))
+    return timedelta(seconds=min(delay, settings.SCRAPER_RETRY_MAX_DELAY))
+
+
+def record_failed_fetches(failures, category, tasks=()):
+    """Persist the scraper's failed URLs and pages to the retry queue.
+
+    A URL already queued is not queued twice, but the entry is linked to
+    every task that hit it so each task's failed/recovered counts include it.
+    """
+    for failure in failures:
+        error = failure['error']
+        fetch, _ = FailedFetch.objects.get_or_create(
+            kind=failure['kind'],
+            url=failure['url'],
+            status='PENDING',
+            defaults={
+                'category': category,
+                'page_num': failure['page_num'],
+                'error_class': type(error).__name__,
+                'error_message': str(error),
+                'next_retry_at': timezone.now() + retry_delay(1),
+            }
+        )
+        if tasks:
+            fetch.tasks.add(*tasks)
+
+    if failures:
+        logger.info(f"Queued {len(failures)} failed fetches for retry in category: {category}")
+
+
+def reschedule_failed_fetch(fetch, error):
+    fetch.attempts += 1
+    fetch.error_class = type(error).__name__
+    fetch.error_message = str(error)
+    if fetch.attempts >= settings.SCRAPER_RETRY_MAX_ATTEMPTS:
+        fetch.status = 'EXHAUSTED'
+        logger.warning(f"Giving up on {fetch.url} after {fetch.attempts} retries")
+    else:
+        fetch.next_retry_at = timezone.now() + retry_delay(fetch.attempts + 1)
+    fetch.save()
+
+
+@shared_task
+def retry_failed_fetches(batch_size=None):
+    """Drain due entries of the failed-fetch queue and index the recovered articles.
+
+    PAGE entries are re-fetched by their skip offset. The collection has moved
+    on by then, so a page retry is best-effort: it indexes whatever stories
+    sit at that offset now, and stories that slid past it are only caught by
+    the next crawl.
+    """
+    batch_size = batch_size or settings.SCRAPER_RETRY_BATCH_SIZE
+    due = list(
+        FailedFetch.objects.filter(status='PENDING', next_retry_at__lte=timezone.now())
+        .prefetch_related('tasks')[:batch_size]
+    )
+
+    by_category = {}
+    for fetch in due:
+        by_category.setdefault(fetch.category, []).append(fetch)
+
+    recovered = 0
+    failed = 0
+    for category, fetches in by_category.items():
+        scraper = CategoryScraper(category)
+        articles = []
+        recovered_fetches = []
+
+        for fetch in fetches:
+            if fetch.kind == 'PAGE':
+                try:
+                    urls = scraper.fetch_collection_page(fetch.page_num)
+                except Exception as e:
+                    reschedule_failed_fetch(fetch, e)
+                    failed += 1
+                    continue
+
+                first_failure = len(scraper.failures)
+                page_articles = scraper.scrape_articles(urls)
+                # Articles that fail while re-walking a page join the queue on their own
+                record_failed_fetches(scraper.failures[first_failure:], category, fetch.tasks.all())
+            else:
+                article = scraper.scrape_article(fetch.url)
+                time.sleep(settings.SCRAPER_REQUEST_DELAY)
+                if not article:
+                    reschedule_failed_fetch(fetch, scraper.failures[-1]['error'])
+                    failed += 1
+                    continue
+                page_articles = [article]
+
+            articles.extend(page_articles)
+            recovered_fetches.append((fetch, page_articles))
+
+        index_failures = {
+            failure['url']: failure for failure in (scraper.bulk_index_articles(articles) if articles else [])
+        }
+        for fetch, page_articles in recovered_fetches:
+            if fetch.kind == 'ARTICLE' and fetch.url in index_failures:
+                reschedule_failed_fetch(fetch, index_failures[fetch.url]['error'])
+                failed += 1
+                continue
+            indexed = [article for article in page_articles if article.url not in index_failures]
+            # Articles of a re-walked page that the index rejected join the queue on their own
+            record_failed_fetches([index_failures[article.url] for article in page_articles
+                                   if article.url in index_failures], category, fetch.tasks.all())
+            fetch.status = 'RECOVERED'
+            fetch.save()
+            if indexed:
+                ScrapingTask.objects.filter(failed_fetches=fetch).update(
+                    recovered_articles=F('recovered_articles') + len(indexed), updated_at=timezone.now()
+                )
+            recovered += len(indexed)
+
+    logger.info(f"Retry queue: {recovered} articles recovered, {failed} fetches still failing")
+    return {'processed': len(due), 'recovered': recovered, 'failed': failed}
+
+
+@shared_task
+def backfill_partition_task(partition_id):
+    """Scrape one day of a category's sitemap, checkpointing after every indexed batch"""
+    # Claim the partition, unless it is done or another worker is still making progress on it
+    stale = timezone.now() - timedelta(seconds=settings.SCRAPER_HEARTBEAT_TIMEOUT)
+    claimed = BackfillPartition.objects.filter(pk=partition_id).exclude(status='DONE').exclude(
+        status='RUNNING', updated_at__gt=stale
+    ).update(status='RUNNING', error_message=None, updated_at=timezone.now())
+    partition = BackfillPartition.objects.get(pk=partition_id)
+    if not claimed:
+        logger.info(f"Skipping backfill of {partition}")
+        return {'partition': partition_id, 'status': partition.status, 'scraped_articles': partition.scraped_articles}
+    scraper = CategoryScraper(partition.category)
+
+    try:
+        if not partition.urls:
+            # The URL list is fixed once, so the cursor keeps its meaning if the sitemap changes later
+            partition.urls = scraper.get_sitemap_urls(partition.date)
+            partition.urls_found = len(partition.urls)
+            partition.save(update_fields=['urls', 'urls_found', 'updated_at'])
+        urls = partition.urls
+
+        batch_size = settings.SCRAPER_BACKFILL_BATCH_SIZE
+        while partition.cursor < len(urls):
+            batch = urls[partition.cursor:partition.cursor + batch_size]
+            first_failure = len(scraper.failures)
+            articles = scraper.scrape_articles(batch)
+            index_failures = scraper.bulk_index_articles(articles) if articles else []
+            if articles and len(index_failures) == len(articles):
+                raise RuntimeError("Bulk indexing failed")
+            # Single articles the index rejected are retried like failed fetches
+            scraper.failures.extend(index_failures)
+            record_failed_fetches(scraper.failures[first_failure:], partition.category)
+
+            partition.cursor += len(batch)
+            partition.scraped_articles += len(articles) - len(index_failures)
+            partition.failed_articles += len(scraper.failures) - first_failure
+            partition.save(update_fields=['cursor', 'scraped_articles', 'failed_articles', 'updated_at'])
+
+        partition.status = 'DONE'
+    except Exception as e:
+        logger.error(f"Backfill of {partition} failed at URL {partition.cursor}: {e}")
+        partition.status = 'FAILED'
+        partition.error_message = str(e)
+
+    partition.save(update_fields=['status', 'error_message', 'updated_at'])
+    return {'partition': partition_id, 'status': partition.status, 'scraped_articles': partition.scraped_articles}
+
+
+SITEMAP_CACHE_KEY = "sitemap:{date}"
+
+
+def fetch_sitemap(date):
+    """Every <loc> of one day's sitemap, cached in Redis so the category partitions of a day share one download.
+
+    Returns (urls, fetched), fetched telling whether the sitemap was downloaded.
+    """
+    key = SITEMAP_CACHE_KEY.format(date=date.isoformat())
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            return serialization.loads(cached), False
+    except Exception as e:
+        logger.warning(f"Could not read the cached {date} sitemap: {e}")
+
+    response = requests.get(settings.SCRAPER_SITEMAP_URL.format(date=date.strftime('%Y-%m-%d')), timeout=30)
+    response.raise_for_status()
+    urls = [(loc.text or '').strip() for loc in ElementTree.fromstring(response.content).iterfind('.//{*}loc')]
+    try:
+        redis_client.set(key, serialization.dumps(urls), ex=settings.SCRAPER_SITEMAP_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Could not cache the {date} sitemap: {e}")
+    return urls, True
+
+
 class CategoryScraper:
+    stories_per_page = 12
+
+    # Site section each category's articles are published under, as it appears in sitemap URLs
+    SITEMAP_SECTIONS = {
+        'politics': 'politics',
+        'world-all': 'world',
+        'opinion-all': 'opinion',
+        'crime-bangladesh': 'bangladesh/crime',
+        'business-all': 'business',
+        'sports-all': 'sports',
+        'entertainment-all': 'entertainment',
+        'chakri-all': 'chakri',
+        'lifestyle-all': 'lifestyle',
+    }
+
     def __init__(self, category):
         self.category = category
         self.base_url = "https://www.prothomalo.com/"
         self.api_url = f"https://www.prothomalo.com/api/v1/collections/{category}"
+        self.story_api_url = "https://www.prothomalo.com/api/v1/stories-by-slug"
+        self.extraction_mode = settings.SCRAPER_EXTRACTION_MODE
+        self.timezone = ZoneInfo(settings.SCRAPER_SOURCE_TIMEZONE)
+        self.stories = {}
+        self.failures = []
+        self.page_fetches = 0
+        self.index_stats = {'indexed': 0, 'created': 0, 'documents': {}, 'rejected': []}
         self.bengali_to_english_digits = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
         self.bengali_months = {
             'জানুয়ারি': '01', 'ফেব্রুয়ারি': '02', 'মার্চ': '03', 'এপ্রিল': '04',
@@ -170,124 +1009,292 @@ class CategoryScraper:
             if not month:
                 return None
 
-            return f"{year}-{month}-{day} {time_en}"
+            # Same zero-padded form as story_published_at, e.g. "2025-06-05 09:30"
+            hour, minute = time_en.split(":")
+            return datetime(int(year), int(month), int(day), int(hour), int(minute)).strftime('%Y-%m-%d %H:%M')
 
         except Exception as e:
             logger.warning(f"Failed to parse datetime '{date_str}': {e}")
             return None
 
+    def story_text(self, story):
+        """Join the text story-elements of a story's cards into paragraphs"""
+        paragraphs = []
+        for card in story.get('cards', []):
+            for element in card.get('story-elements', []):
+                if element.get('type') != 'text' or element.get('subtype') == 'also-read':
+                    continue
+                for fragment in PARAGRAPH_SPLIT_RE.split(element.get('text') or ''):
+                    paragraph = html.unescape(TAG_RE.sub('', fragment)).strip()
+                    if paragraph:
+                        paragraphs.append(paragraph)
+        return "\n".join(paragraphs)
+
+    def story_published_at(self, story):
+        timestamp = story.get('first-published-at') or story.get('published-at')
+        if not timestamp:
+            return None
+        published = datetime.fromtimestamp(timestamp / 1000, tz=self.timezone)
+        return published.strftime('%Y-%m-%d %H:%M')
+
+    def article_from_story(self, url, story):
+        """Build an article from structured story JSON, or None if the body is missing"""
+        headline = (story.get('headline') or '').strip()
+        content = self.story_text(story)
+        if not headline or not content:
+            return None
+
+        authors = story.get('authors') or []
+        author = story.get('author-name') or (authors[0].get('name') if authors else None)
+        location = (story.get('metadata') or {}).get('location')
+
+        return Article(
+            url=url,
+            headline=headline,
+            author=author or "Author not found",
+            location=location or "Location not found",
+            published_at=self.story_published_at(story),
+            content=content,
+            scraped_at=datetime.now().isoformat(),
+            word_count=len(content.split()),
+            category=self.category
+        )
+
+    def fetch_story(self, slug):
+        self.page_fetches += 1
+        response = requests.get(self.story_api_url, params={'slug': slug}, timeout=10)
+        response.raise_for_status()
+        return response.json().get('story') or {}
+
+    def scrape_article_from_api(self, url):
+        """Fill the article from the collection payload, then the story API"""
+        story = self.stories.get(url)
+        article = self.article_from_story(url, story) if story else None
+        if not article:
+            try:
+                slug = story.get('slug') if story else urlparse(url).path.lstrip('/')
+                story = self.fetch_story(slug)
+                article = self.article_from_story(url, story)
+            except Exception as e:
+                logger.debug(f"Story API lookup failed for {url}, falling back to HTML: {e}")
+                return None
+
+        if article and capture_store:
+            # The story JSON is this article's source, so re-extraction must start from it, not the HTML page
+            self.capture(url, serialization.dumps(story), content_type=STORY_CONTENT_TYPE)
+        return article
+
     def scrape_article(self, url):
+        if self.extraction_mode == 'api':
+            article = self.scrape_article_from_api(url)
+            if article:
+                logger.debug(f"Extracted article from story JSON: {article.headline[:50]}...")
+                return article
+        return self.scrape_article_html(url)
+
+    def article_from_fields(self, url, fields):
+        content = fields['content']
+        return Article(
+            url=url,
+            headline=fields['headline'],
+            author=fields['author'],
+            location=fields['location'],
+            published_at=self.parse_bengali_date(fields['publication_date_raw']),
+            content=content,
+            scraped_at=datetime.now().isoformat(),
+            word_count=len(content.split()) if content else 0,
+            category=self.category
+        )
+
+    def record_article_failure(self, url, error):
+        logger.error(f"Error scraping {url}: {error}")
+        self.failures.append({'kind': 'ARTICLE', 'url': url, 'page_num': None, 'error': error})
+
+    def fetch_page(self, url):
+        """Download one article page, returning None after recording a failure"""
         try:
+            self.page_fetches += 1
             response = requests.get(url, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            if capture_store:
+                self.capture(url, response.content, response.status_code, response.headers.get('Content-Type'))
+            return response.content
+        except Exception as e:
+            self.record_article_failure(url, e)
+            return None
 
-            headline_tag = soup.select_one("h1.IiRps")
-            headline = headline_tag.get_text(strip=True) if headline_tag else "Headline not found"
+    def capture(self, url, content, status=200, content_type=None):
+        try:
+            capture_store.save(url, content, self.category, status, content_type)
+        except Exception as e:
+            logger.warning(f"Could not capture {url}: {e}")
 
-            author_tag = soup.select_one("span.contributor-name._8TSJC")
-            author = author_tag.get_text(strip=True) if author_tag else "Author not found"
+    def scrape_article_html(self, url):
+        content = self.fetch_page(url)
+        if content is None:
+            return None
+        try:
+            article = self.article_from_fields(url, parse_article_html(content))
+            logger.debug(f"Scraped article: {article.headline[:50]}...")
+            return article
+        except Exception as e:
+            self.record_article_failure(url, e)
+            return None
 
-            location_tag = soup.select_one("span.author-location._8-umj")
-            location = location_tag.get_text(strip=True) if location_tag else "Location not found"
-            location = location.replace("Location: ", "").strip()
+    def fetch_pages(self, urls):
+        """Fetch article pages concurrently, yielding (url, html bytes) in input order"""
+        concurrency = settings.SCRAPER_FETCH_CONCURRENCY
 
-            date_tag = soup.select_one("div.time-social-share-wrapper span:first-child")
-            publication_date_raw = date_tag.get_text(strip=True) if date_tag else "Date not found"
-            publication_date_cleaned = publication_date_raw.split(":", 1)[-1].strip()
-            publication_date = self.parse_bengali_date(publication_date_cleaned)
+        def fetch(url):
+            content = self.fetch_page(url)
+            time.sleep(settings.SCRAPER_REQUEST_DELAY)
+            return content
 
-            content_paragraphs = soup.select("div.story-content p")
-            content = "\n".join([p.get_text(strip=True) for p in content_paragraphs])
-            word_count = len(content.split()) if content else 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            window = deque()
+            for url in urls:
+                window.append((url, executor.submit(fetch, url)))
+                # Bound the pages buffered ahead of the parse stage
+                while len(window) > concurrency * 2:
+                    done_url, future = window.popleft()
+                    content = future.result()
+                    if content is not None:
+                        yield done_url, content
+            while window:
+                done_url, future = window.popleft()
+                content = future.result()
+                if content is not None:
+                    yield done_url, content
 
-            logger.debug(f"Scraped article: {headline[:50]}...")
-            return {
-                "url": url,
-                "headline": headline,
-                "author": author,
-                "location": location,
-                "published_at": publication_date,
-                "content": content,
-                "scraped_at": datetime.now().isoformat(),
-                "word_count": word_count,
-                "category": self.category
-            }
+    def scrape_articles(self, urls):
+        """Scrape many articles: story JSON first, then concurrent fetch into the parse pool"""
+        articles = {}
+        html_urls = []
+        for url in urls:
+            if self.extraction_mode == 'api':
+                page_fetches = self.page_fetches
+                article = self.scrape_article_from_api(url)
+                # Articles served from the collection payload cost the origin nothing
+                if self.page_fetches != page_fetches:
+                    time.sleep(settings.SCRAPER_REQUEST_DELAY)
+                if article:
+                    articles[url] = article
+                    continue
+            html_urls.append(url)
 
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
-            return None
+        for url, fields, error in parse_pool.imap(parse_article_page, self.fetch_pages(html_urls)):
+            if error:
+                self.record_article_failure(url, ValueError(error))
+            else:
+                articles[url] = self.article_from_fields(url, fields)
+
+        return [articles[url] for url in urls if url in articles]
+
+    def page_url(self, page_num):
+        return f"{self.api_url}?skip={page_num * self.stories_per_page}&limit={self.stories_per_page}"
+
+    def fetch_collection_items(self, page_num):
+        """Return the raw items of one collection API page; empty past the end of the collection"""
+        params = {'skip': page_num * self.stories_per_page, 'limit': self.stories_per_page}
+        response = requests.get(self.api_url, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json().get('items', [])
 
-    def get_article_urls(self, max_pages):
+    def story_urls(self, items):
+        """Article URLs of collection items, keeping each story for API extraction"""
         article_urls = []
-        stories_per_page = 12
+        for item in items:
+            story = item.get('story', {})
+            slug = story.get('slug')
+            if slug:
+                url = urljoin(self.base_url, slug)
+                self.stories[url] = story
+                article_urls.append(url)
+        return article_urls
 
-        for page_num in range(max_pages):
-            skip = page_num * stories_per_page
-            params = {'skip': skip, 'limit': stories_per_page}
+    def fetch_collection_page(self, page_num):
+        """Return the article URLs listed on one collection API page"""
+        return self.story_urls(self.fetch_collection_items(page_num))
 
-            try:
-                response = requests.get(self.api_url, params=params, timeout=10)
-                response.raise_for_status()
+    def get_article_urls(self, max_pages, first_page=0):
+        article_urls = []
 
-                stories = response.json().get('items', [])
-                if not stories:
+        for page_num in range(first_page, max_pages):
+            try:
+                items = self.fetch_collection_items(page_num)
+                if not items:
                     break
 
-                for story in stories:
-                    slug = story.get('story', {}).get('slug')
-                    if slug:
-                        url = urljoin(self.base_url, slug)
-                        article_urls.append(url)
-
-                time.sleep(1)
+                # A page whose items all lack a slug is skipped, not taken as the end
+                article_urls.extend(self.story_urls(items))
+                time.sleep(settings.SCRAPER_REQUEST_DELAY)
 
             except Exception as e:
+                # Keep walking the collection; the failed page goes to the retry queue
                 logger.error(f"Error fetching API page {page_num + 1}: {e}")
-                break
+                self.failures.append({
+                    'kind': 'PAGE', 'url': self.page_url(page_num), 'page_num': page_num, 'error': e
+                })
 
         logger.info(f"Collected {len(article_urls)} article URLs from API")
         return article_urls
 
-    def bulk_index_articles(self, articles):
-        if not articles:
-            return False
+    def get_sitemap_urls(self, date):
+        """Sorted article URLs of this category from one day's sitemap"""
+        locs, fetched = fetch_sitemap(date)
+        self.page_fetches += fetched
 
-        try:
-            es_client.create_index_if_not_exists()
+        section = self.SITEMAP_SECTIONS.get(self.category, self.category) + '/'
+        urls = {url for url in locs if urlparse(url).path.lstrip('/').startswith(section)}
 
-            actions = []
-            for article in articles:
-                doc_id = quote(article['url'], safe='')
-                action = {
-                    "_index": es_client.INDEX_NAME,
-                    "_id": doc_id,
-                    "_source": article
-                }
-                actions.append(action)
-
-            success, failed = helpers.bulk(
-                es_client.client,
-                actions,
-                chunk_size=100,
-                request_timeout=60,
-                raise_on_error=False
-            )
+        logger.info(f"Found {len(urls)} {self.category} article URLs in the {date} sitemap")
+        return sorted(urls)
 
-            logger.info(f"Indexed {success} articles to unified index")
-            return True
+    def bulk_index_articles(self, articles):
+        """Index articles; returns retry-queue failures for those not indexed, all of them if the bulk load failed"""
+        first = len(self.index_stats['rejected'])
+        if bulk_index_articles(articles, stats=self.index_stats) is None:
+            errors = {article.url: RuntimeError("Bulk indexing failed") for article in articles}
+        else:
+            errors = {
+                url: RuntimeError(f"Bulk item rejected: {error}")
+                for url, error in self.index_stats['rejected'][first:]
+            }
+        return [{'kind': 'ARTICLE', 'url': url, 'page_num': None, 'error': error} for url, error in errors.items()]
 
-        except Exception as e:
-            logger.error(f"Bulk indexing failed: {e}")
-            return False
+    def indexed_articles(self, documents):
+        """Articles an earlier run of a resumed crawl indexed, read back from their url -> (doc_id, routing).
+
+        A near-duplicate comes back with the text of the document it was merged into.
+        """
+        if not documents:
+            return []
+        sources = get_search_backend().get_documents(set(documents.values()))
+        articles = [
+            Article.from_dict({**sources[doc_id], 'url': url, 'category': self.category})
+            for url, (doc_id, _) in documents.items() if doc_id in sources
+        ]
+        if len(articles) < len(documents):
+            logger.warning(f"{len(documents) - len(articles)} articles of the earlier run are no longer indexed, "
+                           f"leaving them out of the archive")
+        return articles
 
-    def run_scraping_pipeline(self, max_pages, task_id):
+    def run_scraping_pipeline(self, max_pages, task_id, checkpoint=None):
         article_urls = []
         s3_url = None
         s3_key = None
         
         try:
-            article_urls = self.get_article_urls(max_pages)
+            frontier = checkpoint.load_frontier() if checkpoint else None
+            earlier, done = checkpoint.completed() if checkpoint else ({}, set())
+            scraped_articles = []
+            if frontier:
+                article_urls, pages = frontier['urls'], frontier['pages']
+                logger.info(f"Resuming crawl: {len(done)} of {len(article_urls)} URLs already done")
+            else:
+                article_urls, pages = self.get_article_urls(max_pages), max_pages
+                if article_urls and checkpoint:
+                    checkpoint.save_frontier(article_urls, pages)
             if not article_urls:
                 return {
                     'success': False,
@@ -296,36 +1303,78 @@ class CategoryScraper:
                     'scraped_articles': 0
                 }
 
-            scraped_articles = []
-            for url in article_urls:
-                article_data = self.scrape_article(url)
-                if article_data:
-                    scraped_articles.append(article_data)
-                time.sleep(1)
-
-            if scraped_articles:
-                # Index to Elasticsearch
-                es_success = self.bulk_index_articles(scraped_articles)
-                
+            # Scrape and index in batches, checkpointing after each indexed batch. A coalesced
+            # request may raise max_pages meanwhile; the extra pages join the frontier at the end.
+            batch_size = settings.SCRAPER_CHECKPOINT_BATCH_SIZE
+            es_success = True
+            unindexed = 0
+            while True:
+                remaining = [url for url in article_urls if url not in done]
+                for start in range(0, len(remaining), batch_size):
+                    batch_urls = remaining[start:start + batch_size]
+                    articles = self.scrape_articles(batch_urls)
+                    index_failures = self.bulk_index_articles(articles) if articles else []
+                    if index_failures:
+                        # Articles the index did not take go to the retry queue and stay unfinished
+                        self.failures.extend(index_failures)
+                        unindexed += len(index_failures)
+                        if len(index_failures) == len(articles):
+                            es_success = False
+                    failed_urls = {failure['url'] for failure in index_failures}
+                    indexed = [article for article in articles if article.url not in failed_urls]
+                    finished = [url for url in batch_urls if url not in failed_urls]
+                    done.update(finished)
+                    scraped_articles.extend(indexed)
+                    if checkpoint:
+                        documents = self.index_stats['documents']
+                        checkpoint.save_batch(finished, {
+                            article.url: documents[article.url] for article in indexed if article.url in documents
+                        })
+
+                # Checking and sealing max_pages in one UPDATE means an extension either lands
+                # before it and is crawled, or finds the task sealed and starts a new one
+                if ScrapingTask.objects.filter(task_id=task_id, max_pages__lte=pages).update(
+                    extendable=False, updated_at=timezone.now()
+                ):
+                    break
+                requested = ScrapingTask.objects.filter(task_id=task_id).values_list('max_pages', flat=True).first()
+                if not requested:
+                    break
+                logger.info(f"Crawl extended from {pages} to {requested} pages")
+                known = set(article_urls)
+                article_urls = article_urls + [
+                    url for url in self.get_article_urls(requested, first_page=pages) if url not in known
+                ]
+                pages = requested
+                if checkpoint:
+                    checkpoint.save_frontier(article_urls, pages)
+
+            scraped_count = len(earlier) + len(scraped_articles)
+            if scraped_count:
                 # Save to S3 if ES indexing was successful
                 if es_success:
                     try:
                         s3_handler = S3Handler()
                         s3_url, s3_key = s3_handler.save_articles_to_s3(
-                            scraped_articles, task_id, self.category
+                            self.indexed_articles(earlier) + scraped_articles, task_id, self.category
                         )
                         logger.info(f"Articles saved to S3: {s3_url}")
                     except Exception as s3_error:
                         logger.error(f"S3 upload failed but ES indexing succeeded: {s3_error}")
                         # Continue with success since ES indexing worked
 
-            return {
-                'success': True,
+            result = {
+                'success': es_success,
                 'total_articles': len(article_urls),
-                'scraped_articles': len(scraped_articles),
+                'scraped_articles': scraped_count,
                 's3_url': s3_url,
                 's3_key': s3_key
             }
+            if unindexed:
+                # Keeps the checkpoint; the articles themselves are in the retry queue
+                result['partial'] = True
+                result['error_message'] = f"{unindexed} articles could not be indexed and were queued for retry"
+            return result
 
         except Exception as e:
             return {
@@ -1,3 +1,1670 @@
-from django.test import TestCase
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from elasticsearch import AsyncElasticsearch
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from devtools.es_stub import ElasticsearchStub, WORDS, seed_articles
+from devtools.redis_stub import FakeRedis
+from .article_store import SCHEMA, ArticleStore
+from .capture import STORY_CONTENT_TYPE, CaptureStore
+from .es_client import (ElasticsearchClient, WRITER_KEY_PREFIX, WRITES_PAUSED_KEY, category_routing, es_client,
+                        live_index_write, record_routing_alias)
+from .dedup import LSHIndex, MinHasher, NearDuplicateDetector, article_doc_id, dedup_detector
+from .models import BackfillPartition, CrawlSchedule, DailyRollup, ScrapingTask, FailedFetch
+from .parsing import ParsePool, parse_article_page
+from .records import Article
+from .related import related_articles
+from .search_backends import SearchBackend, get_search_backend
+from .rollups import (REBUILD_KEY, apply_facts, article_facts, finish_rebuild, histogram_percentile, start_rebuild,
+                      summarize)
+from . import serialization
+from .renderers import ORJSONRenderer
+from .management.commands.loadtest import percentile
+from .tasks import (CategoryScraper, CrawlCheckpoint, backfill_partition_task, bulk_index_articles,
+                    compute_related_articles, learn_crawl_plan, record_failed_fetches, requeue_stale_tasks, retry_delay,
+                    retry_failed_fetches, schedule_crawls, scrape_category_task, start_category_scrape, suggest_inputs,
+                    update_daily_rollups)
 
-# Create your tests here.
+
+def make_task(category='politics', **fields):
+    return ScrapingTask.objects.create(task_id=f'task-{ScrapingTask.objects.count()}', category=category, **fields)
+
+
+def make_article(n=0, category='politics', content=None, **fields):
+    words = [WORDS[(n * 7 + i * 3) % len(WORDS)] + str(i % 13) for i in range(120)]
+    return Article(**{
+        'url': f'https://www.prothomalo.com/{category}/story-{n}',
+        'headline': f'শিরোনাম {n}',
+        'author': 'নিজস্ব প্রতিবেদক',
+        'location': 'ঢাকা',
+        'published_at': '2025-06-05 10:30',
+        'content': ' '.join(words) if content is None else content,
+        'scraped_at': '2025-06-05T11:00:00',
+        'word_count': 120,
+        'category': category,
+        **fields,
+    })
+
+
+def rewrite(article, url, category, changed_words=3):
+    """A near-duplicate of article: same story, a few words changed, under another URL"""
+    words = article.content.split()
+    for i in range(changed_words):
+        words[i * 30] = 'পরিবর্তিত'
+    return Article(**{**article.to_dict(), 'url': url, 'category': category, 'content': ' '.join(words)})
+
+
+class FakeRedisMixin:
+    """Points every module's redis_client at one in-memory FakeRedis"""
+
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        for module in ('scraper.dedup', 'scraper.es_client', 'scraper.tasks', 'scraper.related', 'scraper.rollups'):
+            patcher = mock.patch(f'{module}.redis_client', self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class FakeBulkIndex:
+    """Applies bulk update actions the way MERGE_ARTICLE_SCRIPT does.
+
+    Documents are keyed by (routing, _id) like shard copies, so a document
+    routed two ways really exists twice.
+    """
+
+    def __init__(self, fail_ids=()):
+        self.docs = {}
+        self.indices = set()
+        self.fail_ids = set(fail_ids)
+
+    def streaming_bulk(self, client, actions, **kwargs):
+        for action in actions:
+            doc_id, key = action['_id'], (action['_routing'], action['_id'])
+            self.indices.add(action['_index'])
+            if doc_id in self.fail_ids:
+                yield False, {'update': {'_id': doc_id, 'status': 429, 'error': 'rejected'}}
+                continue
+            params = action['script']['params']
+            doc = self.docs.get(key)
+            if doc is None:
+                if 'upsert' not in action:
+                    yield False, {'update': {'_id': doc_id, 'status': 404, 'error': 'document_missing_exception'}}
+                    continue
+                self.docs[key] = dict(action['upsert'], category=list(action['upsert']['category']))
+                yield True, {'update': {'_id': doc_id, 'result': 'created'}}
+                continue
+            if params['replace']:
+                doc.update({name: value for name, value in params['doc'].items() if name != 'category'})
+            elif params['url'] not in doc.setdefault('duplicate_urls', []):
+                doc['duplicate_urls'].append(params['url'])
+            if params['category'] not in doc['category']:
+                doc['category'].append(params['category'])
+            yield True, {'update': {'_id': doc_id, 'result': 'updated'}}
+
+    def mget(self, index=None, docs=(), **kwargs):
+        return {'docs': [
+            {'_id': doc['_id'], 'found': True, '_routing': doc['routing'],
+             '_source': self.docs[(doc['routing'], doc['_id'])]}
+            if (doc['routing'], doc['_id']) in self.docs else {'_id': doc['_id'], 'found': False}
+            for doc in docs
+        ]}
+
+    @contextmanager
+    def patched(self):
+        with mock.patch('scraper.tasks.helpers.streaming_bulk', self.streaming_bulk), \
+                mock.patch('scraper.tasks.es_client.client') as client, \
+                mock.patch('scraper.tasks.es_client.create_index_if_not_exists'), \
+                mock.patch('scraper.tasks.queue_after_bulk'):
+            client.mget.side_effect = self.mget
+            yield client
+
+    def load(self, articles, **kwargs):
+        with self.patched():
+            return bulk_index_articles(articles, **kwargs)
+
+
+def collection_response(items):
+    response = mock.Mock()
+    response.json.return_value = {'items': items}
+    return response
+
+
+@override_settings(SCRAPER_REQUEST_DELAY=0)
+class RetryQueueTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch('scraper.tasks.time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def failure(self, url='https://www.prothomalo.com/a', kind='ARTICLE'):
+        return {'kind': kind, 'url': url, 'page_num': None, 'error': ConnectionError('reset')}
+
+    def test_failure_is_queued_once_while_pending(self):
+        task = make_task()
+        record_failed_fetches([self.failure()], 'politics', [task])
+        record_failed_fetches([self.failure()], 'politics', [task])
+
+        fetch = FailedFetch.objects.get()
+        self.assertEqual((fetch.kind, fetch.status, fetch.attempts), ('ARTICLE', 'PENDING', 0))
+        self.assertEqual((fetch.error_class, fetch.error_message), ('ConnectionError', 'reset'))
+        self.assertGreater(fetch.next_retry_at, timezone.now())
+
+    def test_recovered_article_is_indexed_and_credited(self):
+        task = make_task()
+        record_failed_fetches([self.failure()], 'politics', [task])
+        FailedFetch.objects.update(next_retry_at=timezone.now() - timedelta(seconds=1))
+
+        article = make_article(url='https://www.prothomalo.com/a')
+        with mock.patch.object(CategoryScraper, 'scrape_article', return_value=article), \
+                mock.patch.object(CategoryScraper, 'bulk_index_articles', return_value=[]) as bulk:
+            result = retry_failed_fetches()
+
+        bulk.assert_called_once_with([article])
+        self.assertEqual(result, {'processed': 1, 'recovered': 1, 'failed': 0})
+        self.assertEqual(FailedFetch.objects.get().status, 'RECOVERED')
+        task.refresh_from_db()
+        self.assertEqual(task.recovered_articles, 1)
+
+    @override_settings(SCRAPER_RETRY_MAX_ATTEMPTS=2)
+    def test_fetch_that_keeps_failing_is_exhausted(self):
+        record_failed_fetches([self.failure()], 'politics', [make_task()])
+        with mock.patch('scraper.tasks.requests.get', side_effect=ConnectionError('reset')):
+            for attempt in (1, 2):
+                FailedFetch.objects.update(next_retry_at=timezone.now() - timedelta(seconds=1))
+                self.assertEqual(retry_failed_fetches()['failed'], 1)
+
+        fetch = FailedFetch.objects.get()
+        self.assertEqual((fetch.status, fetch.attempts), ('EXHAUSTED', 2))
+        self.assertEqual(retry_failed_fetches()['processed'], 0)
+
+    def test_url_pending_under_another_task_is_linked_to_both(self):
+        first, second = make_task(), make_task()
+        record_failed_fetches([self.failure()], 'politics', [first])
+        record_failed_fetches([self.failure()], 'politics', [second])
+
+        fetch = FailedFetch.objects.get()
+        self.assertEqual(set(fetch.tasks.all()), {first, second})
+        self.assertEqual(first.failed_fetches.count(), 1)
+        self.assertEqual(second.failed_fetches.count(), 1)
+
+    def test_recovery_is_credited_to_every_linked_task(self):
+        first, second = make_task(), make_task()
+        record_failed_fetches([self.failure()], 'politics', [first, second])
+        FailedFetch.objects.update(next_retry_at=FailedFetch.objects.get().next_retry_at - timedelta(days=1))
+
+        article = make_article(url='https://www.prothomalo.com/a')
+        with mock.patch.object(CategoryScraper, 'scrape_article', return_value=article), \
+                mock.patch.object(CategoryScraper, 'bulk_index_articles', return_value=[]):
+            result = retry_failed_fetches()
+
+        self.assertEqual(result['recovered'], 1)
+        self.assertEqual(FailedFetch.objects.get().status, 'RECOVERED')
+        self.assertEqual(
+            list(ScrapingTask.objects.order_by('pk').values_list('recovered_articles', flat=True)), [1, 1]
+        )
+
+    def test_article_the_index_rejects_stays_queued(self):
+        record_failed_fetches([self.failure()], 'politics', [make_task()])
+        FailedFetch.objects.update(next_retry_at=FailedFetch.objects.get().next_retry_at - timedelta(days=1))
+
+        article = make_article(url='https://www.prothomalo.com/a')
+        with mock.patch.object(CategoryScraper, 'scrape_article', return_value=article), \
+                FakeBulkIndex(fail_ids={article_doc_id(article.url)}).patched():
+            result = retry_failed_fetches()
+
+        self.assertEqual((result['recovered'], result['failed']), (0, 1))
+        fetch = FailedFetch.objects.get()
+        self.assertEqual((fetch.status, fetch.attempts), ('PENDING', 1))
+        self.assertIn('rejected', fetch.error_message)
+        self.assertEqual(ScrapingTask.objects.get().recovered_articles, 0)
+
+    @override_settings(SCRAPER_RETRY_BASE_DELAY=60, SCRAPER_RETRY_MAX_DELAY=600)
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual([retry_delay(n).total_seconds() for n in range(1, 6)], [60, 120, 240, 480, 600])
+
+
+@override_settings(SCRAPER_REQUEST_DELAY=0)
+class CheckpointTests(FakeRedisMixin, TestCase):
+    urls = [f'https://www.prothomalo.com/politics/{n}' for n in range(3)]
+
+    def crawl_task(self, task):
+        scraped = lambda urls: [Article(**{**make_article().to_dict(), 'url': url}) for url in urls]
+        with mock.patch.object(CategoryScraper, 'get_article_urls', return_value=self.urls), \
+                mock.patch.object(CategoryScraper, 'scrape_articles', side_effect=scraped) as scrape, \
+                mock.patch.object(CategoryScraper, 'bulk_index_articles', return_value=[]), \
+                mock.patch('scraper.tasks.S3Handler'):
+            result = scrape_category_task(task.task_id, task.category, 2)
+        task.refresh_from_db()
+        return result, [call.args[0] for call in scrape.call_args_list]
+
+    def test_interrupted_crawl_resumes_without_refetching(self):
+        task = make_task(status='RUNNING')
+        checkpoint = CrawlCheckpoint(task, CategoryScraper('politics'))
+        checkpoint.save_frontier(self.urls, 2)
+        checkpoint.save_batch(self.urls[:1], {self.urls[0]: (article_doc_id(self.urls[0]), 'politics')})
+
+        with mock.patch.object(CategoryScraper, 'indexed_articles', return_value=[]) as indexed:
+            result, batches = self.crawl_task(task)
+        self.assertEqual(batches, [self.urls[1:]])
+        indexed.assert_called_once_with({self.urls[0]: (article_doc_id(self.urls[0]), 'politics')})
+        self.assertEqual(task.status, 'SUCCESS')
+        self.assertEqual(CrawlCheckpoint(task, None).completed(), ({}, set()))
+
+    def test_result_write_keeps_concurrent_updates(self):
+        task = make_task(status='PENDING', new_articles=3)
+
+        def recovered(urls):
+            # The retry queue and the coalescer write the row while the crawl runs
+            ScrapingTask.objects.filter(pk=task.pk).update(recovered_articles=F('recovered_articles') + 2, max_pages=5)
+            return []
+
+        with mock.patch.object(CategoryScraper, 'get_article_urls', return_value=self.urls), \
+                mock.patch.object(CategoryScraper, 'scrape_articles', side_effect=recovered), \
+                mock.patch('scraper.tasks.S3Handler'):
+            scrape_category_task(task.task_id, task.category, 2)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.recovered_articles, task.new_articles), ('SUCCESS', 2, 3))
+        self.assertEqual(task.max_pages, 5)
+
+    def test_second_delivery_is_skipped_while_locked(self):
+        task = make_task(status='RUNNING')
+        self.assertTrue(CrawlCheckpoint(task, None).acquire())
+        result, batches = self.crawl_task(task)
+        self.assertEqual((result['skipped'], batches, task.status), (True, [], 'RUNNING'))
+
+    def test_finished_task_is_not_crawled_again(self):
+        task = make_task(status='SUCCESS')
+        result, batches = self.crawl_task(task)
+        self.assertEqual((result['skipped'], batches), (True, []))
+
+    @override_settings(SCRAPER_MAX_RESUMES=1)
+    def test_stale_running_task_is_requeued_then_abandoned(self):
+        stale = timezone.now() - timedelta(hours=1)
+        task = make_task(status='RUNNING', heartbeat_at=stale)
+        with mock.patch('scraper.tasks.scrape_category_task.delay') as delay:
+            self.assertEqual(requeue_stale_tasks(), {'requeued': 1, 'abandoned': 0})
+            ScrapingTask.objects.filter(pk=task.pk).update(heartbeat_at=stale)
+            self.assertEqual(requeue_stale_tasks(), {'requeued': 0, 'abandoned': 1})
+        delay.assert_called_once_with(task.task_id, 'politics', task.max_pages)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.resume_count), ('FAILURE', 1))
+
+    def test_recovered_fetches_do_not_count_as_failed(self):
+        task = make_task(status='PENDING')
+        record_failed_fetches([
+            {'kind': 'ARTICLE', 'url': f'https://www.prothomalo.com/politics/{n}', 'page_num': None,
+             'error': ConnectionError('reset')} for n in range(3)
+        ], 'politics', [task])
+        FailedFetch.objects.filter(url__endswith='/0').update(status='RECOVERED')
+        FailedFetch.objects.filter(url__endswith='/1').update(status='EXHAUSTED')
+
+        result = {'success': True, 'total_articles': 3, 'scraped_articles': 0}
+        with mock.patch.object(CategoryScraper, 'run_scraping_pipeline', return_value=result):
+            scrape_category_task(task.task_id, 'politics', 2)
+        task.refresh_from_db()
+        self.assertEqual(task.failed_articles, 2)
+
+    def test_checkpoint_keeps_references_and_the_archive_reads_them_back(self):
+        article = make_article()
+        index = FakeBulkIndex()
+        scraper = CategoryScraper('politics')
+        with index.patched():
+            bulk_index_articles([article], stats=scraper.index_stats)
+        checkpoint = CrawlCheckpoint(make_task(), scraper)
+        checkpoint.save_batch([article.url], scraper.index_stats['documents'])
+
+        self.assertNotIn(article.content.encode(), b''.join(self.redis.data[checkpoint.key('documents')].values()))
+        documents, done = checkpoint.completed()
+        self.assertEqual(documents, {article.url: (article_doc_id(article.url), 'politics')})
+        self.assertEqual(done, {article.url})
+
+        with index.patched():
+            self.assertEqual(CategoryScraper('politics').indexed_articles(documents), [article])
+
+    def crawl(self, index, articles):
+        """Crawl one batch of articles through the bulk index; returns the finished task and its checkpoint"""
+        task = make_task(status='PENDING')
+        by_url = {article.url: article for article in articles}
+        with index.patched(), \
+                mock.patch.object(CategoryScraper, 'get_article_urls', return_value=list(by_url)), \
+                mock.patch.object(CategoryScraper, 'scrape_articles',
+                                  side_effect=lambda urls: [by_url[url] for url in urls]), \
+                mock.patch('scraper.tasks.S3Handler'):
+            scrape_category_task(task.task_id, 'politics', 2)
+        task.refresh_from_db()
+        return task, CrawlCheckpoint(task, CategoryScraper('politics'))
+
+    def test_rejected_articles_are_queued_and_stay_unfinished(self):
+        accepted, rejected = make_article(0), make_article(1)
+        task, checkpoint = self.crawl(FakeBulkIndex(fail_ids={article_doc_id(rejected.url)}), [accepted, rejected])
+
+        self.assertEqual((task.status, task.scraped_articles, task.failed_articles), ('SUCCESS', 1, 1))
+        fetch = FailedFetch.objects.get()
+        self.assertEqual((fetch.kind, fetch.url), ('ARTICLE', rejected.url))
+        # The checkpoint is kept, and only lists the indexed URL as finished
+        self.assertEqual(checkpoint.completed()[1], {accepted.url})
+
+    @override_settings(SCRAPER_CHECKPOINT_BATCH_SIZE=1)
+    def test_documents_created_by_a_crashed_delivery_are_counted(self):
+        articles = [make_article(0), make_article(1)]
+        by_url = {article.url: article for article in articles}
+        task = make_task(status='PENDING')
+
+        def crash_on_second_batch(urls):
+            if urls == [articles[1].url]:
+                raise SystemExit('worker lost')
+            return [by_url[url] for url in urls]
+
+        index = FakeBulkIndex()
+        with index.patched(), mock.patch('scraper.tasks.S3Handler'), \
+                mock.patch.object(CategoryScraper, 'get_article_urls', return_value=list(by_url)):
+            with mock.patch.object(CategoryScraper, 'scrape_articles', side_effect=crash_on_second_batch), \
+                    self.assertRaises(SystemExit):
+                scrape_category_task(task.task_id, 'politics', 2)
+            with mock.patch.object(CategoryScraper, 'scrape_articles',
+                                   side_effect=lambda urls: [by_url[url] for url in urls]):
+                scrape_category_task(task.task_id, 'politics', 2)
+
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.new_articles), ('SUCCESS', 2))
+
+    def test_failed_bulk_load_fails_the_task_and_queues_the_batch(self):
+        articles = [make_article(0), make_article(1)]
+        with mock.patch('scraper.tasks.bulk_index_articles', return_value=None):
+            task, checkpoint = self.crawl(FakeBulkIndex(), articles)
+
+        self.assertEqual((task.status, task.scraped_articles), ('FAILURE', 0))
+        self.assertEqual(set(FailedFetch.objects.values_list('url', flat=True)), {a.url for a in articles})
+        self.assertEqual(checkpoint.completed()[1], set())
+        self.assertTrue(self.redis.exists(checkpoint.key('frontier')))
+
+
+@mock.patch('scraper.tasks.scrape_category_task.delay')
+class CoalescerTests(FakeRedisMixin, TestCase):
+    def test_running_crawl_is_extended(self, delay):
+        task = make_task(status='RUNNING', max_pages=2)
+        self.assertEqual(start_category_scrape('politics', 2), (task, 'attached'))
+        self.assertEqual(start_category_scrape('politics', 4), (task, 'extended'))
+        task.refresh_from_db()
+        self.assertEqual(task.max_pages, 4)
+        delay.assert_not_called()
+
+    def test_extension_during_the_crawl_is_crawled(self, delay):
+        task = make_task(status='RUNNING', max_pages=2)
+        scraper = CategoryScraper('politics')
+
+        def scrape(urls):
+            if urls == ['https://x/1']:
+                self.assertEqual(start_category_scrape('politics', 4)[1], 'extended')
+            return []
+
+        with mock.patch.object(scraper, 'get_article_urls', side_effect=[['https://x/1'], ['https://x/2']]) as walk, \
+                mock.patch.object(scraper, 'scrape_articles', side_effect=scrape) as scraped:
+            scraper.run_scraping_pipeline(2, task.task_id)
+        walk.assert_called_with(4, first_page=2)
+        self.assertEqual([call.args[0] for call in scraped.call_args_list], [['https://x/1'], ['https://x/2']])
+
+    @override_settings(SCRAPER_COALESCE_WINDOW=600)
+    def test_recent_crawl_is_409_with_retry_after(self, delay):
+        make_task(status='SUCCESS', max_pages=2)
+        response = self.client.post('/api/start/', {'category': 'politics', 'max_pages': 2},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertLessEqual(int(response['Retry-After']), 600)
+
+        response = self.client.post('/api/start/', {'category': 'politics', 'max_pages': 3},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        delay.assert_called_once_with(response.json()['task_id'], 'politics', 3)
+
+    def test_extension_during_the_crawl_is_crawled_and_later_ones_start_a_new_task(self, delay):
+        task = make_task(status='RUNNING', max_pages=2)
+        scraper = CategoryScraper('politics')
+
+        def scrape(urls):
+            if urls == ['https://x/1']:
+                self.assertEqual(start_category_scrape('politics', 4)[1], 'extended')
+            return []
+
+        with mock.patch.object(scraper, 'get_article_urls', side_effect=[['https://x/1'], ['https://x/2']]) as walk, \
+                mock.patch.object(scraper, 'scrape_articles', side_effect=scrape):
+            scraper.run_scraping_pipeline(2, task.task_id)
+        walk.assert_called_with(4, first_page=2)
+
+        # The crawl sealed max_pages at its last check, so a deeper request cannot be lost on it
+        new_task, outcome = start_category_scrape('politics', 6)
+        self.assertEqual(outcome, 'created')
+        self.assertNotEqual(new_task, task)
+        task.refresh_from_db()
+        self.assertEqual((task.max_pages, task.extendable), (4, False))
+
+    def test_lock_timeout_is_503(self, delay):
+        self.redis.set('scrape:start:politics', 'held')
+        response = self.client.post('/api/start/', {'category': 'politics', 'max_pages': 2},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertFalse(ScrapingTask.objects.exists())
+
+    def test_failed_enqueue_leaves_no_task_to_attach_to(self, delay):
+        delay.side_effect = ConnectionError('broker down')
+        with self.assertRaises(ConnectionError):
+            start_category_scrape('politics', 2)
+        self.assertEqual(ScrapingTask.objects.get().status, 'FAILURE')
+
+        delay.side_effect = None
+        self.assertEqual(start_category_scrape('politics', 2)[1], 'created')
+
+    @override_settings(SCRAPER_MAX_RESUMES=1)
+    def test_pending_task_never_started_is_requeued_then_abandoned(self, delay):
+        task, _ = start_category_scrape('politics', 2)
+        age = timedelta(seconds=settings.SCRAPER_HEARTBEAT_TIMEOUT + 1)
+        ScrapingTask.objects.update(updated_at=timezone.now() - age)
+        self.assertEqual(requeue_stale_tasks(), {'requeued': 1, 'abandoned': 0})
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(requeue_stale_tasks(), {'requeued': 0, 'abandoned': 0})
+
+        ScrapingTask.objects.update(heartbeat_at=timezone.now() - age)
+        self.assertEqual(requeue_stale_tasks(), {'requeued': 0, 'abandoned': 1})
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'FAILURE')
+        self.assertEqual(start_category_scrape('politics', 2)[1], 'created')
+
+
+@override_settings(SCRAPER_SCHEDULE_TARGET_NEW=12, SCRAPER_SCHEDULE_MIN_INTERVAL=60)
+class SchedulerTests(FakeRedisMixin, TestCase):
+    def crawls(self, *new_articles, max_pages=2):
+        start = timezone.now() - timedelta(hours=len(new_articles))
+        for hour, new in enumerate(new_articles):
+            make_task(status='SUCCESS', created_at=start + timedelta(hours=hour), new_articles=new, max_pages=max_pages)
+
+    def test_rate_from_new_articles_between_crawls(self):
+        self.crawls(0, 6, 6, 6)
+        self.assertEqual(learn_crawl_plan('politics'), (6, 2 * 3600, 2))
+
+    @override_settings(SCRAPER_SCHEDULE_DEFAULT_INTERVAL=1800)
+    def test_category_without_history_gets_the_defaults(self):
+        self.crawls(6)
+        self.assertEqual(learn_crawl_plan('politics'), (None, 1800, 2))
+
+    @override_settings(SCRAPER_SCHEDULER_ENABLED=False)
+    def test_disabled_scheduler_starts_nothing(self):
+        with mock.patch('scraper.tasks.start_category_scrape') as start:
+            self.assertEqual(schedule_crawls(), {'started': []})
+        start.assert_not_called()
+
+    @override_settings(SCRAPER_SCHEDULER_ENABLED=True, SCRAPER_SCHEDULE_STARTS_PER_TICK=5,
+                       SCRAPER_MAX_CONCURRENT_CRAWLS=2, SCRAPER_SCHEDULE_STAGGER=0)
+    @mock.patch('scraper.tasks.scrape_category_task.delay')
+    def test_starts_stay_under_the_concurrency_ceiling(self, delay):
+        make_task('world-all', status='RUNNING')
+        result = schedule_crawls()
+        self.assertEqual((len(result['started']), result['active']), (1, 1))
+        self.assertEqual(CrawlSchedule.objects.count(), len(ScrapingTask.CATEGORY_CHOICES))
+        self.assertEqual(schedule_crawls()['started'], [])
+
+    def test_created_documents_are_counted(self):
+        article, known = make_article(), make_article(1)
+        scraper = CategoryScraper('politics')
+        with mock.patch('scraper.tasks.helpers.streaming_bulk', return_value=iter([
+            (True, {'update': {'_id': article_doc_id(article.url), 'result': 'created'}}),
+            (True, {'update': {'_id': article_doc_id(known.url), 'result': 'updated'}}),
+        ])), mock.patch('scraper.tasks.es_client'), mock.patch('scraper.tasks.queue_after_bulk'):
+            self.assertEqual(scraper.bulk_index_articles([article, known]), [])
+        self.assertEqual((scraper.index_stats['indexed'], scraper.index_stats['created']), (2, 1))
+
+    def test_crawl_capped_by_max_pages_is_a_lower_bound(self):
+        # 24 new articles is every story on 2 pages, so more may have been published
+        self.crawls(0, 6, 6, 24)
+        rate, interval, max_pages = learn_crawl_plan('politics')
+        self.assertEqual(rate, 24)
+        self.assertEqual(interval, 30 * 60)
+
+    def test_disabled_by_default(self):
+        with mock.patch('scraper.tasks.start_category_scrape') as start:
+            self.assertEqual(schedule_crawls(), {'started': []})
+        start.assert_not_called()
+
+    @override_settings(SCRAPER_SCHEDULER_ENABLED=True, SCRAPER_SCHEDULE_STARTS_PER_TICK=2, SCRAPER_SCHEDULE_STAGGER=120)
+    @mock.patch('scraper.tasks.scrape_category_task.delay')
+    def test_rescheduled_crawls_stay_staggered(self, delay):
+        now = timezone.now()
+        for category, _ in ScrapingTask.CATEGORY_CHOICES:
+            CrawlSchedule.objects.create(
+                category=category, interval_seconds=3600, max_pages=2, next_run_at=now + timedelta(days=1),
+                enabled=category in ('politics', 'world-all')
+            )
+        CrawlSchedule.objects.filter(enabled=True).update(next_run_at=now - timedelta(minutes=1))
+
+        self.assertEqual(len(schedule_crawls()['started']), 2)
+        first, second = CrawlSchedule.objects.filter(enabled=True).order_by('next_run_at')
+        self.assertGreaterEqual((second.next_run_at - first.next_run_at).total_seconds(), 120)
+
+
+@override_settings(SCRAPER_REQUEST_DELAY=0)
+class CollectionWalkTests(TestCase):
+    def test_page_without_slugs_does_not_end_the_crawl(self):
+        pages = [
+            [{'story': {'slug': 'politics/one'}}],
+            [{'story': {'headline': 'no slug'}}],
+            [{'story': {'slug': 'politics/two'}}],
+            [],
+        ]
+        with mock.patch('scraper.tasks.requests.get',
+                        side_effect=[collection_response(items) for items in pages]) as get:
+            urls = CategoryScraper('politics').get_article_urls(10)
+
+        self.assertEqual(urls, ['https://www.prothomalo.com/politics/one', 'https://www.prothomalo.com/politics/two'])
+        # Stopped at the first empty API response
+        self.assertEqual(get.call_count, 4)
+
+    def test_failed_page_is_recorded_and_the_walk_continues(self):
+        with mock.patch('scraper.tasks.requests.get', side_effect=[
+            ConnectionError('reset'), collection_response([{'story': {'slug': 'politics/one'}}]),
+        ]):
+            scraper = CategoryScraper('politics')
+            urls = scraper.get_article_urls(2)
+
+        self.assertEqual(urls, ['https://www.prothomalo.com/politics/one'])
+        self.assertEqual([(f['kind'], f['page_num']) for f in scraper.failures], [('PAGE', 0)])
+
+
+class StoryExtractionTests(SimpleTestCase):
+    URL = 'https://www.prothomalo.com/politics/story'
+    STORY = {
+        'slug': 'politics/story', 'headline': 'গল্পের শিরোনাম', 'first-published-at': 1749097800000,
+        'authors': [{'name': 'নিজস্ব প্রতিবেদক'}],
+        'cards': [{'story-elements': [
+            {'type': 'text', 'text': '<p>প্রথম অনুচ্ছেদ</p><p>দ্বিতীয় &amp; শেষ</p>'},
+            {'type': 'text', 'subtype': 'also-read', 'text': '<p>আরও পড়ুন</p>'},
+        ]}],
+    }
+    PAGE = ('<h1 class="IiRps">শিরোনাম</h1><span class="contributor-name _8TSJC">প্রতিবেদক</span>'
+            '<div class="time-social-share-wrapper"><span>প্রকাশ: ৫ জুন ২০২৫, ১০:৩০</span></div>'
+            '<div class="story-content"><p>প্রথম</p><p>দ্বিতীয়</p></div>').encode()
+
+    def test_article_comes_from_the_collection_payload(self):
+        scraper = CategoryScraper('politics')
+        scraper.stories[self.URL] = self.STORY
+        with mock.patch('scraper.tasks.requests.get') as get:
+            article = scraper.scrape_article(self.URL)
+
+        get.assert_not_called()
+        self.assertEqual(scraper.page_fetches, 0)
+        self.assertEqual(article.headline, 'গল্পের শিরোনাম')
+        self.assertEqual(article.content, 'প্রথম অনুচ্ছেদ\nদ্বিতীয় & শেষ')
+        self.assertEqual(article.author, 'নিজস্ব প্রতিবেদক')
+        # Epoch milliseconds in the source's timezone
+        self.assertEqual(article.published_at, '2025-06-05 10:30')
+
+    def test_item_without_a_body_is_looked_up_in_the_story_api(self):
+        scraper = CategoryScraper('politics')
+        scraper.stories[self.URL] = {'slug': 'politics/story', 'headline': 'গল্পের শিরোনাম'}
+        response = mock.Mock()
+        response.json.return_value = {'story': self.STORY}
+        with mock.patch('scraper.tasks.requests.get', return_value=response) as get:
+            article = scraper.scrape_article(self.URL)
+
+        self.assertEqual(get.call_args.kwargs['params'], {'slug': 'politics/story'})
+        self.assertEqual(article.content, 'প্রথম অনুচ্ছেদ\nদ্বিতীয় & শেষ')
+
+    def test_html_page_is_the_last_resort(self):
+        scraper = CategoryScraper('politics')
+        page = mock.Mock(content=self.PAGE)
+        with mock.patch('scraper.tasks.requests.get', side_effect=[ConnectionError('reset'), page]):
+            article = scraper.scrape_article(self.URL)
+
+        self.assertEqual(scraper.page_fetches, 2)
+        self.assertEqual(article.headline, 'শিরোনাম')
+        self.assertEqual(article.content, 'প্রথম\nদ্বিতীয়')
+
+
+def sitemap_response(urls):
+    response = mock.Mock()
+    response.content = (
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + ''.join(f'<url><loc>{url}</loc></url>' for url in urls)
+        + '</urlset>'
+    ).encode()
+    return response
+
+
+@override_settings(SCRAPER_BACKFILL_BATCH_SIZE=1)
+class BackfillTests(FakeRedisMixin, TestCase):
+    day = timezone.now().date() - timedelta(days=30)
+    urls = ['https://www.prothomalo.com/politics/a', 'https://www.prothomalo.com/politics/b',
+            'https://www.prothomalo.com/world/c']
+
+    def run_partition(self, partition, urls=None):
+        with mock.patch('scraper.tasks.requests.get', return_value=sitemap_response(urls or self.urls)) as get, \
+                mock.patch.object(CategoryScraper, 'scrape_articles', return_value=[]) as scrape:
+            result = backfill_partition_task(partition.pk)
+        partition.refresh_from_db()
+        return result, get, [call.args[0] for call in scrape.call_args_list]
+
+    def test_sitemap_urls_are_kept_per_section(self):
+        with mock.patch('scraper.tasks.requests.get', return_value=sitemap_response(reversed(self.urls))):
+            self.assertEqual(CategoryScraper('politics').get_sitemap_urls(self.day), self.urls[:2])
+            self.assertEqual(CategoryScraper('world-all').get_sitemap_urls(self.day), self.urls[2:])
+
+    def test_failed_partition_resumes_at_its_cursor(self):
+        partition = BackfillPartition.objects.create(category='politics', date=self.day, status='FAILED', cursor=1)
+        result, _, batches = self.run_partition(partition)
+        self.assertEqual(batches, [[self.urls[1]]])
+        self.assertEqual((result['status'], partition.cursor, partition.urls_found), ('DONE', 2, 2))
+
+    def test_rerun_queues_only_partitions_that_are_not_done(self):
+        options = {'start': self.day, 'end': self.day + timedelta(days=1), 'categories': ['politics'],
+                   'stdout': StringIO()}
+        with mock.patch('scraper.management.commands.backfill.backfill_partition_task.delay') as delay:
+            call_command('backfill', **options)
+            BackfillPartition.objects.filter(date=self.day).update(status='DONE')
+            call_command('backfill', **options)
+        self.assertEqual(BackfillPartition.objects.count(), 2)
+        self.assertEqual(delay.call_count, 3)
+
+    def test_categories_of_a_day_share_one_sitemap_download(self):
+        politics = BackfillPartition.objects.create(category='politics', date=self.day)
+        world = BackfillPartition.objects.create(category='world-all', date=self.day)
+        _, first_get, _ = self.run_partition(politics)
+        _, second_get, _ = self.run_partition(world)
+
+        self.assertEqual(first_get.call_count + second_get.call_count, 1)
+        self.assertEqual(politics.urls, self.urls[:2])
+        self.assertEqual(world.urls, self.urls[2:])
+
+    def test_resume_walks_the_urls_of_the_first_run(self):
+        partition = BackfillPartition.objects.create(
+            category='politics', date=self.day, status='FAILED', urls=self.urls[:2], cursor=1
+        )
+        # A URL sorting before the cursor appeared since; it must not shift the resume point
+        result, get, batches = self.run_partition(partition, ['https://www.prothomalo.com/politics/0'] + self.urls)
+
+        get.assert_not_called()
+        self.assertEqual(batches, [[self.urls[1]]])
+        self.assertEqual((result['status'], partition.cursor), ('DONE', 2))
+
+    def test_running_partition_is_skipped_until_stale(self):
+        partition = BackfillPartition.objects.create(category='politics', date=self.day, status='RUNNING')
+        result, _, batches = self.run_partition(partition)
+        self.assertEqual((result['status'], batches), ('RUNNING', []))
+
+        BackfillPartition.objects.filter(pk=partition.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        result, _, batches = self.run_partition(partition)
+        self.assertEqual((result['status'], len(batches)), ('DONE', 2))
+
+
+class MinHashTests(SimpleTestCase):
+    def setUp(self):
+        self.hasher = MinHasher(num_perm=128, shingle_size=5)
+
+    def test_identical_text_has_identical_signature(self):
+        article = make_article()
+        self.assertEqual(self.hasher.signature(article.content), self.hasher.signature(article.content))
+
+    def test_similarity_tracks_shared_shingles(self):
+        article = make_article()
+        original = self.hasher.signature(article.content)
+        near = self.hasher.signature(rewrite(article, 'https://x/other', 'politics').content)
+        unrelated = self.hasher.signature(make_article(5).content)
+        self.assertGreater(MinHasher.similarity(original, near), 0.8)
+        self.assertLess(MinHasher.similarity(original, unrelated), 0.2)
+
+    def test_text_shorter_than_a_shingle_is_signed(self):
+        self.assertIsNotNone(self.hasher.signature('দুই শব্দ'))
+
+    def test_short_and_empty_text(self):
+        self.assertIsNotNone(self.hasher.signature('দুই শব্দ'))
+        self.assertIsNone(self.hasher.signature(''))
+
+
+class LSHIndexTests(FakeRedisMixin, SimpleTestCase):
+    def test_candidates_share_a_band(self):
+        hasher, index = MinHasher(), LSHIndex(128, 16)
+        article = make_article()
+        index.insert([('doc-1', hasher.signature(article.content), 'politics')])
+
+        near = hasher.signature(rewrite(article, 'https://x/other', 'world-all').content)
+        self.assertEqual(list(index.candidates(near)), ['doc-1'])
+        self.assertEqual(index.candidates(near)['doc-1'][1], 'politics')
+        self.assertEqual(index.candidates(hasher.signature(make_article(5).content)), {})
+        self.assertEqual(index.category_of('doc-1'), 'politics')
+
+    def test_bands_must_divide_permutations(self):
+        with self.assertRaises(ValueError):
+            LSHIndex(num_perm=100, bands=16)
+
+
+@override_settings(DEDUP_ENABLED=True)
+def bulk_actions(articles):
+    """The actions one bulk_index_articles call sends to Elasticsearch"""
+    actions = []
+
+    def streaming_bulk(client, batch, **kwargs):
+        for action in batch:
+            actions.append(action)
+            yield True, {'update': {'_id': action['_id'], 'result': 'created'}}
+
+    with mock.patch('scraper.tasks.helpers.streaming_bulk', streaming_bulk), \
+            mock.patch('scraper.tasks.es_client', **{'find_routings.return_value': {}}), \
+            mock.patch('scraper.tasks.queue_after_bulk'):
+        CategoryScraper(articles[0].category).bulk_index_articles(articles)
+    return actions
+
+
+@override_settings(DEDUP_ENABLED=True)
+class NearDuplicateTests(FakeRedisMixin, TestCase):
+    def test_assign_merges_near_duplicates_within_a_batch(self):
+        article = make_article()
+        copy = rewrite(article, 'https://www.prothomalo.com/world/copy', 'world-all')
+        detector = NearDuplicateDetector()
+
+        (_, first_id, first_routing, first_sig), (_, copy_id, copy_routing, copy_sig) = detector.assign([article, copy])
+        self.assertEqual((first_id, first_routing), (article_doc_id(article.url), 'politics'))
+        self.assertEqual((copy_id, copy_routing, copy_sig), (first_id, 'politics', None))
+        self.assertIsNotNone(first_sig)
+        # Nothing reaches Redis until the bulk load reports success
+        self.assertIsNone(detector.index.category_of(first_id))
+
+    def test_failed_canonical_is_not_remembered(self):
+        article = make_article()
+        FakeBulkIndex(fail_ids={article_doc_id(article.url)}).load([article])
+        self.assertIsNone(dedup_detector.index.category_of(article_doc_id(article.url)))
+
+        index = FakeBulkIndex()
+        index.load([article])
+        self.assertEqual(dedup_detector.index.category_of(article_doc_id(article.url)), 'politics')
+
+    def test_duplicate_of_a_missing_document_is_upserted(self):
+        article = make_article()
+        FakeBulkIndex().load([article])
+        # The index was rebuilt or lost, but the LSH index still knows the canonical document
+        index = FakeBulkIndex()
+        copy = rewrite(article, 'https://www.prothomalo.com/world/copy', 'world-all')
+        self.assertEqual(index.load([copy]), 1)
+
+        doc = index.docs[('politics', article_doc_id(article.url))]
+        self.assertEqual(doc['url'], copy.url)
+        self.assertEqual(doc['category'], ['world-all'])
+
+    def test_rewrite_merges_into_the_first_document(self):
+        article = make_article()
+        copy = rewrite(article, 'https://www.prothomalo.com/world/copy', 'world-all')
+        index = FakeBulkIndex()
+        index.load([article])
+        index.load([copy])
+
+        self.assertEqual(list(index.docs), [('politics', article_doc_id(article.url))])
+        doc = index.docs[('politics', article_doc_id(article.url))]
+        self.assertEqual(doc['category'], ['politics', 'world-all'])
+        self.assertEqual(doc['duplicate_urls'], [copy.url])
+        self.assertEqual(doc['url'], article.url)
+
+    def test_re_crawl_replaces_its_own_document(self):
+        article = make_article()
+        bulk_actions([article])
+        [again] = bulk_actions([Article(**{**article.to_dict(), 'category': 'world-all', 'headline': 'সংশোধিত'})])
+        self.assertEqual(again['_id'], article_doc_id(article.url))
+        self.assertTrue(again['script']['params']['replace'])
+        self.assertEqual(again['script']['params']['doc']['headline'], 'সংশোধিত')
+
+
+class RoutingTests(FakeRedisMixin, TestCase):
+    """A URL keeps the routing of its first copy, whatever category it is scraped under"""
+
+    def test_category_routing_includes_merged_shards(self):
+        self.assertEqual(category_routing('world-all'), 'world-all')
+        record_routing_alias('world-all', 'politics')
+        self.assertEqual(category_routing('world-all'), 'politics,world-all')
+
+    def test_unreadable_routing_searches_every_shard(self):
+        with mock.patch.object(self.redis, 'smembers', side_effect=ConnectionError('down')):
+            self.assertIsNone(category_routing('politics'))
+
+    def test_merged_duplicate_records_its_routing(self):
+        article = make_article()
+        bulk_actions([article])
+        [merge] = bulk_actions([rewrite(article, 'https://www.prothomalo.com/world/copy', 'world-all')])
+        self.assertEqual(merge['_routing'], 'politics')
+        self.assertEqual(category_routing('world-all'), 'politics,world-all')
+
+    def crawl_twice(self, content=None):
+        article = make_article(content=content)
+        again = Article(**{**article.to_dict(), 'category': 'world-all'})
+        index = FakeBulkIndex()
+        index.load([article])
+        index.load([again])
+        return index, article_doc_id(article.url)
+
+    def assertOneDocument(self, index, doc_id):
+        self.assertEqual(list(index.docs), [('politics', doc_id)])
+        self.assertEqual(index.docs[('politics', doc_id)]['category'], ['politics', 'world-all'])
+
+    @override_settings(DEDUP_ENABLED=False)
+    def test_url_under_two_categories_without_dedup(self):
+        self.assertOneDocument(*self.crawl_twice())
+
+    @override_settings(DEDUP_ENABLED=False)
+    def test_url_under_two_categories_in_one_batch(self):
+        article = make_article()
+        index = FakeBulkIndex()
+        index.load([article, Article(**{**article.to_dict(), 'category': 'world-all'})])
+        self.assertOneDocument(index, article_doc_id(article.url))
+
+    @override_settings(DEDUP_ENABLED=True)
+    def test_content_too_short_to_sign(self):
+        self.assertOneDocument(*self.crawl_twice(content='দুই শব্দ'))
+
+    @override_settings(DEDUP_ENABLED=True)
+    def test_lsh_lookup_failure(self):
+        with mock.patch.object(dedup_detector.index, 'category_of', side_effect=ConnectionError('down')):
+            self.assertOneDocument(*self.crawl_twice())
+
+    @override_settings(DEDUP_ENABLED=False)
+    def test_known_routings_come_from_redis_and_only_misses_are_fetched(self):
+        known, unknown = make_article(0), make_article(1)
+        index = FakeBulkIndex()
+        index.load([known])
+        with index.patched() as client:
+            bulk_index_articles([Article(**{**known.to_dict(), 'category': 'world-all'}), unknown])
+        fetched = {doc['_id'] for doc in client.mget.call_args.kwargs['docs']}
+        self.assertEqual(fetched, {article_doc_id(unknown.url)})
+        self.assertEqual(index.docs[('politics', article_doc_id(known.url))]['category'], ['politics', 'world-all'])
+
+        # A document indexed before routings were recorded is found by the mget, then remembered
+        doc_id = article_doc_id(unknown.url)
+        self.redis.hdel('routing:doc', doc_id)
+        with index.patched():
+            self.assertEqual(es_client.find_routings([doc_id]), {doc_id: 'politics'})
+        self.assertEqual(self.redis.hget('routing:doc', doc_id), b'politics')
+
+
+class RebuildIndexTests(FakeRedisMixin, TestCase):
+    ARCHIVES = ['scraped-data/politics/2025/06/05/a.zip', 'scraped-data/world-all/2025/06/05/b.zip']
+
+    def rebuild(self, **options):
+        article = make_article()
+        archives = {
+            'scraped-data/politics/2025/06/05/a.zip': [article.to_dict(), make_article(1).to_dict()],
+            'scraped-data/world-all/2025/06/05/b.zip': [{**article.to_dict(), 'category': 'world-all'}],
+        }
+        index = FakeBulkIndex()
+        with index.patched(), \
+                mock.patch('scraper.management.commands.rebuild_index.S3Handler') as handler, \
+                mock.patch('scraper.es_client.es_client.create_index') as create_index, \
+                mock.patch('scraper.es_client.es_client.swap_alias', return_value=[]) as swap_alias, \
+                mock.patch('scraper.management.commands.rebuild_index.call_command') as reseed:
+            handler.return_value.list_archives.return_value = [(key, 1) for key in archives]
+            handler.return_value.read_archive.side_effect = archives.get
+            call_command('rebuild_index', batch_size=1, stdout=StringIO(), **options)
+        # Related lists were computed from the replaced content
+        self.assertEqual(reseed.call_args.args, ('compute_related',))
+        self.commands = [call.args[0] for call in reseed.call_args_list]
+        return index, article_doc_id(article.url), create_index, swap_alias
+
+    def test_category_copies_follow_their_canonical_document(self):
+        index, doc_id, create_index, swap_alias = self.rebuild()
+        self.assertEqual(len(index.docs), 2)
+        self.assertEqual(index.docs[('politics', doc_id)]['category'], ['politics', 'world-all'])
+        swap_alias.assert_called_once()
+
+    def test_dry_run_reads_without_indexing(self):
+        with mock.patch('scraper.management.commands.rebuild_index.S3Handler') as handler, \
+                mock.patch('scraper.management.commands.rebuild_index.bulk_index_articles') as bulk, \
+                mock.patch('scraper.es_client.es_client.create_index') as create_index:
+            handler.return_value.list_archives.return_value = [('scraped-data/politics/2025/06/05/a.zip', 1)]
+            handler.return_value.read_archive.return_value = [make_article().to_dict()]
+            call_command('rebuild_index', dry_run=True, stdout=StringIO())
+        bulk.assert_not_called()
+        create_index.assert_not_called()
+
+    def test_rebuild_batches_target_the_new_index(self):
+        stats = {}
+        with mock.patch('scraper.tasks.helpers.streaming_bulk',
+                        return_value=iter([(True, {'update': {'_id': 'doc', 'result': 'created'}})])) as bulk, \
+                mock.patch('scraper.tasks.es_client') as es:
+            self.assertEqual(bulk_index_articles([make_article()], 'prothomalo_articles_new', stats), 1)
+        self.assertEqual(bulk.call_args.args[1][0]['_index'], 'prothomalo_articles_new')
+        self.assertEqual(stats, {'indexed': 1, 'created': 1, 'documents': {}, 'rejected': []})
+        es.create_index_if_not_exists.assert_not_called()
+        es.bump_generation.assert_not_called()
+
+    def test_filtered_rebuild_merges_into_the_live_index(self):
+        index, _, create_index, swap_alias = self.rebuild(category='politics')
+        self.assertEqual(index.indices, {'prothomalo_articles'})
+        create_index.assert_not_called()
+        swap_alias.assert_not_called()
+
+    @override_settings(ARTICLE_STORE_ENABLED=True)
+    def test_rebuild_syncs_the_article_store(self):
+        self.rebuild()
+        self.assertEqual(self.commands, ['sync_article_store', 'compute_related'])
+
+    @override_settings(DEDUP_ENABLED=True)
+    def test_near_duplicates_in_concurrent_batches_merge_and_live_state_waits_for_the_swap(self):
+        article = make_article()
+        duplicate = rewrite(article, 'https://www.prothomalo.com/sports/copy', 'sports-all')
+        archives = {'scraped-data/politics/2025/06/05/a.zip': [article.to_dict(), duplicate.to_dict()]}
+        live_keys = []
+        index = FakeBulkIndex()
+        with index.patched(), \
+                mock.patch('scraper.management.commands.rebuild_index.S3Handler') as handler, \
+                mock.patch('scraper.es_client.es_client.create_index'), \
+                mock.patch('scraper.es_client.es_client.swap_alias',
+                           side_effect=lambda *args, **kwargs: live_keys.extend(self.redis.keys()) or []), \
+                mock.patch('scraper.management.commands.rebuild_index.call_command'):
+            handler.return_value.list_archives.return_value = [(key, 1) for key in archives]
+            handler.return_value.read_archive.side_effect = archives.get
+            call_command('rebuild_index', batch_size=1, index_workers=2, stdout=StringIO())
+
+        doc_id = article_doc_id(article.url)
+        self.assertEqual(list(index.docs), [('politics', doc_id)])
+        self.assertEqual(index.docs[('politics', doc_id)]['duplicate_urls'], [duplicate.url])
+        self.assertEqual(live_keys, [])
+        self.assertEqual(dedup_detector.index.category_of(doc_id), 'politics')
+        self.assertEqual(self.redis.smembers('routing:extra:sports-all'), {b'politics'})
+        self.assertEqual(es_client.find_routings([doc_id]), {doc_id: 'politics'})
+
+    def test_filtered_rebuild_cannot_delete_old_indices(self):
+        with self.assertRaises(CommandError):
+            call_command('rebuild_index', date_prefix='2025/06', delete_old=True, stdout=StringIO())
+
+
+class IndexSwapTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(es_client, 'client')
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reindex = self.client.options.return_value.reindex
+        self.reindex.return_value = {'total': 3, 'failures': []}
+        self.since = timezone.now()
+
+    def test_last_catch_up_runs_with_writes_paused(self):
+        paused = []
+        self.reindex.side_effect = lambda **kwargs: paused.append(bool(self.redis.exists(WRITES_PAUSED_KEY))) or {
+            'total': 3, 'failures': []
+        }
+        self.client.count.return_value = {'count': 10}
+        with mock.patch.object(es_client, 'point_alias', return_value=['old']) as point_alias:
+            self.assertEqual(es_client.swap_alias('new', self.since, check_count=True), ['old'])
+
+        self.assertEqual(paused, [False, True])
+        point_alias.assert_called_once_with('new', delete_old=False)
+        self.assertFalse(self.redis.exists(WRITES_PAUSED_KEY))
+        since = self.reindex.call_args.kwargs['source']['query']['range']['indexed_at']['gte']
+        self.assertLess(since, self.since.isoformat())
+
+    def test_count_mismatch_keeps_the_alias_and_resumes_writes(self):
+        self.client.count.side_effect = [{'count': 10}, {'count': 9}]
+        with mock.patch.object(es_client, 'point_alias') as point_alias, self.assertRaises(RuntimeError):
+            es_client.swap_alias('new', self.since, check_count=True)
+        point_alias.assert_not_called()
+        self.assertFalse(self.redis.exists(WRITES_PAUSED_KEY))
+
+    @override_settings(ELASTICSEARCH_WRITE_PAUSE_TIMEOUT=0)
+    def test_writer_is_registered_and_waits_out_a_pause(self):
+        with live_index_write():
+            self.assertEqual(len(self.redis.keys(WRITER_KEY_PREFIX + '*')), 1)
+        self.assertEqual(self.redis.keys(WRITER_KEY_PREFIX + '*'), [])
+
+        self.redis.set(WRITES_PAUSED_KEY, 1)
+        with self.assertLogs('scraper.es_client', 'WARNING'), live_index_write():
+            pass
+
+    def test_new_index_keeps_the_live_profile(self):
+        self.client.indices.get_mapping.return_value = {
+            'prothomalo_articles_1': {'mappings': {'_meta': {'profile': 'compact'}}}
+        }
+        es_client.create_index('new')
+        body = self.client.indices.create.call_args.kwargs['body']
+        self.assertEqual(body['settings']['codec'], 'best_compression')
+        self.assertEqual(body['mappings']['_meta'], {'profile': 'compact'})
+
+    def test_failed_reindex_deletes_the_new_index(self):
+        self.client.indices.exists.return_value = True
+        self.client.indices.get_mapping.return_value = {}
+        self.reindex.return_value = {'total': 3, 'failures': [{'cause': 'mapper_parsing_exception'}]}
+        with self.assertRaises(CommandError):
+            call_command('reindex_routed', stdout=StringIO())
+        new_index = self.client.indices.create.call_args.kwargs['index']
+        self.client.indices.delete.assert_called_once_with(index=new_index, ignore_unavailable=True)
+
+
+class RelatedArticlesTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(es_client, 'client')
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.msearch.side_effect = lambda searches: {'responses': [
+            {'hits': {'hits': [{'_id': 'neighbour', '_score': 2.0, '_source': {'headline': 'পাশের খবর'}}]}}
+            for _ in searches[::2]
+        ]}
+        self.client.mget.side_effect = lambda index, docs, source: {'docs': [
+            {'_id': doc['_id'], 'found': True, '_source': {'headline': f"নতুন {doc['_id']}"}} for doc in docs
+        ]}
+
+    def test_new_document_and_its_neighbour_are_linked(self):
+        self.assertEqual(compute_related_articles([('doc', 'politics')]), {'computed': 1})
+        self.assertEqual(related_articles.get('doc'), [{'id': 'neighbour', 'headline': 'পাশের খবর'}])
+        self.assertEqual(related_articles.get('neighbour'), [{'id': 'doc', 'headline': 'নতুন doc'}])
+
+    @override_settings(RELATED_ARTICLES_SIZE=2)
+    def test_neighbour_lists_are_trimmed_to_the_size(self):
+        related = type(related_articles)()
+        with mock.patch('scraper.tasks.related_articles', related):
+            compute_related_articles([(f'doc-{n}', 'politics') for n in range(3)])
+        self.assertEqual(self.redis.zrevrange(related.key('neighbour'), 0, -1), [b'doc-2', b'doc-1'])
+
+    def test_task_refreshes_the_index_once(self):
+        docs = [(f'doc-{n}', 'politics') for n in range(120)]
+        self.assertEqual(compute_related_articles(docs), {'computed': 120})
+        self.assertEqual(self.client.indices.refresh.call_count, 1)
+        self.assertEqual(self.client.msearch.call_count, 3)
+
+        compute_related_articles(docs, refresh_index=False)
+        self.assertEqual(self.client.indices.refresh.call_count, 1)
+
+    def test_seeding_refreshes_once_per_run(self):
+        hits = [{'_id': f'doc-{n}', '_routing': 'politics'} for n in range(120)]
+        with mock.patch('scraper.management.commands.compute_related.helpers.scan', return_value=hits), \
+                mock.patch('scraper.management.commands.compute_related.compute_related_articles') as task:
+            call_command('compute_related', batch_size=50, stdout=StringIO())
+        self.assertEqual(self.client.indices.refresh.call_count, 1)
+        self.assertEqual([call.kwargs for call in task.delay.call_args_list], [{'refresh_index': False}] * 3)
+
+    def test_recomputing_replaces_a_stale_list_and_summary(self):
+        self.redis.zadd(related_articles.key('doc'), {'gone': 5.0})
+        self.redis.hset(related_articles.SUMMARY_KEY, 'doc', serialization.dumps({'id': 'doc', 'headline': 'পুরনো'}))
+        compute_related_articles([('doc', 'politics')])
+
+        self.assertEqual([summary['id'] for summary in related_articles.get('doc')], ['neighbour'])
+        self.assertEqual(related_articles.get('neighbour'), [{'id': 'doc', 'headline': 'নতুন doc'}])
+
+    def test_documents_gone_from_the_index_are_pruned(self):
+        compute_related_articles([('gone', 'politics'), ('late', 'politics')])
+        # 'late' was indexed after the scan started, so only the live index knows it
+        self.client.search.return_value = {'hits': {'hits': [{'_id': 'late'}]}}
+        hits = [{'_id': 'neighbour', '_routing': 'politics'}]
+        with mock.patch('scraper.management.commands.compute_related.helpers.scan', return_value=hits), \
+                mock.patch('scraper.management.commands.compute_related.compute_related_articles'):
+            call_command('compute_related', stdout=StringIO())
+
+        self.assertEqual(self.client.search.call_args.kwargs['query'], {'ids': {'values': ['gone', 'late']}})
+        self.assertEqual(related_articles.get('gone'), [])
+        self.assertEqual([summary['id'] for summary in related_articles.get('neighbour')], ['late'])
+        self.assertEqual(len(related_articles.get('late')), 1)
+
+    async def test_view_serves_the_stored_list(self):
+        compute_related_articles([('doc', 'politics')])
+        response = await self.async_client.get('/api/articles/doc/related/?size=3')
+        self.assertEqual(response.json(), {'id': 'doc', 'results': [{'id': 'neighbour', 'headline': 'পাশের খবর'}]})
+        self.assertEqual((await self.async_client.get('/api/articles/doc/related/?size=0')).status_code, 400)
+
+    def test_new_and_replaced_documents_of_a_bulk_load_are_queued(self):
+        created, known = make_article(), make_article(1)
+        with mock.patch('scraper.tasks.helpers.streaming_bulk', return_value=iter([
+            (True, {'update': {'_id': article_doc_id(created.url), 'result': 'created'}}),
+            (True, {'update': {'_id': article_doc_id(known.url), 'result': 'updated'}}),
+        ])), mock.patch('scraper.tasks.es_client', **{'find_routings.return_value': {}}), \
+                mock.patch('scraper.tasks.queue_after_bulk') as queue:
+            bulk_index_articles([created, known])
+        queued = {call.args[0].name: call.args[1] for call in queue.call_args_list}
+        self.assertEqual(queued['scraper.tasks.compute_related_articles'],
+                         [(article_doc_id(created.url), 'politics'), (article_doc_id(known.url), 'politics')])
+        # Only the created article is new to the rollups
+        self.assertEqual([facts['date'] for facts in queued['scraper.tasks.update_daily_rollups']], ['2025-06-05'])
+
+    def test_re_extracted_articles_are_queued_for_recomputation(self):
+        article = make_article()
+        index = FakeBulkIndex()
+        index.load([article])
+        changed = Article(**{**article.to_dict(), 'headline': 'সংশোধিত শিরোনাম'})
+        with index.patched(), mock.patch('scraper.tasks.queue_after_bulk') as queue:
+            bulk_index_articles([changed])
+        queued = {call.args[0].name: call.args[1] for call in queue.call_args_list}
+        self.assertEqual(queued['scraper.tasks.compute_related_articles'],
+                         [(article_doc_id(article.url), 'politics')])
+        # Not a new article, so the rollups already count it
+        self.assertNotIn('scraper.tasks.update_daily_rollups', queued)
+
+
+class RollupTests(FakeRedisMixin, TestCase):
+    def facts(self, n, day='2025-06-05', **fields):
+        return {'id': f'doc-{n}', 'category': 'politics', 'date': day, 'word_count': 250,
+                'author': 'নিজস্ব প্রতিবেদক', 'location': 'ঢাকা', **fields}
+
+    def test_page_dates_are_zero_padded(self):
+        scraper = CategoryScraper('politics')
+        self.assertEqual(scraper.parse_bengali_date('৫ জুন ২০২৫, ৯:০৫'), '2025-06-05 09:05')
+        self.assertEqual(scraper.parse_bengali_date('১৫ ডিসেম্বর ২০২৪, ২৩:৪০'), '2024-12-15 23:40')
+
+    def test_unpadded_days_are_counted(self):
+        facts = article_facts('doc-0', make_article(published_at='2025-06-5 12:30'))
+        self.assertEqual(facts['date'], '2025-06-05')
+        # Facts queued before the fix still carry the sliced, unpadded form
+        self.assertEqual(apply_facts([facts, self.facts(1, day='2025-06-5 ')]), 1)
+        rollup = DailyRollup.objects.get()
+        self.assertEqual((rollup.date.isoformat(), rollup.article_count), ('2025-06-05', 2))
+
+    def test_unreadable_dates_are_logged(self):
+        facts = article_facts('doc-0', make_article(published_at=None, scraped_at=None))
+        with self.assertLogs('scraper.rollups', 'WARNING') as logs:
+            self.assertEqual(apply_facts([facts]), 0)
+        self.assertIn('doc-0', logs.output[0])
+
+    def test_histogram_percentile(self):
+        self.assertIsNone(histogram_percentile([0] * 19, 50))
+        # Ten articles under 100 words: the median sits halfway up the bucket
+        self.assertEqual(histogram_percentile([10] + [0] * 18, 50), 50)
+        # Half in 100-200, half in 200-300
+        self.assertEqual(histogram_percentile([0, 5, 5] + [0] * 16, 50), 200)
+        self.assertEqual(histogram_percentile([0, 5, 5] + [0] * 16, 90), 280)
+        # The open-ended last bucket reports its lower bound
+        self.assertEqual(histogram_percentile([0] * 18 + [3], 99), 5000)
+
+    def test_summarize_merges_categories_per_day(self):
+        apply_facts([self.facts(0), self.facts(1, word_count=50),
+                     self.facts(2, category='world-all', author=None, location='চট্টগ্রাম'),
+                     self.facts(3, day='2025-06-06', author='অন্য লেখক')])
+        summary = summarize(DailyRollup.objects.all(), top=1)
+
+        self.assertEqual(summary['articles'], 4)
+        self.assertEqual([(day['date'], day['articles'], day['avg_word_count']) for day in summary['series']],
+                         [('2025-06-05', 3, 183), ('2025-06-06', 1, 250)])
+        self.assertEqual(summary['series'][1]['p50_word_count'], 250)
+        self.assertEqual(summary['top_authors'], [{'author': 'নিজস্ব প্রতিবেদক', 'articles': 2, 'avg_word_count': 150}])
+        self.assertEqual(summary['top_locations'], [{'location': 'ঢাকা', 'articles': 3}])
+
+    def test_trends_are_read_from_the_rollups_only(self):
+        apply_facts([self.facts(0), self.facts(1, category='world-all')])
+        with mock.patch.object(es_client, 'client') as client:
+            response = self.client.get('/api/trends/?category=politics&date_from=2025-06-01&date_to=2025-06-30')
+        self.assertEqual(client.mock_calls, [])
+        self.assertEqual((response.data['articles'], response.data['series'][0]['date']), (1, '2025-06-05'))
+        self.assertEqual(self.client.get('/api/trends/?date_from=2025-06-30&date_to=2025-06-01').status_code, 400)
+
+    def test_rebuild_matches_the_incremental_rows(self):
+        articles = [make_article(n, word_count=100 * n) for n in range(4)]
+        hits = [{'_id': str(n), '_source': {**article.to_dict(), 'category': [article.category]}}
+                for n, article in enumerate(articles)]
+        with mock.patch.object(es_client, 'client'), \
+                mock.patch('scraper.management.commands.rebuild_rollups.helpers.scan', return_value=hits):
+            call_command('rebuild_rollups', stdout=StringIO())
+        rebuilt = summarize(DailyRollup.objects.all())
+
+        DailyRollup.objects.all().delete()
+        apply_facts([{'category': 'politics', 'date': '2025-06-05', 'word_count': 100 * n,
+                      'author': 'নিজস্ব প্রতিবেদক', 'location': 'ঢাকা'} for n in range(4)])
+        self.assertEqual(summarize(DailyRollup.objects.all()), rebuilt)
+        self.assertEqual(DailyRollup.objects.get().date, date(2025, 6, 5))
+
+    def test_updates_wait_for_a_rebuild_and_skip_what_it_counted(self):
+        self.assertTrue(start_rebuild())
+        self.assertFalse(start_rebuild())
+        with self.assertRaises(Retry):
+            update_daily_rollups([self.facts(0)])
+        self.assertFalse(DailyRollup.objects.exists())
+
+        finish_rebuild(['doc-0'])
+        self.assertFalse(self.redis.exists(REBUILD_KEY))
+        update_daily_rollups([self.facts(0), self.facts(1)])
+        self.assertEqual(DailyRollup.objects.get().article_count, 1)
+
+    def test_rebuild_replaces_rows_and_records_recent_documents(self):
+        apply_facts([self.facts(9)])
+        old = (timezone.now() - timedelta(days=3)).isoformat()
+        hits = [
+            {'_id': 'doc-0', '_source': {'category': ['politics'], 'published_at': '2025-06-5 12:30',
+                                         'word_count': 250, 'indexed_at': timezone.now().isoformat()}},
+            {'_id': 'doc-1', '_source': {'category': ['politics'], 'published_at': '2025-06-06 08:00',
+                                         'word_count': 250, 'indexed_at': old}},
+            {'_id': 'doc-2', '_source': {'category': ['politics'], 'published_at': None, 'word_count': 250}},
+        ]
+        stderr = StringIO()
+        with mock.patch.object(es_client, 'client'), \
+                mock.patch('scraper.management.commands.rebuild_rollups.helpers.scan', return_value=hits):
+            call_command('rebuild_rollups', stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(sorted(DailyRollup.objects.values_list('date', 'article_count')),
+                         [(date(2025, 6, 5), 1), (date(2025, 6, 6), 1)])
+        self.assertIn('doc-2', stderr.getvalue())
+        self.assertFalse(self.redis.exists(REBUILD_KEY))
+        # Only recently indexed documents can still have facts in flight
+        apply_facts([self.facts(0), self.facts(1)])
+        self.assertEqual(DailyRollup.objects.get(date='2025-06-05').article_count, 2)
+
+
+class ParsePoolTests(SimpleTestCase):
+    PAGE = ('<h1 class="IiRps">শিরোনাম</h1><span class="contributor-name _8TSJC">প্রতিবেদক</span>'
+            '<div class="time-social-share-wrapper"><span>প্রকাশ: ৫ জুন ২০২৫, ১০:৩০</span></div>'
+            '<div class="story-content"><p>প্রথম</p><p>দ্বিতীয়</p></div>').encode()
+
+    def test_parse_article_page(self):
+        url, fields, error = parse_article_page(('https://x/1', self.PAGE))
+        self.assertIsNone(error)
+        self.assertEqual(fields['headline'], 'শিরোনাম')
+        self.assertEqual(fields['content'], 'প্রথম\nদ্বিতীয়')
+        self.assertEqual(fields['publication_date_raw'], '৫ জুন ২০২৫, ১০:৩০')
+
+    def test_daemonic_process_parses_inline_in_order(self):
+        pool = ParsePool(workers=4)
+        with mock.patch('scraper.parsing.multiprocessing.current_process', return_value=mock.Mock(daemon=True)):
+            results = list(pool.imap(parse_article_page, [(f'https://x/{n}', self.PAGE) for n in range(5)]))
+        self.assertTrue(pool._inline)
+        self.assertEqual([url for url, _, _ in results], [f'https://x/{n}' for n in range(5)])
+
+    def test_pool_keeps_input_order(self):
+        pool = ParsePool(workers=2, max_in_flight=2)
+        self.addCleanup(pool.shutdown)
+        results = list(pool.imap(parse_article_page, [(f'https://x/{n}', self.PAGE) for n in range(6)]))
+        self.assertEqual([url for url, _, _ in results], [f'https://x/{n}' for n in range(6)])
+        self.assertEqual({fields['headline'] for _, fields, _ in results}, {'শিরোনাম'})
+
+    def test_failed_page_fetch_is_recorded_and_the_rest_keep_their_order(self):
+        urls = [f'https://www.prothomalo.com/politics/{n}' for n in range(4)]
+
+        def get(url, **kwargs):
+            if url == urls[1]:
+                raise ConnectionError('reset')
+            return mock.Mock(content=self.PAGE.replace('শিরোনাম'.encode(), url[-1].encode()))
+
+        scraper = CategoryScraper('politics')
+        scraper.extraction_mode = 'html'
+        with mock.patch('scraper.tasks.requests.get', side_effect=get):
+            articles = scraper.scrape_articles(urls)
+
+        self.assertEqual([article.headline for article in articles], ['0', '2', '3'])
+        self.assertEqual([failure['url'] for failure in scraper.failures], [urls[1]])
+
+    def test_bench_parse_reads_captured_pages(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = CaptureStore(directory.name)
+        store.save('https://x/1', self.PAGE, 'politics', content_type='text/html')
+        store.save('https://x/2', serialization.dumps({'headline': 'গল্প'}), 'politics', content_type=STORY_CONTENT_TYPE)
+
+        out = StringIO()
+        with override_settings(SCRAPER_CAPTURE_DIR=directory.name):
+            call_command('bench_parse', captures=True, workers='1', stdout=out)
+        self.assertIn('1 pages', out.getvalue())
+
+
+class SerializationTests(SimpleTestCase):
+    def test_article_round_trips_as_utf8(self):
+        article = make_article()
+        data = serialization.dumps(article)
+        self.assertIn('শিরোনাম'.encode(), data)
+        self.assertEqual(Article.from_dict(serialization.loads(data)), article)
+
+    def test_renderer_falls_back_to_drf_types(self):
+        rendered = ORJSONRenderer().render({'headline': 'শিরোনাম', 'score': Decimal('1.5')})
+        self.assertEqual(serialization.loads(rendered), {'headline': 'শিরোনাম', 'score': 1.5})
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_celery_payloads_use_orjson(self):
+        content_type, encoding, payload = kombu_dumps({'urls': ['https://x/১']}, serializer='orjson')
+        self.assertEqual(content_type, 'application/x-orjson')
+        self.assertEqual(kombu_loads(payload, content_type, encoding), {'urls': ['https://x/১']})
+
+
+class ConditionalGetTests(TestCase):
+    EMPTY = {"hits": {"hits": [], "total": {"value": 0}}}
+
+    async def get(self, generation, **headers):
+        with mock.patch('scraper.views.es_client.generation', return_value=generation), \
+                mock.patch('scraper.views.async_es_client.search_articles', new=mock.AsyncMock(return_value=self.EMPTY)):
+            return await self.async_client.get('/api/articles/', headers=headers)
+
+    async def test_etag_and_not_modified(self):
+        response = await self.get(7)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual((await self.get(7, if_none_match=etag)).status_code, 304)
+        self.assertEqual((await self.get(8, if_none_match=etag)).status_code, 200)
+
+    async def test_task_update_changes_the_etag(self):
+        etag = (await self.get(7)).headers['ETag']
+        await sync_to_async(make_task)()
+        self.assertEqual((await self.get(7, if_none_match=etag)).status_code, 200)
+
+    async def test_large_responses_are_gzipped(self):
+        hits = [{'_id': str(n), '_source': make_article(n).to_dict()} for n in range(5)]
+        search = mock.AsyncMock(return_value={'hits': {'hits': hits, 'total': {'value': 5}}})
+        with mock.patch('scraper.views.es_client.generation', return_value=7), \
+                mock.patch('scraper.views.async_es_client.search_articles', new=search):
+            response = await self.async_client.get('/api/articles/', headers={'accept_encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+    async def test_search_awaits_the_async_client(self):
+        search = mock.AsyncMock(return_value=self.EMPTY)
+        with mock.patch('scraper.views.es_client.generation', return_value=7), \
+                mock.patch('scraper.views.async_es_client.search_articles', new=search):
+            response = await self.async_client.get('/api/articles/search/?query=ভোট&category=politics')
+        self.assertEqual(response.status_code, 200)
+        search.assert_awaited_once_with('ভোট', 1, 20, {'category': 'politics'})
+
+    async def test_unknown_generation_sends_no_etag(self):
+        etag = (await self.get(7)).headers['ETag']
+        response = await self.get(None, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response.headers)
+
+    async def test_async_views_keep_drf_handling(self):
+        self.enterContext(mock.patch('scraper.views.es_client.generation', return_value=7))
+        response = await self.async_client.post('/api/articles/search/')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response.json(), {'detail': 'Method "POST" not allowed.'})
+
+        response = await self.async_client.options('/api/categories/politics/stats/')
+        self.assertEqual(response.json()['name'], 'Category Stats')
+
+        response = await self.async_client.get('/api/articles/search/?size=0')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('size', response.json())
+
+    def test_async_views_are_in_the_schema(self):
+        schema = self.client.get('/api/schema/', headers={'accept': 'application/json'}).json()
+        for path in ('/api/articles/', '/api/articles/search/', '/api/categories/{category}/stats/'):
+            self.assertIn('get', schema['paths'][path])
+
+    async def test_heartbeat_and_extension_change_the_etag(self):
+        task = await sync_to_async(make_task)(status='RUNNING', max_pages=5)
+        etag = (await self.get(7)).headers['ETag']
+        self.enterContext(mock.patch('scraper.tasks.redis_client', FakeRedis()))
+        await sync_to_async(CrawlCheckpoint(task, CategoryScraper('politics')).heartbeat)()
+        self.assertEqual((await self.get(7, if_none_match=etag)).status_code, 200)
+
+        etag = (await self.get(7)).headers['ETag']
+        self.assertEqual((await sync_to_async(start_category_scrape)('politics', 10))[1], 'extended')
+        self.assertEqual((await self.get(7, if_none_match=etag)).status_code, 200)
+
+
+class SuggestTests(SimpleTestCase):
+    async def test_suggestions_are_cached_per_prefix(self):
+        suggest = mock.AsyncMock(return_value=[{'text': 'নির্বাচন কমিশন', 'field': 'headline'}])
+        with mock.patch('scraper.views.async_es_client.suggest', new=suggest):
+            first = await self.async_client.get('/api/articles/suggest/?q=নির্বাচ-cache')
+            second = await self.async_client.get('/api/articles/suggest/?q=নির্বাচ-cache')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(first.json()['suggestions'][0]['text'], 'নির্বাচন কমিশন')
+        suggest.assert_awaited_once()
+
+    async def test_missing_prefix_is_400(self):
+        response = await self.async_client.get('/api/articles/suggest/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('q', response.json())
+
+    def test_placeholders_are_not_suggested(self):
+        article = make_article(headline='নির্বাচন কমিশন', author='Author not found')
+        self.assertEqual(suggest_inputs(article), ['নির্বাচন কমিশন'])
+
+
+class CompactIndexTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(es_client, 'client')
+        self.client = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.indices.disk_usage.return_value = {
+            '_shards': {},
+            'prothomalo_articles': {'store_size_in_bytes': 100, 'fields': {'content': {'total_in_bytes': 80}}}
+        }
+        self.client.options.return_value = self.client
+
+    def test_compact_profile_trims_the_mapping(self):
+        standard, compact = es_client.index_body(profile='standard'), es_client.index_body(profile='compact')
+        self.assertNotIn('codec', standard['settings'])
+        self.assertEqual(compact['settings']['codec'], 'best_compression')
+        properties = compact['mappings']['properties']
+        self.assertEqual(properties['content']['index_options'], 'freqs')
+        self.assertEqual((properties['author']['index_options'], properties['author']['norms']), ('docs', False))
+        self.assertFalse(properties['scraped_at']['index'])
+        with self.assertRaises(ValueError):
+            es_client.index_body(profile='tiny')
+
+    def test_count_mismatch_keeps_the_alias(self):
+        self.client.reindex.return_value = {'failures': [], 'total': 10}
+        self.client.count.side_effect = [{'count': 10}, {'count': 9}]
+        with mock.patch.object(es_client, 'point_alias') as point_alias, self.assertRaises(CommandError):
+            call_command('compact_index', stdout=StringIO())
+        point_alias.assert_not_called()
+        self.assertEqual(self.client.indices.create.call_args.kwargs['body']['settings']['codec'], 'best_compression')
+
+    def test_report_only_measures_without_reindexing(self):
+        out = StringIO()
+        call_command('compact_index', report_only=True, stdout=out)
+        self.assertIn('80B', out.getvalue())
+        self.client.reindex.assert_not_called()
+
+
+class LoadTestStubTests(SimpleTestCase):
+    async def test_stub_answers_the_bodies_the_client_builds(self):
+        articles = seed_articles(200, ['politics', 'sports-all'])
+        runner, port = await ElasticsearchStub(articles).start()
+        client = AsyncElasticsearch(f'http://127.0.0.1:{port}')
+        try:
+            body = ElasticsearchClient.build_search_body('নির্বাচন', size=5, filters={'category': 'politics'})
+            result = await client.search(index='articles', body=body)
+            count = await client.count(index='articles', body=ElasticsearchClient.build_count_body('politics'))
+            suggest = await client.search(index='articles', body=ElasticsearchClient.build_suggest_body('নির্বা'))
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+        politics = [a for a in articles if a['category'] == ['politics']]
+        matching = [a for a in politics if any('নির্বাচন' in a[field] for field in ('headline', 'content', 'author'))]
+        self.assertEqual(result['hits']['total']['value'], len(matching))
+        self.assertEqual(len(result['hits']['hits']), 5)
+        self.assertEqual(count['count'], len(politics))
+        options = suggest['suggest']['headline_suggest'][0]['options']
+        self.assertTrue(options and all(option['text'].startswith('নির্বা') for option in options))
+
+    def test_seeded_corpus_is_deterministic(self):
+        self.assertEqual(seed_articles(3, ['politics']), seed_articles(3, ['politics']))
+
+    def test_percentile(self):
+        self.assertEqual(percentile([4, 1, 3, 2], 50), 2)
+        self.assertEqual(percentile(range(1, 101), 99), 99)
+
+
+class CaptureTests(SimpleTestCase):
+    STORY = {
+        'slug': 'politics/story', 'headline': 'গল্পের শিরোনাম', 'first-published-at': 1749097800000,
+        'cards': [{'story-elements': [{'type': 'text', 'text': '<p>প্রথম অনুচ্ছেদ</p><p>দ্বিতীয়</p>'}]}],
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = CaptureStore(directory.name)
+        patcher = mock.patch('scraper.tasks.capture_store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.enterContext(override_settings(SCRAPER_CAPTURE_DIR=directory.name))
+
+    def test_fetched_page_is_stored_once_and_logged_per_fetch(self):
+        url = 'https://www.prothomalo.com/politics/page'
+        response = mock.Mock(content=ParsePoolTests.PAGE, status_code=200, headers={'Content-Type': 'text/html'})
+        with mock.patch('scraper.tasks.requests.get', return_value=response):
+            scraper = CategoryScraper('politics')
+            self.assertEqual(scraper.fetch_page(url), ParsePoolTests.PAGE)
+            scraper.fetch_page(url)
+
+        records = list(self.store.records())
+        self.assertEqual(len(records), 2)
+        self.assertEqual(len(list((self.store.root / 'blobs').rglob('*.gz'))), 1)
+        self.assertEqual((records[0]['target_uri'], records[0]['content_type']), (url, 'text/html'))
+        self.assertEqual(self.store.read(self.store.latest()[url]['payload_digest']), ParsePoolTests.PAGE)
+
+    def test_reextract_skips_pages_the_selectors_miss(self):
+        page_url, empty_url = 'https://www.prothomalo.com/politics/page', 'https://www.prothomalo.com/politics/empty'
+        self.store.save(page_url, ParsePoolTests.PAGE, 'politics', content_type='text/html')
+        self.store.save(empty_url, b'<html><body></body></html>', 'politics', content_type='text/html')
+
+        indexed = []
+        out = StringIO()
+        with mock.patch('scraper.management.commands.reextract.bulk_index_articles',
+                        side_effect=lambda batch: indexed.extend(batch) or len(batch)):
+            call_command('reextract', workers=1, stdout=out)
+
+        self.assertEqual([(article.url, article.headline) for article in indexed], [(page_url, 'শিরোনাম')])
+        self.assertIn('1 still missing headline or content', out.getvalue())
+
+    def test_api_extraction_captures_the_story_json(self):
+        scraper = CategoryScraper('politics')
+        url = 'https://www.prothomalo.com/politics/story'
+        scraper.stories[url] = self.STORY
+        self.assertEqual(scraper.scrape_article_from_api(url).headline, 'গল্পের শিরোনাম')
+
+        record = self.store.latest()[url]
+        self.assertEqual(record['content_type'], STORY_CONTENT_TYPE)
+        self.assertEqual(serialization.loads(self.store.read(record['payload_digest'])), self.STORY)
+
+    def test_reextract_rebuilds_each_url_from_its_latest_source(self):
+        story_url, page_url = 'https://www.prothomalo.com/politics/story', 'https://www.prothomalo.com/politics/page'
+        # An HTML fallback captured before the story API answered must not win over the story
+        self.store.save(story_url, ParsePoolTests.PAGE, 'politics', content_type='text/html')
+        self.store.save(story_url, serialization.dumps(self.STORY), 'politics', content_type=STORY_CONTENT_TYPE)
+        self.store.save(page_url, ParsePoolTests.PAGE, 'politics', content_type='text/html')
+
+        indexed = []
+        with mock.patch('scraper.management.commands.reextract.bulk_index_articles',
+                        side_effect=lambda batch: indexed.extend(batch) or len(batch)):
+            call_command('reextract', workers=1, stdout=StringIO())
+
+        headlines = {article.url: article.headline for article in indexed}
+        self.assertEqual(headlines, {story_url: 'গল্পের শিরোনাম', page_url: 'শিরোনাম'})
+
+
+class IndexGenerationTests(FakeRedisMixin, SimpleTestCase):
+    def test_bulk_loads_bump_the_generation(self):
+        self.assertEqual(es_client.generation(), 0)
+        es_client.bump_generation()
+        self.assertEqual(es_client.generation(), 1)
+
+    def test_unknown_when_redis_is_down(self):
+        with mock.patch.object(self.redis, 'get', side_effect=ConnectionError('down')):
+            self.assertIsNone(es_client.generation())
+
+
+class ArticleStoreTests(FakeRedisMixin, SimpleTestCase):
+    # র + ZWJ + ্য: the joiner must not split the word
+    RAB = 'র\u200d্যাব'
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/articles.sqlite3'
+        self.store = ArticleStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def hits(self, query=None, store=None, **filters):
+        return [hit['_id'] for hit in (store or self.store).search_articles(query, filters=filters)['hits']['hits']]
+
+    def test_merge_rules_follow_the_index(self):
+        article = make_article()
+        doc_id = article_doc_id(article.url)
+        self.assertEqual(self.store.index_articles([(doc_id, article, True)]), [doc_id])
+        copy = rewrite(article, 'https://www.prothomalo.com/world/copy', 'world-all')
+        self.assertEqual(self.store.index_articles([(doc_id, copy, False)]), [])
+
+        hit = self.store.search_articles(filters={'category': 'world-all'})['hits']['hits'][0]
+        self.assertEqual(hit['_source']['category'], ['politics', 'world-all'])
+        self.assertEqual(hit['_source']['duplicate_urls'], [copy.url])
+        self.assertEqual(hit['_source']['content'], article.content)
+        self.assertEqual(self.store.get_article_stats('world-all'), {'total_articles': 1})
+
+    def test_bengali_words_are_whole_tokens(self):
+        article = make_article(content=f'{self.RAB} সদস্যরা কিশোর গ্যাংয়ের নেতাকে আটক করেছে')
+        self.store.index_articles([('doc', article, True)])
+        self.assertEqual(self.hits(self.RAB), ['doc'])
+        self.assertEqual(self.hits('কিশোর'), ['doc'])
+        # Fragments of a word are not words
+        self.assertEqual(self.hits('্যাব'), [])
+        self.assertEqual(self.hits('শোর'), [])
+
+    def test_mirror_answers_when_elasticsearch_fails(self):
+        article = make_article(0)
+        self.store.index_articles([(article_doc_id(article.url), article, True)])
+        with mock.patch('scraper.es_client.article_store', self.store), \
+                mock.patch.object(es_client, 'client') as client:
+            client.search.side_effect = ConnectionError('down')
+            client.count.side_effect = ConnectionError('down')
+            result = es_client.search_articles(filters={'category': 'politics'})
+            stats = es_client.get_article_stats('politics')
+        self.assertEqual([hit['_id'] for hit in result['hits']['hits']], [article_doc_id(article.url)])
+        self.assertEqual(stats, {'total_articles': 1})
+
+    def test_store_with_the_old_tokenizer_is_rebuilt(self):
+        self.store.close()
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA.replace('\u200c\u200d', ''))
+        connection.execute("INSERT INTO articles (doc_id, headline, content, category) VALUES (?, ?, ?, '[]')",
+                           ('doc', 'শিরোনাম', f'{self.RAB} অভিযান'))
+        connection.commit()
+        self.assertEqual(connection.execute(
+            "SELECT count(*) FROM articles_fts WHERE articles_fts MATCH ?", ('"্যাব"',)).fetchone()[0], 1)
+        connection.close()
+
+        store = ArticleStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(self.hits(self.RAB, store), ['doc'])
+        self.assertEqual(self.hits('্যাব', store), [])
+
+    def test_mirror_holds_only_what_elasticsearch_accepted(self):
+        accepted, rejected = make_article(0), make_article(1)
+        with mock.patch('scraper.tasks.article_store', self.store):
+            FakeBulkIndex(fail_ids={article_doc_id(rejected.url)}).load([accepted, rejected])
+            # Rebuilds write a new index; the store catches up with sync_article_store after the swap
+            FakeBulkIndex().load([make_article(2)], index='prothomalo_articles_new')
+            with mock.patch('scraper.tasks.helpers.streaming_bulk', side_effect=ConnectionError('down')), \
+                    mock.patch('scraper.tasks.es_client.client'), \
+                    mock.patch('scraper.tasks.es_client.create_index_if_not_exists'):
+                self.assertIsNone(bulk_index_articles([make_article(3)]))
+        self.assertEqual(self.hits(), [article_doc_id(accepted.url)])
+
+    def test_search_backend_setting_picks_the_instance(self):
+        with mock.patch('scraper.article_store.article_store', self.store), \
+                mock.patch('scraper.tasks.article_store', self.store):
+            self.assertIs(get_search_backend(), es_client)
+            with override_settings(SEARCH_BACKEND='sqlite'):
+                self.assertIs(get_search_backend(), self.store)
+                # Live loads go to the store alone
+                with mock.patch('scraper.tasks.es_client.client') as client, \
+                        mock.patch('scraper.tasks.queue_after_bulk'):
+                    bulk_index_articles([make_article(0)])
+                self.assertEqual(client.mock_calls, [])
+                result = async_to_sync(get_search_backend().asearch_articles)(filters={'category': 'politics'})
+            self.assertEqual([hit['_id'] for hit in result['hits']['hits']], [article_doc_id(make_article(0).url)])
+            with override_settings(SEARCH_BACKEND='solr'), self.assertRaises(ImproperlyConfigured):
+                get_search_backend()
+
+    def test_sync_removes_documents_the_index_no_longer_has(self):
+        self.store.index_articles([('gone', make_article(0), True)])
+        hits = [{'_id': 'kept', '_source': {**make_article(1).to_dict(), 'category': ['politics']}}]
+        with override_settings(ARTICLE_STORE_PATH=self.path), mock.patch.object(es_client, 'client'), \
+                mock.patch('scraper.related.redis_client', FakeRedis()), \
+                mock.patch('scraper.management.commands.sync_article_store.helpers.scan', return_value=hits):
+            call_command('sync_article_store', stdout=StringIO())
+        self.assertEqual(self.hits(), ['kept'])
+        self.assertEqual(self.store.get_article_stats('politics'), {'total_articles': 1})
+
+    def test_search_backend_is_abstract(self):
+        with self.assertRaises(TypeError):
+            SearchBackend()
@@ -8,9 +8,12 @@ urlpatterns = [
     
     path('articles/', views.list_all_articles, name='list_all_articles'),
     path('articles/search/', views.search_articles, name='search_articles'),
+    path('articles/suggest/', views.suggest_articles, name='suggest_articles'),
+    path('articles/<str:article_id>/related/', views.related_articles_view, name='related_articles'),
     
     path('categories/', views.available_categories, name='available_categories'),
     path('categories/<str:category>/stats/', views.category_stats, name='category_stats'),
+    path('trends/', views.article_trends, name='article_trends'),
     
     path('tasks/<str:task_id>/download/', views.download_s3_data, name='download_s3_data'),
     path('s3/status/', views.s3_backup_status, name='s3_backup_status'),
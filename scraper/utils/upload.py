@@ -1,7 +1,7 @@
 
 import boto3
 import gzip
-import json
+from scraper import serialization
 from io import BytesIO
 from datetime import datetime
 
@@ -13,7 +13,7 @@ def upload_articles_to_s3(articles, bucket_name, category):
     # Compress JSON data
     buffer = BytesIO()
     with gzip.GzipFile(filename='data.json', mode='wb', fileobj=buffer) as gz:
-        gz.write(json.dumps(articles, ensure_ascii=False, indent=2).encode('utf-8'))
+        gz.write(serialization.dumps(articles, indent=True))
     buffer.seek(0)
 
     # Upload to S3
@@ -4,21 +4,38 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
-import uuid
+from django.db.models import Max
+from django.views.decorators.cache import cache_control
+from django.core.cache import caches
+from django.views.decorators.http import condition
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from asgiref.sync import sync_to_async
+from functools import wraps
+import hashlib
+from datetime import timedelta
 import logging
 import boto3
 from botocore.exceptions import ClientError
 from django.conf import settings
-from .models import ScrapingTask
+from django.utils import timezone
+from .models import ScrapingTask, DailyRollup
 from .serializers import (
     ScrapingTaskSerializer, 
     StartScrapingSerializer, 
     ArticleSearchSerializer,
+    SuggestSerializer,
+    RelatedSerializer,
+    TrendsSerializer,
     ArticleSerializer,
     S3DownloadSerializer
 )
-from .tasks import scrape_category_task
-from .es_client import es_client
+from .tasks import start_category_scrape
+from .async_api import async_api_view
+from .es_client import es_client, async_es_client
+from .search_backends import get_search_backend
+from .related import related_articles
+from .rollups import summarize
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +44,41 @@ class CustomPagination(PageNumberPagination):
     page_size_query_param = 'size'
     max_page_size = 100
 
+def make_etag(*parts):
+    return hashlib.blake2b('|'.join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+
+async def articles_etag(request, *args, **kwargs):
+    """Changes whenever articles are indexed or a scraping task is updated.
+
+    None while the index generation is unknown (Redis down): an ETag without
+    it would not change after new indexing and would keep stale pages alive.
+    """
+    generation = await sync_to_async(es_client.generation, thread_sensitive=False)()
+    if generation is None:
+        return None
+    last_task_update = (await ScrapingTask.objects.aaggregate(last=Max('updated_at')))['last']
+    return make_etag(generation, last_task_update, request.get_full_path())
+
+def async_condition(etag_func):
+    """condition() for async views whose ETag itself needs awaiting; no ETag means no conditional response"""
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            if etag is None:
+                return await view(request, *args, **kwargs)
+            etag = quote_etag(etag)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+CATEGORIES_ETAG = make_etag(ScrapingTask.CATEGORY_CHOICES)
+
 @api_view(['POST'])
 def start_scraping(request):
     serializer = StartScrapingSerializer(data=request.data)
@@ -34,23 +86,44 @@ def start_scraping(request):
         category = serializer.validated_data['category']
         max_pages = serializer.validated_data['max_pages']
 
-        task_id = str(uuid.uuid4())
-        task = ScrapingTask.objects.create(
-            task_id=task_id,
-            category=category,
-            max_pages=max_pages
-        )
+        task, outcome = start_category_scrape(category, max_pages)
+        if outcome == 'busy':
+            return Response({
+                'category': category,
+                'error': f"Another scrape request for {category} is being handled, try again shortly",
+                'retry_after': 5
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
+
+        data = {
+            'task_id': task.task_id,
+            'category': category,
+            'max_pages': task.max_pages,
+            'status': task.status,
+        }
 
-        logger.info(f"Starting scraping task: {task_id} for category: {category}")
-        scrape_category_task.delay(task_id, category, max_pages)
+        if outcome == 'recent':
+            age = (timezone.now() - task.updated_at).total_seconds()
+            retry_after = max(1, int(settings.SCRAPER_COALESCE_WINDOW - age))
+            logger.info(f"Rejected scrape of {category}: task {task.task_id} finished {age:.0f}s ago")
+            return Response({
+                **data,
+                'error': f"{category} was scraped {int(age)} seconds ago",
+                'retry_after': retry_after
+            }, status=status.HTTP_409_CONFLICT, headers={'Retry-After': str(retry_after)})
 
+        if outcome == 'created':
+            logger.info(f"Starting scraping task: {task.task_id} for category: {category}")
+            return Response({
+                **data, 'message': 'Scraping task started successfully'
+            }, status=status.HTTP_201_CREATED)
+
+        logger.info(f"Coalesced scrape request for {category} into task {task.task_id} ({outcome})")
         return Response({
-            'task_id': task_id,
-            'category': category,
-            'max_pages': max_pages,
-            'status': 'PENDING',
-            'message': 'Scraping task started successfully'
-        }, status=status.HTTP_201_CREATED)
+            **data,
+            'coalesced': outcome,
+            'message': (f'Extended the running task to {task.max_pages} pages' if outcome == 'extended'
+                        else 'A scraping task for this category is already running')
+        })
 
     logger.warning(f"Invalid scraping request: {serializer.errors}")
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -67,9 +140,11 @@ def list_tasks(request):
     serializer = ScrapingTaskSerializer(tasks, many=True)
     return Response(serializer.data)
 
-@api_view(['GET'])
-def search_articles(request):
-    serializer = ArticleSearchSerializer(data=request.GET)
+@cache_control(no_cache=True)
+@async_condition(articles_etag)
+@async_api_view(['GET'])
+async def search_articles(request):
+    serializer = ArticleSearchSerializer(data=request.query_params)
     if not serializer.is_valid():
         logger.warning(f"Invalid search query: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -92,14 +167,14 @@ def search_articles(request):
         filters['date_to'] = data['date_to'].strftime('%Y-%m-%d')
 
     logger.info(f"Searching articles with filters: {filters} and query: {query}")
-    result = es_client.search_articles(
+    result = await get_search_backend().asearch_articles(
         query=query if query else None,
         page=page,
         size=size,
         filters=filters if filters else None
     )
 
-    articles = [hit['_source'] for hit in result['hits']['hits']]
+    articles = [{'id': hit['_id'], **hit['_source']} for hit in result['hits']['hits']]
     total = result['hits']['total']['value']
 
     logger.info(f"Search result count: {total} articles")
@@ -111,16 +186,57 @@ def search_articles(request):
         'results': articles
     })
 
-@api_view(['GET'])
-def list_all_articles(request):
+@cache_control(max_age=settings.SUGGEST_CACHE_TIMEOUT)
+@async_api_view(['GET'])
+async def suggest_articles(request):
+    """Headline/author typeahead from the completion suggester, cached per prefix"""
+    serializer = SuggestSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    prefix = data['q'].lower()
+    category = data.get('category')
+    cache_key = f"suggest:{make_etag(prefix, category, data['size'])}"
+
+    suggest_cache = caches['suggest']
+    suggestions = await suggest_cache.aget(cache_key)
+    if suggestions is None:
+        suggestions = await async_es_client.suggest(prefix, category, data['size'])
+        await suggest_cache.aset(cache_key, suggestions)
+
+    return Response({'query': data['q'], 'suggestions': suggestions})
+
+@cache_control(max_age=settings.RELATED_CACHE_TIMEOUT)
+@async_api_view(['GET'])
+async def related_articles_view(request, article_id):
+    """Related stories precomputed at index time; one Redis lookup, no search"""
+    serializer = RelatedSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    related = await sync_to_async(related_articles.get, thread_sensitive=False)(
+        article_id, serializer.validated_data['size']
+    )
+    if related is None:
+        return Response(
+            {'error': 'Related articles are unavailable'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return Response({'id': article_id, 'results': related})
+
+@cache_control(no_cache=True)
+@async_condition(articles_etag)
+@async_api_view(['GET'])
+async def list_all_articles(request):
     """Return all articles with pagination"""
-    page = int(request.GET.get('page', 1))
-    size = int(request.GET.get('size', 20))
+    page = int(request.query_params.get('page', 1))
+    size = int(request.query_params.get('size', 20))
 
     logger.info("Fetching all articles from Elasticsearch")
-    result = es_client.search_articles(query=None, page=page, size=size)
+    result = await get_search_backend().asearch_articles(query=None, page=page, size=size)
 
-    articles = [hit['_source'] for hit in result['hits']['hits']]
+    articles = [{'id': hit['_id'], **hit['_source']} for hit in result['hits']['hits']]
     total = result['hits']['total']['value']
 
     return Response({
@@ -131,8 +247,10 @@ def list_all_articles(request):
         'results': articles
     })
 
-@api_view(['GET'])
-def category_stats(request, category):
+@cache_control(no_cache=True)
+@async_condition(articles_etag)
+@async_api_view(['GET'])
+async def category_stats(request, category):
     valid_categories = [choice[0] for choice in ScrapingTask.CATEGORY_CHOICES]
     if category not in valid_categories:
         logger.warning(f"Invalid category stats request: {category}")
@@ -141,8 +259,8 @@ def category_stats(request, category):
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    stats = es_client.get_article_stats(category)
-    recent_tasks = ScrapingTask.objects.filter(category=category)[:5]
+    stats = await get_search_backend().aget_article_stats(category)
+    recent_tasks = [task async for task in ScrapingTask.objects.filter(category=category)[:5]]
     task_serializer = ScrapingTaskSerializer(recent_tasks, many=True)
 
     logger.info(f"Stats for category '{category}': {stats['total_articles']} articles")
@@ -152,6 +270,32 @@ def category_stats(request, category):
         'recent_tasks': task_serializer.data
     })
 
+@api_view(['GET'])
+def article_trends(request):
+    """Daily volume, word counts and top authors/locations, read from the precomputed rollups only"""
+    serializer = TrendsSerializer(data=request.GET)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    date_to = data.get('date_to') or timezone.localdate()
+    date_from = data.get('date_from') or date_to - timedelta(days=settings.TRENDS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        return Response({'error': 'date_from is after date_to'}, status=status.HTTP_400_BAD_REQUEST)
+
+    rollups = DailyRollup.objects.filter(date__range=(date_from, date_to))
+    if data.get('category'):
+        rollups = rollups.filter(category=data['category'])
+
+    return Response({
+        'category': data.get('category'),
+        'date_from': date_from,
+        'date_to': date_to,
+        **summarize(rollups, data['top'])
+    })
+
+@cache_control(no_cache=True)
+@condition(etag_func=lambda request: CATEGORIES_ETAG)
 @api_view(['GET'])
 def available_categories(request):
     categories = [